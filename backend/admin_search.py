@@ -0,0 +1,145 @@
+"""Admin search over the hot inquiry and application collections.
+
+Two indexes back each collection:
+
+- a weighted text index, for relevance-ranked searches on whole words
+  ("wedding quote")
+- a multikey index on ``search_keys``, the lowercased words of the name and
+  email plus their full values, for as-you-type prefixes ("jo sm",
+  "john.smith@"). An anchored, case-sensitive regex on it is an index range
+  scan.
+
+A query runs as a text search first. If that finds nothing, or the query
+looks like an email address, it runs as a prefix search, newest first.
+``search_keys`` is set when documents are written, and backfilled at
+startup for older ones.
+"""
+import datetime
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+logger = logging.getLogger(__name__)
+
+KEY_SEPARATORS = re.compile(r"[\s@._+\-]+")
+
+
+def search_keys(*values: Optional[str]) -> List[str]:
+    """Lowercased words and whole values for prefix matching"""
+    keys = set()
+    for value in values:
+        value = (value or "").strip().lower()
+        if not value:
+            continue
+        keys.add(value)
+        keys.update(word for word in KEY_SEPARATORS.split(value) if word)
+    return sorted(keys)
+
+
+class SearchTarget:
+    """A searchable collection, its text weights and the fields prefix keys come from"""
+
+    def __init__(
+        self,
+        collection,
+        text_weights: Dict[str, int],
+        key_fields: List[str],
+        projection: Dict[str, int],
+        date_field: str = "created_at",
+    ):
+        self.collection = collection
+        self.text_weights = text_weights
+        self.key_fields = key_fields
+        self.projection = projection
+        # "_id" when the collection has no trustworthy timestamp field
+        self.date_field = date_field
+
+
+class AdminSearch:
+    def __init__(self, targets: Dict[str, SearchTarget], max_limit: int = 100):
+        self.targets = targets
+        self.max_limit = max_limit
+
+    def add_search_keys(self, name: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+        target = self.targets[name]
+        doc["search_keys"] = search_keys(*(doc.get(field) for field in target.key_fields))
+        return doc
+
+    async def ensure_indexes(self):
+        for target in self.targets.values():
+            await target.collection.create_index(
+                [(field, "text") for field in target.text_weights],
+                name="search_text",
+                weights=target.text_weights
+            )
+            await target.collection.create_index("search_keys")
+
+    async def backfill_keys(self, batch_size: int = 500) -> int:
+        """Compute search_keys for documents written before they existed"""
+        updated = 0
+        for name, target in self.targets.items():
+            projection = {field: 1 for field in target.key_fields}
+            cursor = target.collection.find({"search_keys": {"$exists": False}}, projection)
+            operations = []
+            async for doc in cursor:
+                keys = search_keys(*(doc.get(field) for field in target.key_fields))
+                operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"search_keys": keys}}))
+                if len(operations) >= batch_size:
+                    await target.collection.bulk_write(operations, ordered=False)
+                    updated += len(operations)
+                    operations = []
+            if operations:
+                await target.collection.bulk_write(operations, ordered=False)
+                updated += len(operations)
+        return updated
+
+    def _date_range(self, target: SearchTarget, start: Optional[datetime.datetime], end: Optional[datetime.datetime]):
+        bounds: Dict[str, Any] = {}
+        if start:
+            bounds["$gte"] = ObjectId.from_datetime(start) if target.date_field == "_id" else start
+        if end:
+            bounds["$lt"] = ObjectId.from_datetime(end) if target.date_field == "_id" else end
+        return bounds
+
+    async def search(
+        self,
+        name: str,
+        q: str = "",
+        filters: Optional[Dict[str, Any]] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+        skip: int = 0,
+        limit: int = 20,
+    ) -> Dict[str, Any]:
+        """Filtered search; ``match`` says whether text relevance, prefixes or just filters were used"""
+        target = self.targets[name]
+        limit = max(1, min(limit, self.max_limit))
+        query: Dict[str, Any] = {field: value for field, value in (filters or {}).items() if value is not None}
+        date_range = self._date_range(target, start, end)
+        if date_range:
+            query[target.date_field] = date_range
+
+        q = q.strip()
+        if q and "@" not in q:
+            text_query = {**query, "$text": {"$search": q}}
+            total = await target.collection.count_documents(text_query)
+            if total:
+                cursor = target.collection.find(
+                    text_query,
+                    {**target.projection, "score": {"$meta": "textScore"}}
+                ).sort([("score", {"$meta": "textScore"}), ("_id", -1)]).skip(skip).limit(limit)
+                return {"match": "text", "total": total, "items": await cursor.to_list(length=limit)}
+
+        match = "filter"
+        if q:
+            match = "prefix"
+            query["$and"] = [
+                {"search_keys": {"$regex": f"^{re.escape(token)}"}}
+                for token in q.lower().split()
+            ]
+        total = await target.collection.count_documents(query)
+        cursor = target.collection.find(query, target.projection).sort(target.date_field, -1).skip(skip).limit(limit)
+        return {"match": match, "total": total, "items": await cursor.to_list(length=limit)}
@@ -1,10 +1,13 @@
-from fastapi import FastAPI, HTTPException, Depends, UploadFile, File
+from startup import LazyComponent, LazyMongo, StartupProfiler, load_env_file
+# Created first so the report covers every import below
+startup_profiler = StartupProfiler()
+
+from fastapi import FastAPI, HTTPException, Depends, UploadFile, File, Form, Query
 from pydantic import BaseModel, EmailStr
-from motor.motor_asyncio import AsyncIOMotorClient
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.encoders import jsonable_encoder
 from bson import ObjectId
-import bcrypt
 import os
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from jose import jwt, JWTError
@@ -13,31 +16,80 @@ from bson import ObjectId, errors
 # REMOVED: from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from typing import List, Optional
 from fastapi.security import OAuth2PasswordBearer
-from dotenv import load_dotenv
-import magic
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, AsyncIterator
 import logging
 import base64
 import io
-from PIL import Image
-import httpx
-from collections import defaultdict
 from fastapi import Request
 import random
 import string
 from typing import Dict
+import asyncio
+import time
+import hashlib
+from contextlib import asynccontextmanager
+from zoneinfo import ZoneInfo
+from pymongo import UpdateOne
+
+
+from archive import ArchiveManager, ArchiveTier, archivable_contacts, archivable_applications
+from write_behind import ContactWriteBehind
+from email_outbox import EmailOutbox, PermanentEmailError
+from campaigns import CampaignNotResumable, CampaignRunner, CampaignTemplate, PermanentBatchError, RateLimitedError
+from mail_transport import MailTransport, MailTransportError
+from passwords import PasswordHasher, PasswordHasherBusy, default_workers
+from rate_limit import InMemoryRateLimiter, MongoRateLimiter, RateLimitMiddleware, RatePolicy
+import verification_store
+from recaptcha import RecaptchaVerifier
+from spam_rules import SpamScorer, validate_rule
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, Registry
+from log_config import RequestIdMiddleware, setup_logging
+from image_pool import ImageWorkerPool, ImagePoolBusy, default_image_workers
+from health import DEGRADED, FAIL, OK, HealthMonitor, PoolMonitor
+from loop_monitor import LoopLagMonitor, LoopMonitorMiddleware
+from compression import BROTLI_AVAILABLE, CompressionMiddleware
+from public_cache import PublicContentCache
+from dashboard import DashboardStats
+from sync_feed import InvalidSyncRequest, SyncFeed
+from notifications import NotificationBroker
+from admin_search import AdminSearch, SearchTarget
+from exports import ExportSpec, InvalidExportRequest, stream_export
+from gallery_import import GalleryImporter, InvalidGalleryImport
+from placeholders import backfill_placeholders, compute_placeholders, decode_data, placeholder_from_bytes
+
+startup_profiler.checkpoint("framework and modules")
+
+# Load environment variables from .env when present (local development)
+with startup_profiler.measure("dotenv"):
+    load_env_file()
+
+# Records are written by a background thread; see log_config.py for LOG_* settings
+setup_logging(
+    level=os.getenv("LOG_LEVEL", "INFO"),
+    module_levels=os.getenv("LOG_LEVELS", ""),
+    fmt=os.getenv("LOG_FORMAT", "json")
+)
+logger = logging.getLogger(__name__)
+# Per-image progress messages; enable with LOG_LEVELS=app.images=DEBUG
+image_logger = logging.getLogger(f"{__name__}.images")
+
+HEIC_SUPPORTED = None  # known once imaging has loaded
 
-# NEW: Import Resend SDK
-import resend
+def load_imaging():
+    """Import PIL and register the HEIF opener - on the first image or during pre-warm"""
+    global HEIC_SUPPORTED
+    from PIL import Image
+    try:
+        from pillow_heif import register_heif_opener
+        register_heif_opener()
+        HEIC_SUPPORTED = True
+        logger.info("HEIC support enabled")
+    except ImportError:
+        HEIC_SUPPORTED = False
+        logger.warning("HEIC support not available - install pillow-heif")
+    return Image
 
-try:
-    from pillow_heif import register_heif_opener
-    register_heif_opener()
-    HEIC_SUPPORTED = True
-    print("✅ HEIC support enabled")
-except ImportError:
-    HEIC_SUPPORTED = False
-    print("⚠️ HEIC support not available - install pillow-heif")
+imaging = LazyComponent("imaging", load_imaging, startup_profiler)
 
 class SmartImageCompressor:
     MAX_SIZE_BYTES = 15 * 1024 * 1024  # 15MB threshold
@@ -66,6 +118,7 @@ class SmartImageCompressor:
                 return False, "File is empty"
             
             # Try to open the image with PIL (should work with HEIC if pillow-heif is installed)
+            Image = imaging.get()
             image = Image.open(io.BytesIO(file_content))
             
             # Get basic info
@@ -99,16 +152,17 @@ class SmartImageCompressor:
         
         try:
             # Open image (works with HEIC if pillow-heif is installed)
+            Image = imaging.get()
             image = Image.open(io.BytesIO(image_bytes))
             original_dimensions = image.size
             original_format = image.format or "Unknown"
             original_mode = image.mode
             
-            print(f"   📸 Converting {original_format} to JPEG: {original_dimensions} {original_mode}")
+            image_logger.debug(f"Converting {original_format} to JPEG: {original_dimensions} {original_mode}")
             
             # ALWAYS convert to RGB for consistent JPEG output
             if image.mode in ('RGBA', 'LA', 'P'):
-                print(f"   🎨 Converting {image.mode} to RGB")
+                image_logger.debug(f"Converting {image.mode} to RGB")
                 background = Image.new('RGB', image.size, (255, 255, 255))
                 if image.mode == 'P':
                     image = image.convert('RGBA')
@@ -116,12 +170,12 @@ class SmartImageCompressor:
                     background.paste(image, mask=image.split()[-1])
                     image = background
             elif image.mode != 'RGB':
-                print(f"   🎨 Converting {image.mode} to RGB")
+                image_logger.debug(f"Converting {image.mode} to RGB")
                 image = image.convert('RGB')
             
             # Resize if needed
             if image.size[0] > max_width or image.size[1] > max_height:
-                print(f"   📐 Resizing from {image.size} to fit {max_width}x{max_height}")
+                image_logger.debug(f"Resizing from {image.size} to fit {max_width}x{max_height}")
                 image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
             
             # ALWAYS save as JPEG for web compatibility
@@ -173,26 +227,26 @@ class SmartImageCompressor:
     ) -> Tuple[bytes, Dict[str, Any]]:
         """Progressive compression - always outputs JPEG"""
         
-        print(f"   🎯 Target size: {target_size / (1024*1024):.1f}MB")
+        image_logger.debug(f"Target size: {target_size / (1024*1024):.1f}MB")
         
         # Try different quality levels
         quality_levels = [85, 75, 65, 55, 45, 35]
         
         for quality in quality_levels:
             try:
-                print(f"   🔧 Trying quality {quality}")
+                image_logger.debug(f"Trying quality {quality}")
                 jpeg_bytes, metadata = SmartImageCompressor.convert_to_web_format(
                     image_bytes, quality=quality
                 )
                 
                 if len(jpeg_bytes) <= target_size:
-                    print(f"   ✅ Target achieved with quality {quality}")
+                    image_logger.debug(f"Target achieved with quality {quality}")
                     metadata['compression_level'] = 'progressive'
                     metadata['target_achieved'] = True
                     return jpeg_bytes, metadata
                     
             except Exception as e:
-                print(f"   ⚠️ Quality {quality} failed: {e}")
+                image_logger.warning(f"Quality {quality} failed: {e}")
                 continue
         
         # Try dimension reduction
@@ -203,7 +257,7 @@ class SmartImageCompressor:
                 max_w = int(1920 * scale)
                 max_h = int(1080 * scale)
                 
-                print(f"   📏 Trying {scale*100}% scale ({max_w}x{max_h})")
+                image_logger.debug(f"Trying {scale*100}% scale ({max_w}x{max_h})")
                 
                 jpeg_bytes, metadata = SmartImageCompressor.convert_to_web_format(
                     image_bytes,
@@ -213,14 +267,14 @@ class SmartImageCompressor:
                 )
                 
                 if len(jpeg_bytes) <= target_size:
-                    print(f"   ✅ Target achieved with {scale*100}% scale")
+                    image_logger.debug(f"Target achieved with {scale*100}% scale")
                     metadata['compression_level'] = 'progressive_with_resize'
                     metadata['scale_factor'] = scale
                     metadata['target_achieved'] = True
                     return jpeg_bytes, metadata
                     
         except Exception as e:
-            print(f"   ⚠️ Progressive resize failed: {e}")
+            image_logger.warning(f"Progressive resize failed: {e}")
         
         # Best effort fallback
         try:
@@ -236,15 +290,47 @@ class SmartImageCompressor:
 # Initialize the compressor
 image_compressor = SmartImageCompressor()
 
-# Load environment variables
-load_dotenv()
+# Stored image fields that get a placeholder in the "placeholders" field
+GALLERY_IMAGE_FIELDS = ("thumbnail", "images")
+LATEST_WORK_IMAGE_FIELDS = ("thumbnail",)
+
+def compress_with_placeholder(image_bytes: bytes, target_size: int) -> Tuple[bytes, Dict[str, Any]]:
+    """progressive_compress, plus the placeholder of the image it kept"""
+    jpeg_bytes, metadata = image_compressor.progressive_compress(image_bytes, target_size=target_size)
+    metadata['placeholder'] = placeholder_from_bytes(jpeg_bytes)
+    return jpeg_bytes, metadata
+
+# Compressor calls run on this pool instead of the event loop
+image_pool = ImageWorkerPool(
+    max_workers=int(os.getenv("IMAGE_MAX_WORKERS", str(default_image_workers()))),
+    max_pending=int(os.getenv("IMAGE_MAX_PENDING", "16"))
+)
+
+async def run_image_job(func, *args, **kwargs):
+    """image_pool.run for request handlers - a saturated pool answers 503"""
+    try:
+        return await image_pool.run(func, *args, **kwargs)
+    except ImagePoolBusy:
+        raise HTTPException(
+            status_code=503,
+            detail="Image processing is busy, please try again shortly",
+            headers={"Retry-After": "5"}
+        )
 
 # NEW: Configure Resend API
 RESEND_API_KEY = os.getenv("RESEND_API_KEY")
 if not RESEND_API_KEY:
     raise ValueError("RESEND_API_KEY environment variable is required")
 
-resend.api_key = RESEND_API_KEY
+# Shared keep-alive transport for every email; RESEND_API_URL can point at fake_resend.py
+mail_transport = MailTransport(
+    api_url=os.getenv("RESEND_API_URL", "https://api.resend.com"),
+    api_key=RESEND_API_KEY,
+    timeout=float(os.getenv("EMAIL_SEND_TIMEOUT_SECONDS", "10")),
+    connect_timeout=float(os.getenv("EMAIL_CONNECT_TIMEOUT_SECONDS", "3")),
+    failure_threshold=int(os.getenv("EMAIL_CIRCUIT_FAILURE_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("EMAIL_CIRCUIT_RESET_SECONDS", "30"))
+)
 
 EMAIL_FROM = "E&S Decorations <noreply@esdecorations.in>"
 
@@ -256,17 +342,81 @@ SECRET_KEY = os.getenv("SECRET_KEY", "miniproject")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_HOURS = 24  # Token expires after 24 hours
 RECAPTCHA_SECRET_KEY = os.getenv("RECAPTCHA_SECRET_KEY")
-RECAPTCHA_VERIFY_URL = "https://www.google.com/recaptcha/api/siteverify"
+# Overridable so tests and benchmarks can run against a local fake verify server
+RECAPTCHA_VERIFY_URL = os.getenv("RECAPTCHA_VERIFY_URL", "https://www.google.com/recaptcha/api/siteverify")
 RECAPTCHA_MINIMUM_SCORE = 0.5
 
-ip_requests = defaultdict(list)
-IP_LIMIT = 3
-TIME_WINDOW = 3600
+# Long-lived pooled verifier with a tight timeout and a replay cache
+recaptcha_verifier = RecaptchaVerifier(
+    RECAPTCHA_SECRET_KEY,
+    RECAPTCHA_VERIFY_URL,
+    timeout=float(os.getenv("RECAPTCHA_TIMEOUT_SECONDS", "3")),
+    cache_size=int(os.getenv("RECAPTCHA_CACHE_SIZE", "10000"))
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup and shutdown; heavy subsystems are built lazily or pre-warmed in the background"""
+    await start_background_tasks()
+    yield
+    await stop_background_tasks()
 
 # FastAPI Instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# MongoDB Connection
+MONGO_URI = os.getenv("MONGODB_URL", "mongodb://127.0.0.1:27017")
+DB_NAME = os.getenv("DB_NAME", "ESWEBSITE")
+# The Motor client is created on first use (or by pre-warm), not at import
+mongo_pool_monitor = PoolMonitor()
+mongo = LazyMongo(MONGO_URI, DB_NAME, startup_profiler, event_listeners=[mongo_pool_monitor])
+contacts_collection = mongo.collection("contacts")
+admins_collection = mongo.collection("admins")
+faqs_collection = mongo.collection("faqs")
+latest_works_collection = mongo.collection("latest_works")
+job_applications_collection = mongo.collection("job_applications")
+job_listings_collection = mongo.collection("job_listings")
+events_collection = mongo.collection("events")
+rate_limits_collection = mongo.collection("rate_limits")
+verification_codes_collection = mongo.collection("admin_verification_codes")
+email_outbox_collection = mongo.collection("email_outbox")
+email_campaigns_collection = mongo.collection("email_campaigns")
+contacts_archive_collection = mongo.collection("contacts_archive")
+job_applications_archive_collection = mongo.collection("job_applications_archive")
+spam_rules_collection = mongo.collection("spam_rules")
+sync_tombstones_collection = mongo.collection("sync_tombstones")
+gallery_imports_collection = mongo.collection("gallery_imports")
+# Rate limiting - "memory" is per process, "mongo" is shared by every worker/instance
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+rate_limiter = (
+    MongoRateLimiter(rate_limits_collection)
+    if RATE_LIMIT_BACKEND == "mongo"
+    else InMemoryRateLimiter(max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000")))
+)
+ADMIN_PATH = "/admin-management-pambady-kayathumkal"
+rate_limit_policies = {
+    ("POST", "/submit"): RatePolicy.parse("submit", os.getenv("RATE_LIMIT_SUBMIT", "3/3600")),
+    ("POST", f"{ADMIN_PATH}/request-verification"): RatePolicy.parse(
+        "admin_verification", os.getenv("RATE_LIMIT_ADMIN_VERIFICATION", "5/900")
+    ),
+    ("POST", f"{ADMIN_PATH}/login"): RatePolicy.parse("admin_login", os.getenv("RATE_LIMIT_ADMIN_LOGIN", "10/900")),
+    ("POST", "/upload-image"): RatePolicy.parse("upload_image", os.getenv("RATE_LIMIT_UPLOAD_IMAGE", "60/60")),
+}
+# JSON responses above the threshold are gzip/Brotli encoded; innermost, so metrics see wire sizes
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
+if not BROTLI_AVAILABLE:
+    logger.info("brotli is not installed, responses are compressed with gzip only")
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter, policies=rate_limit_policies)
+# Public content rendered and compressed once per version; writes below call public_cache.invalidate()
+public_cache = PublicContentCache(
+    ttl=float(os.getenv("PUBLIC_CACHE_TTL_SECONDS", "30")),
+    max_bytes=int(os.getenv("PUBLIC_CACHE_MAX_MB", "64")) * 1024 * 1024,
+    minimum_size=COMPRESSION_MIN_BYTES
+)
 
 # CORS Middleware - Updated for production
+# Added after rate limiting so it wraps it and 429 responses still carry CORS headers
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -278,20 +428,387 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID"],
 )
 
-# MongoDB Connection
-MONGO_URI = os.getenv("MONGODB_URL", "mongodb://127.0.0.1:27017")
-DB_NAME = os.getenv("DB_NAME", "ESWEBSITE")
-client = AsyncIOMotorClient(MONGO_URI)
-db = client[DB_NAME]
-contacts_collection = db["contacts"]
-admins_collection = db["admins"]
-faqs_collection = db["faqs"]
-latest_works_collection = db["latest_works"]
-job_applications_collection = db["job_applications"]
-job_listings_collection = db["job_listings"]
-events_collection = db["events"]  
+# Prometheus metrics - added last so it is outermost and also times CORS and 429 responses
+metrics_registry = Registry()
+NOTIFICATIONS_STREAM_PATH = "/notifications/stream"
+# Long-lived SSE connections would skew the latency histograms
+app.add_middleware(MetricsMiddleware, registry=metrics_registry, skip_paths=("/metrics", NOTIFICATIONS_STREAM_PATH))
+# Optional: reports callbacks that block the event loop, attributed to the route being served
+LOOP_MONITOR_ENABLED = os.getenv("LOOP_MONITOR", "false").lower() == "true"
+loop_monitor = None
+if LOOP_MONITOR_ENABLED:
+    loop_monitor = LoopLagMonitor(
+        threshold=float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100")) / 1000,
+        interval=float(os.getenv("LOOP_LAG_INTERVAL_MS", "50")) / 1000
+    )
+    app.add_middleware(LoopMonitorMiddleware, monitor=loop_monitor)
+# Outermost, so everything logged while serving a request carries its id
+app.add_middleware(RequestIdMiddleware)
+METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # if set, /metrics requires "Authorization: Bearer <token>"
+image_bytes_processed = metrics_registry.counter(
+    "image_bytes_processed_total", "Image bytes received and returned by /upload-image", ("direction",)
+)
+image_uploads = metrics_registry.counter(
+    "image_uploads_total", "Processed image uploads by outcome", ("outcome",)
+)
+metrics_registry.callback(
+    "emails_sent_total", "Messages accepted by the mail provider",
+    lambda: mail_transport.metrics.messages_sent, metric_type="counter"
+)
+metrics_registry.callback(
+    "email_send_errors_total", "Failed calls to the mail provider",
+    lambda: mail_transport.metrics.errors, metric_type="counter"
+)
+metrics_registry.callback(
+    "email_circuit_open", "1 while the mail circuit breaker is open",
+    lambda: 1 if mail_transport.breaker.state == "open" else 0
+)
+# Pushes new inquiries and applications to connected admins
+notification_broker = NotificationBroker(
+    history=int(os.getenv("NOTIFICATIONS_HISTORY", "500")),
+    heartbeat=float(os.getenv("NOTIFICATIONS_HEARTBEAT_SECONDS", "15"))
+)
+metrics_registry.callback(
+    "notification_subscribers", "Open admin notification streams", lambda: notification_broker.subscribers
+)
+metrics_registry.callback(
+    "public_cache_requests_total", "Public content requests by cache result",
+    lambda: {
+        ("hit",): public_cache.hits,
+        ("miss",): public_cache.misses,
+        ("not_modified",): public_cache.not_modified,
+    },
+    labelnames=("result",), metric_type="counter"
+)
+
+# Admin "changes since" feed; every write below stamps updated_at and deletes leave tombstones
+sync_feed = SyncFeed(
+    {
+        "contacts": contacts_collection,
+        "job_applications": job_applications_collection,
+        "job_listings": job_listings_collection,
+        "faqs": faqs_collection,
+        "events": events_collection,
+        "latest_works": latest_works_collection,
+    },
+    sync_tombstones_collection,
+    projections={"contacts": {"search_keys": 0}, "job_applications": {"resume": 0, "search_keys": 0}},
+    overlap_seconds=float(os.getenv("SYNC_OVERLAP_SECONDS", "5")),
+    retention_days=int(os.getenv("SYNC_TOMBSTONE_DAYS", "30"))
+)
+
+def with_updated_at(fields: dict) -> dict:
+    """Stamp a document or $set payload so the sync feed picks the change up"""
+    fields["updated_at"] = datetime.datetime.utcnow()
+    return fields
+
+async def record_archived(tier_name: str, ids: list):
+    # Archived documents leave the admin lists, so clients treat them as deleted
+    await sync_feed.record_deleted(tier_name, ids, reason="archived")
+
+# Hot/archive tiering - solved/flagged inquiries and decided applications
+archive_manager = ArchiveManager(
+    tiers=[
+        ArchiveTier(
+            "contacts",
+            contacts_collection,
+            contacts_archive_collection,
+            archivable_contacts,
+            text_fields=["name", "email", "subject", "message"]
+        ),
+        ArchiveTier(
+            "job_applications",
+            job_applications_collection,
+            job_applications_archive_collection,
+            archivable_applications,
+            text_fields=["name", "email", "experience"]
+        ),
+    ],
+    archive_after_days=int(os.getenv("ARCHIVE_AFTER_DAYS", "90")),
+    batch_size=int(os.getenv("ARCHIVE_BATCH_SIZE", "500")),
+    ttl_days=int(os.getenv("ARCHIVE_TTL_DAYS", "0")),  # 0 keeps archived records forever
+    interval_seconds=int(os.getenv("ARCHIVE_INTERVAL_MINUTES", "60")) * 60,
+    on_moved=record_archived
+)
+# Opt-in: once enabled, old solved/closed records leave /inquiries and /job-applications
+ARCHIVE_ENABLED = os.getenv("ARCHIVE_ENABLED", "false").lower() == "true"
+
+# Admin search over the hot collections (the archive has its own endpoints)
+admin_search = AdminSearch({
+    "contacts": SearchTarget(
+        contacts_collection,
+        text_weights={"name": 10, "email": 10, "subject": 5, "message": 1},
+        key_fields=["name", "email"],
+        projection={"name": 1, "email": 1, "subject": 1, "message": 1, "is_solved": 1, "is_flagged": 1, "created_at": 1}
+    ),
+    "job_applications": SearchTarget(
+        job_applications_collection,
+        text_weights={"name": 10, "email": 10, "experience": 1},
+        key_fields=["name", "email"],
+        projection={"name": 1, "email": 1, "phone": 1, "jobId": 1, "experience": 1, "status": 1, "appliedDate": 1},
+        # appliedDate is a client-supplied string, so dates come from the ObjectId
+        date_field="_id"
+    ),
+})
+
+# Office exports; resumes are deliberately not an exportable field
+export_specs = {
+    "inquiries": ExportSpec(
+        "inquiries",
+        [contacts_collection, contacts_archive_collection],
+        fields=[
+            "id", "name", "email", "subject", "message", "is_solved", "is_flagged",
+            "spam_score", "recaptcha_score", "client_ip", "created_at", "archived_at"
+        ],
+        default_fields=["id", "name", "email", "subject", "message", "is_solved", "is_flagged", "created_at"]
+    ),
+    "job-applications": ExportSpec(
+        "job applications",
+        [job_applications_collection, job_applications_archive_collection],
+        fields=[
+            "id", "name", "email", "phone", "jobId", "experience", "address",
+            "status", "appliedDate", "created_at", "archived_at"
+        ],
+        default_fields=["id", "name", "email", "phone", "jobId", "experience", "status", "appliedDate"],
+        date_field="_id"
+    ),
+}
+
+# Admin dashboard counts, cached briefly so repeated visits do not rescan
+dashboard_stats = DashboardStats(
+    contacts_collection,
+    contacts_archive_collection,
+    job_applications_collection,
+    job_applications_archive_collection,
+    events_collection,
+    ttl=float(os.getenv("ADMIN_STATS_TTL_SECONDS", "15"))
+)
+
+async def send_email_via_resend(params: dict) -> str:
+    """Deliver one message through the pooled Resend transport"""
+    try:
+        return await mail_transport.send(params)
+    except MailTransportError as e:
+        # Validation/auth errors will fail the same way on every retry
+        if e.status_code and 400 <= e.status_code < 500 and e.status_code != 429:
+            raise PermanentEmailError(str(e))
+        raise
+
+async def send_email_batch_via_resend(params_list: list, idempotency_key: Optional[str] = None) -> list:
+    """Deliver up to 100 messages with a single Resend batch call"""
+    try:
+        return await mail_transport.send_batch(params_list, idempotency_key)
+    except MailTransportError as e:
+        if e.status_code == 429:
+            raise RateLimitedError(str(e), retry_after=e.retry_after or 1.0)
+        # Validation/auth errors will fail the same way on every retry
+        if e.status_code and 400 <= e.status_code < 500:
+            raise PermanentBatchError(str(e))
+        raise
+
+# Email outbox - handlers enqueue, the dispatcher sends with retries (RESEND_API_URL can point at fake_resend.py)
+email_outbox = EmailOutbox(
+    email_outbox_collection,
+    send=send_email_via_resend,
+    concurrency=int(os.getenv("EMAIL_OUTBOX_CONCURRENCY", "4")),
+    max_attempts=int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "6")),
+    # Covers the transport's connect and read timeouts several times over; the lease must outlast it
+    send_timeout=float(os.getenv("EMAIL_OUTBOX_SEND_TIMEOUT_SECONDS", "60")),
+    lease_seconds=float(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "600")),
+    retention_days=int(os.getenv("EMAIL_OUTBOX_RETENTION_DAYS", "30"))
+)
+
+# ZIP imports use at most GALLERY_IMPORT_CONCURRENCY image workers, leaving the rest to /upload-image
+gallery_importer = GalleryImporter(
+    gallery_imports_collection,
+    image_pool,
+    compress=compress_with_placeholder,
+    validate=image_compressor.is_image,
+    is_image_name=image_compressor.is_image_by_filename,
+    max_images=int(os.getenv("GALLERY_IMPORT_MAX_IMAGES", "200")),
+    max_image_bytes=image_compressor.MAX_FILE_SIZE,
+    max_archive_bytes=int(os.getenv("GALLERY_IMPORT_MAX_MB", "1024")) * 1024 * 1024,
+    concurrency=int(os.getenv("GALLERY_IMPORT_CONCURRENCY", str(max(1, image_pool.max_workers // 2))))
+)
+
+# Bulk campaigns - paced below Resend's default limit of 2 requests/second
+campaign_runner = CampaignRunner(
+    email_campaigns_collection,
+    send_batch=send_email_batch_via_resend,
+    requests_per_second=float(os.getenv("EMAIL_BATCH_REQUESTS_PER_SECOND", "2")),
+    stale_after=float(os.getenv("CAMPAIGN_STALE_SECONDS", "120"))
+)
+
+def job_closed_recipients(meta: dict, after) -> AsyncIterator[dict]:
+    """Pending applicants of a closed listing, in _id order"""
+    query = {"jobId": meta["jobId"], "status": "pending"}
+    if after is not None:
+        query["_id"] = {"$gt": after}
+    return job_applications_collection.find(query, {"name": 1, "email": 1}).sort("_id", 1)
+
+SERVICES_ANNOUNCEMENT_MATCH = {"is_flagged": {"$ne": True}}
+
+def services_announcement_recipients(meta: dict, after) -> AsyncIterator[dict]:
+    """One recipient per past inquirer's address, named from their latest inquiry, in address order"""
+    pipeline = [
+        {"$match": SERVICES_ANNOUNCEMENT_MATCH},
+        {"$sort": {"created_at": -1}},
+        {"$group": {"_id": "$email", "name": {"$first": "$name"}}},
+        {"$project": {"email": "$_id", "name": 1}},
+    ]
+    if after is not None:
+        pipeline.append({"$match": {"_id": {"$gt": after}}})
+    pipeline.append({"$sort": {"_id": 1}})
+    return contacts_collection.aggregate(pipeline, allowDiskUse=True)
+
+campaign_runner.register_source("job_closed", job_closed_recipients)
+campaign_runner.register_source("services_announcement", services_announcement_recipients)
+
+# Optional write-behind mode for /submit - acknowledge once on local disk, flush in batches.
+# Each worker locks its own numbered log next to CONTACT_WRITE_BEHIND_LOG.
+CONTACT_WRITE_BEHIND = os.getenv("CONTACT_WRITE_BEHIND", "false").lower() == "true"
+contact_write_behind = ContactWriteBehind(
+    contacts_collection,
+    log_path=os.getenv("CONTACT_WRITE_BEHIND_LOG", "data/contact_submissions.log"),
+    batch_size=int(os.getenv("CONTACT_WRITE_BEHIND_BATCH_SIZE", "200")),
+    flush_interval=float(os.getenv("CONTACT_WRITE_BEHIND_FLUSH_SECONDS", "1.0")),
+    max_record_failures=int(os.getenv("CONTACT_WRITE_BEHIND_MAX_FAILURES", "5"))
+) if CONTACT_WRITE_BEHIND else None
+
+# Built in the background right after startup; STARTUP_PREWARM=none leaves everything lazy
+STARTUP_PREWARM = [
+    name.strip() for name in os.getenv("STARTUP_PREWARM", "mongo,imaging,http").split(",")
+    if name.strip() and name.strip() != "none"
+]
+startup_tasks: List[asyncio.Task] = []
+
+async def ensure_indexes():
+    try:
+        # Indexes backing /inquiries and the archive selectors
+        await contacts_collection.create_index([("is_solved", 1), ("created_at", -1)])
+        await contacts_collection.create_index([("is_flagged", 1), ("created_at", -1)])
+        await job_applications_collection.create_index("status")
+        await job_applications_collection.create_index([("jobId", 1), ("status", 1)])
+        await events_collection.create_index("starts_at")
+        await events_collection.create_index([("status", 1), ("starts_at", 1)])
+        await archive_manager.ensure_indexes()
+        await sync_feed.ensure_indexes()
+        await admin_search.ensure_indexes()
+        await email_outbox.ensure_indexes()
+        await campaign_runner.ensure_indexes()
+        await rate_limiter.ensure_indexes()
+        await verification_codes.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Failed to create indexes: {e}")
+
+async def run_startup_maintenance():
+    """Idempotent database work that does not need to finish before the first request"""
+    with startup_profiler.measure("indexes", "background"):
+        await ensure_indexes()
+
+    with startup_profiler.measure("event date backfill", "background"):
+        try:
+            backfilled = await backfill_event_dates()
+            if backfilled:
+                logger.info(f"Backfilled starts_at for {backfilled} events")
+        except Exception as e:
+            logger.error(f"Failed to backfill event dates: {e}")
+
+    with startup_profiler.measure("placeholder backfill", "background"):
+        try:
+            backfilled = await backfill_placeholders(
+                events_collection, GALLERY_IMAGE_FIELDS, image_pool.run_background, {"type": "gallery"}
+            )
+            if backfilled:
+                public_cache.invalidate("events")
+            works_backfilled = await backfill_placeholders(
+                latest_works_collection, LATEST_WORK_IMAGE_FIELDS, image_pool.run_background
+            )
+            if works_backfilled:
+                public_cache.invalidate("latest_works")
+            if backfilled or works_backfilled:
+                logger.info(f"Backfilled placeholders for {backfilled} gallery events and {works_backfilled} latest works")
+        except Exception as e:
+            logger.error(f"Failed to backfill placeholders: {e}")
+
+    with startup_profiler.measure("search keys backfill", "background"):
+        try:
+            backfilled = await admin_search.backfill_keys()
+            if backfilled:
+                logger.info(f"Backfilled search keys for {backfilled} documents")
+        except Exception as e:
+            logger.error(f"Failed to backfill search keys: {e}")
+
+    # Seeds the built-in rules on first run, then polls for edits from any worker
+    with startup_profiler.measure("spam rules", "background"):
+        await spam_scorer.start()
+
+async def prewarm_http_clients():
+    def build():
+        return mail_transport.client, recaptcha_verifier.client
+    with startup_profiler.measure("http clients", "prewarm"):
+        await asyncio.to_thread(build)
+
+async def prewarm_components():
+    prewarmers = {
+        "mongo": mongo.prewarm,
+        "imaging": imaging.prewarm,
+        "http": prewarm_http_clients,
+    }
+    results = await asyncio.gather(
+        *(prewarmers[name]() for name in STARTUP_PREWARM if name in prewarmers),
+        return_exceptions=True
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Pre-warm failed: {result}")
+
+async def run_startup_background():
+    await asyncio.gather(prewarm_components(), run_startup_maintenance())
+    startup_profiler.log_new_timings()
+
+async def start_background_tasks():
+    if contact_write_behind is not None:
+        # Replays submissions left on disk by the previous process
+        with startup_profiler.measure("contact write-behind", "startup"):
+            await contact_write_behind.start()
+
+    with startup_profiler.measure("background workers", "startup"):
+        health_monitor.start()
+        if loop_monitor is not None:
+            loop_monitor.start()
+        email_outbox.start()
+        # Also marks campaigns left running by a process that stopped as interrupted
+        campaign_runner.start_heartbeat()
+        rate_limiter.start()
+        if ARCHIVE_ENABLED:
+            archive_manager.start()
+
+    startup_tasks.append(asyncio.create_task(run_startup_background()))
+    startup_profiler.mark_ready()
+
+async def stop_background_tasks():
+    for task in startup_tasks:
+        task.cancel()
+    await asyncio.gather(*startup_tasks, return_exceptions=True)
+    await health_monitor.stop()
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    await archive_manager.stop()
+    await email_outbox.stop()
+    await campaign_runner.stop()
+    await gallery_importer.stop()
+    await rate_limiter.stop()
+    await mail_transport.aclose()
+    await recaptcha_verifier.aclose()
+    await spam_scorer.stop()
+    password_hasher.shutdown()
+    image_pool.shutdown()
+    if contact_write_behind is not None:
+        await contact_write_behind.stop()
 
 # REMOVED: Initialize FastMail
 # fm = FastMail(email_conf)
@@ -349,24 +866,144 @@ class RequestVerificationCode(BaseModel):
     email: str
     password: str
 
-verification_codes: Dict[str, Dict] = {}
+# Admin 2FA codes - "mongo" lets any worker verify a code issued by another
+VERIFICATION_CODE_TTL_SECONDS = 5 * 60
+verification_codes = (
+    verification_store.MemoryVerificationStore()
+    if os.getenv("VERIFICATION_STORE", "mongo") == "memory"
+    else verification_store.MongoVerificationStore(verification_codes_collection)
+)
+
+# Event dates - display strings are local time, starts_at is normalized UTC
+EVENT_TIMEZONE = ZoneInfo(os.getenv("EVENT_TIMEZONE", "Asia/Kolkata"))
+EVENT_DATE_FORMATS = ["%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%d %b %Y"]
+EVENT_TIME_FORMATS = ["%H:%M", "%H:%M:%S", "%I:%M %p", "%I:%M%p", "%I %p", "%I%p"]
+
+def parse_event_datetime(date: str, time: str = "") -> Optional[datetime.datetime]:
+    """Parse free-form event date/time strings into a naive UTC datetime"""
+    date = (date or "").strip()
+    time = (time or "").strip().upper()
+
+    parsed_date = None
+    for fmt in EVENT_DATE_FORMATS:
+        try:
+            parsed_date = datetime.datetime.strptime(date, fmt).date()
+            break
+        except ValueError:
+            continue
+    if parsed_date is None:
+        return None
+
+    parsed_time = datetime.time(0, 0)
+    # Ranges like "18:00 - 22:00" start at the first time
+    start_time = time.split("-")[0].split(" TO ")[0].strip()
+    for fmt in EVENT_TIME_FORMATS:
+        try:
+            parsed_time = datetime.datetime.strptime(start_time, fmt).time()
+            break
+        except ValueError:
+            continue
+
+    local = datetime.datetime.combine(parsed_date, parsed_time, tzinfo=EVENT_TIMEZONE)
+    return local.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+def parse_query_datetime(value: str) -> datetime.datetime:
+    """Parse an ISO date or datetime query parameter into naive UTC"""
+    parsed = datetime.datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=EVENT_TIMEZONE)
+    return parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+async def backfill_event_dates(batch_size: int = 500) -> int:
+    """Compute starts_at for events stored before it existed"""
+    updated = 0
+    cursor = events_collection.find(
+        {"starts_at": {"$exists": False}},
+        {"date": 1, "time": 1}
+    )
+    operations = []
+    async for event in cursor:
+        operations.append(UpdateOne(
+            {"_id": event["_id"]},
+            # Unparseable dates get None so they are not rescanned on every start
+            {"$set": with_updated_at({"starts_at": parse_event_datetime(event.get("date", ""), event.get("time", ""))})}
+        ))
+        if len(operations) >= batch_size:
+            await events_collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+    if operations:
+        await events_collection.bulk_write(operations, ordered=False)
+        updated += len(operations)
+    if updated:
+        public_cache.invalidate("events")
+    return updated
 
 # Event Management Endpoints
 @app.get("/events")
-async def get_events():
-    try:
-        events = await events_collection.find().to_list(length=None)
+async def get_events(
+    request: Request,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    status: Optional[str] = None,
+    upcoming: Optional[bool] = None,
+    sort: Optional[str] = None
+):
+    """List events, optionally filtered by date range/status and sorted by start time"""
+    async def load_events():
+        query: Dict[str, Any] = {}
+        starts_at: Dict[str, Any] = {}
+        try:
+            if start:
+                starts_at["$gte"] = parse_query_datetime(start)
+            if end and len(end) == 10:
+                # A bare end date includes the whole day
+                starts_at["$lt"] = parse_query_datetime(end) + datetime.timedelta(days=1)
+            elif end:
+                starts_at["$lte"] = parse_query_datetime(end)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date, use ISO format (YYYY-MM-DD)")
+        if upcoming is not None:
+            now = datetime.datetime.utcnow()
+            if upcoming:
+                starts_at["$gte"] = max(starts_at.get("$gte", now), now)
+            else:
+                starts_at["$lt"] = now
+        if starts_at:
+            query["starts_at"] = starts_at
+        if status:
+            query["status"] = status
+
+        cursor = events_collection.find(query)
+        if sort:
+            if sort not in ("asc", "desc"):
+                raise HTTPException(status_code=400, detail="sort must be 'asc' or 'desc'")
+            cursor = cursor.sort("starts_at", 1 if sort == "asc" else -1)
+
+        events = await cursor.to_list(length=None)
         # Convert ObjectId to string for each event
         for event in events:
             event["_id"] = str(event["_id"])
         return events
+
+    try:
+        return await public_cache.respond(
+            request, "events", load_events,
+            params={"start": start, "end": end, "upcoming": upcoming, "status": status, "sort": sort}
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/events")
 async def create_event(event: EventCreate):
     try:
-        result = await events_collection.insert_one(event.dict())
+        event_dict = event.dict()
+        event_dict["starts_at"] = parse_event_datetime(event.date, event.time)
+        with_updated_at(event_dict)
+        result = await events_collection.insert_one(event_dict)
+        public_cache.invalidate("events")
         if result.inserted_id:
             created_event = await events_collection.find_one(
                 {"_id": result.inserted_id}
@@ -380,10 +1017,14 @@ async def create_event(event: EventCreate):
 @app.put("/events/{event_id}")
 async def update_event(event_id: str, event: EventUpdate):
     try:
+        event_dict = event.dict()
+        event_dict["starts_at"] = parse_event_datetime(event.date, event.time)
+        with_updated_at(event_dict)
         result = await events_collection.update_one(
             {"_id": ObjectId(event_id)},
-            {"$set": event.dict()}
+            {"$set": event_dict}
         )
+        public_cache.invalidate("events")
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Event not found")
         updated_event = await events_collection.find_one(
@@ -402,8 +1043,10 @@ async def delete_event(event_id: str):
         result = await events_collection.delete_one(
             {"_id": ObjectId(event_id)}
         )
+        public_cache.invalidate("events")
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Event not found")
+        await sync_feed.record_deleted("events", [event_id])
         return {"message": "Event deleted successfully"}
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid event ID")
@@ -412,7 +1055,7 @@ async def delete_event(event_id: str):
 
 # NEW: Updated function to send acceptance email using Resend
 async def send_acceptance_email(applicant_name: str, applicant_email: str):
-    """Send job acceptance email using Resend API"""
+    """Queue job acceptance email for delivery through the outbox"""
     try:
         # Create the email content
         subject = "Welcome to E&S Decorations!"
@@ -496,7 +1139,7 @@ async def send_acceptance_email(applicant_name: str, applicant_email: str):
         """
 
         # Send email using Resend
-        params: resend.Emails.SendParams = {
+        params = {
             "from": EMAIL_FROM,
             "to": [applicant_email],
             "subject": subject,
@@ -505,26 +1148,17 @@ async def send_acceptance_email(applicant_name: str, applicant_email: str):
             "reply_to": "esdecorationsind@gmail.com"
         }
 
-        email_response = resend.Emails.send(params)
-        
-        # Handle different response formats
-        email_id = None
-        if hasattr(email_response, 'id'):
-            email_id = email_response.id
-        elif isinstance(email_response, dict) and 'id' in email_response:
-            email_id = email_response['id']
-        else:
-            email_id = "unknown"
+        outbox_id = await email_outbox.enqueue(params, kind="acceptance")
             
-        print(f"✅ Acceptance email sent successfully to {applicant_email}. Email ID: {email_id}")
-        return email_response
+        logger.info(f"Acceptance email queued for {applicant_email}. Outbox ID: {outbox_id}")
+        return outbox_id
 
     except Exception as e:
-        print(f"❌ Error sending acceptance email: {str(e)}")
-        raise Exception(f"Failed to send acceptance email: {str(e)}")
+        logger.error(f"Error queueing acceptance email: {str(e)}")
+        raise Exception(f"Failed to queue acceptance email: {str(e)}")
 
 async def send_rejection_email(applicant_name: str, applicant_email: str):
-    """Send job rejection email using Resend API"""
+    """Queue job rejection email for delivery through the outbox"""
     try:
         # Create the email content
         subject = "Thank you for your interest in E&S Decorations"
@@ -613,7 +1247,7 @@ async def send_rejection_email(applicant_name: str, applicant_email: str):
         """
 
         # Send email using Resend
-        params: resend.Emails.SendParams = {
+        params = {
             "from": EMAIL_FROM,
             "to": [applicant_email],
             "subject": subject,
@@ -622,23 +1256,14 @@ async def send_rejection_email(applicant_name: str, applicant_email: str):
             "reply_to": "esdecorationsind@gmail.com"
         }
 
-        email_response = resend.Emails.send(params)
-        
-        # Handle different response formats
-        email_id = None
-        if hasattr(email_response, 'id'):
-            email_id = email_response.id
-        elif isinstance(email_response, dict) and 'id' in email_response:
-            email_id = email_response['id']
-        else:
-            email_id = "unknown"
+        outbox_id = await email_outbox.enqueue(params, kind="rejection")
             
-        print(f"✅ Rejection email sent successfully to {applicant_email}. Email ID: {email_id}")
-        return email_response
+        logger.info(f"Rejection email queued for {applicant_email}. Outbox ID: {outbox_id}")
+        return outbox_id
 
     except Exception as e:
-        print(f"❌ Error sending rejection email: {str(e)}")
-        raise Exception(f"Failed to send rejection email: {str(e)}")
+        logger.error(f"Error queueing rejection email: {str(e)}")
+        raise Exception(f"Failed to queue rejection email: {str(e)}")
 
 # Models
 class EmailSchema(BaseModel):
@@ -696,14 +1321,58 @@ class ReplySchema(BaseModel):
     plain_text_body: str
     html_body: str
 
-# Password Hashing
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode("utf-8"), salt)
-    return hashed_password.decode("utf-8")
+class SpamRule(BaseModel):
+    kind: str  # keyword, regex, uppercase_ratio or link_count
+    pattern: str = ""
+    weight: float = 1.0
+    threshold: Optional[float] = None
+    field: str = "message"  # regex rules: "message" or "all"
+    ignore_case: bool = False  # regex rules only
+    enabled: bool = True
+
+class CampaignMessage(BaseModel):
+    subject: str
+    plain_text_body: str
+    html_body: str
+
+# Password Hashing - bcrypt runs on its own bounded pool, off the event loop
+password_hasher = PasswordHasher(
+    rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+    max_workers=int(os.getenv("BCRYPT_MAX_WORKERS", str(default_workers()))),
+    max_pending=int(os.getenv("BCRYPT_MAX_PENDING", "32"))
+)
+
+PASSWORD_BUSY = HTTPException(
+    status_code=503,
+    detail="Too many login attempts in progress, please try again shortly",
+    headers={"Retry-After": "5"}
+)
+
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise PASSWORD_BUSY
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return bcrypt.checkpw(plain_password.encode("utf-8"), hashed_password.encode("utf-8"))
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    try:
+        return await password_hasher.verify(plain_password, hashed_password)
+    except PasswordHasherBusy:
+        raise PASSWORD_BUSY
+
+async def rehash_if_needed(admin: dict, plain_password: str):
+    """Upgrade a stored hash to the configured work factor after a successful login"""
+    if not password_hasher.needs_rehash(admin["password"]):
+        return
+    try:
+        new_hash = await hash_password(plain_password)
+        await admins_collection.update_one(
+            {"_id": admin["_id"], "password": admin["password"]},
+            {"$set": {"password": new_hash}}
+        )
+        logger.info(f"Rehashed password for {admin['email']} at {password_hasher.rounds} rounds")
+    except Exception as e:
+        logger.error(f"Password rehash failed for {admin['email']}: {e}")
 
 # Generate JWT Token
 def create_access_token(data: dict, expires_delta: datetime.timedelta | None = None):
@@ -725,53 +1394,6 @@ async def get_current_admin(token: str = Depends(oauth2_scheme)):
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-async def verify_recaptcha(token: str, client_ip: str) -> dict:
-    """Verify reCAPTCHA token with Google's API"""
-    if not RECAPTCHA_SECRET_KEY or not token:
-        return {"success": False, "score": 0.0, "error": "Missing reCAPTCHA configuration"}
-    
-    try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                RECAPTCHA_VERIFY_URL,
-                data={
-                    "secret": RECAPTCHA_SECRET_KEY,
-                    "response": token,
-                    "remoteip": client_ip
-                },
-                timeout=10.0
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                return {
-                    "success": result.get("success", False),
-                    "score": result.get("score", 0.0),
-                    "action": result.get("action", ""),
-                    "error": result.get("error-codes", [])
-                }
-            else:
-                return {"success": False, "score": 0.0, "error": "reCAPTCHA verification failed"}
-                
-    except Exception as e:
-        logging.error(f"reCAPTCHA verification error: {e}")
-        return {"success": False, "score": 0.0, "error": str(e)}
-
-def is_rate_limited(client_ip: str) -> bool:
-    """Check if IP address has exceeded rate limit"""
-    now = datetime.datetime.utcnow()
-    
-    ip_requests[client_ip] = [
-        req_time for req_time in ip_requests[client_ip] 
-        if now - req_time < datetime.timedelta(seconds=TIME_WINDOW)
-    ]
-    
-    if len(ip_requests[client_ip]) >= IP_LIMIT:
-        return True
-    
-    ip_requests[client_ip].append(now)
-    return False
-
 def validate_contact_form(contact) -> list:
     """Validate contact form data and return list of errors"""
     errors = []
@@ -795,28 +1417,12 @@ def validate_contact_form(contact) -> list:
     
     return errors
 
-def detect_spam_content(name: str, email: str, message: str, subject: str) -> bool:
-    """Basic spam detection based on content analysis"""
-    spam_keywords = [
-        'viagra', 'casino', 'lottery', 'winner', 'congratulations',
-        'million dollars', 'click here', 'buy now', 'limited time',
-        'crypto', 'bitcoin', 'investment opportunity', 'make money fast'
-    ]
-    
-    content = f"{name} {email} {subject} {message}".lower()
-    spam_score = sum(1 for keyword in spam_keywords if keyword in content)
-    
-    if len([c for c in message if c.isupper()]) > len(message) * 0.7:
-        spam_score += 1
-    
-    if message.count('http://') + message.count('https://') > 2:
-        spam_score += 2
-    
-    import re
-    if re.search(r'(.)\1{4,}', message):
-        spam_score += 1
-    
-    return spam_score >= 2
+# Weighted rules from the spam_rules collection; see spam_rules.py
+spam_scorer = SpamScorer(
+    spam_rules_collection,
+    threshold=float(os.getenv("SPAM_THRESHOLD", "2")),
+    reload_interval=float(os.getenv("SPAM_RULES_RELOAD_SECONDS", "30"))
+)
 
 # Submit Contact Form
 @app.post("/submit")
@@ -824,13 +1430,7 @@ async def submit_form(contact: Contact, request: Request):
     try:
         client_ip = request.client.host
         
-        # Rate limiting check
-        if is_rate_limited(client_ip):
-            logging.warning(f"Rate limit exceeded for IP: {client_ip}")
-            raise HTTPException(
-                status_code=429, 
-                detail="Too many requests. Please try again in an hour."
-            )
+        # Rate limiting is applied by RateLimitMiddleware (see rate_limit_policies)
         
         # Form validation
         validation_errors = validate_contact_form(contact)
@@ -841,36 +1441,36 @@ async def submit_form(contact: Contact, request: Request):
             )
         
         # Spam content detection
-        if detect_spam_content(contact.name, contact.email, contact.message, contact.subject):
-            logging.warning(f"Spam content detected from IP: {client_ip}")
-            is_flagged = True
-        else:
-            is_flagged = False
+        spam_score = spam_scorer.score(contact.name, contact.email, contact.subject, contact.message)
+        is_flagged = spam_scorer.is_spam(spam_score)
+        if is_flagged:
+            logger.warning(f"Spam content detected from IP: {client_ip} (score {spam_score})")
         
         # reCAPTCHA verification
         recaptcha_result = {"success": True, "score": 1.0}
         if contact.recaptcha_token:
-            recaptcha_result = await verify_recaptcha(contact.recaptcha_token, client_ip)
+            recaptcha_result = await recaptcha_verifier.verify(contact.recaptcha_token, client_ip)
             
             if not recaptcha_result["success"]:
-                logging.warning(f"reCAPTCHA verification failed for IP {client_ip}: {recaptcha_result['error']}")
+                logger.warning(f"reCAPTCHA verification failed for IP {client_ip}: {recaptcha_result['error']}")
                 raise HTTPException(
                     status_code=400, 
                     detail="Security verification failed. Please try again."
                 )
             
             if recaptcha_result["score"] < RECAPTCHA_MINIMUM_SCORE:
-                logging.warning(f"Low reCAPTCHA score for IP {client_ip}: {recaptcha_result['score']}")
+                logger.warning(f"Low reCAPTCHA score for IP {client_ip}: {recaptcha_result['score']}")
                 raise HTTPException(
                     status_code=400, 
                     detail="Security verification failed. Please try again."
                 )
             
-            logging.info(f"reCAPTCHA verified for IP {client_ip} with score {recaptcha_result['score']}")
+            logger.info(f"reCAPTCHA verified for IP {client_ip} with score {recaptcha_result['score']}")
         else:
-            logging.warning(f"No reCAPTCHA token provided by IP {client_ip}")
+            logger.warning(f"No reCAPTCHA token provided by IP {client_ip}")
         
         # Prepare contact data for database
+        now = datetime.datetime.utcnow()
         contact_data = {
             "name": contact.name.strip(),
             "email": contact.email,
@@ -878,28 +1478,108 @@ async def submit_form(contact: Contact, request: Request):
             "message": contact.message.strip(),
             "is_solved": False,
             "is_flagged": is_flagged,
+            "spam_score": spam_score,
             "client_ip": client_ip,
-            "created_at": datetime.datetime.utcnow(),
+            "created_at": now,
+            "updated_at": now,
             "recaptcha_score": recaptcha_result.get("score", 0.0)
         }
+        admin_search.add_search_keys("contacts", contact_data)
         
-        result = await contacts_collection.insert_one(contact_data)
-        
-        if not result.acknowledged:
-            raise HTTPException(status_code=500, detail="Failed to save contact form")
+        if contact_write_behind is not None:
+            # Durable on local disk; flushed to MongoDB in the background
+            await contact_write_behind.append(contact_data)
+        else:
+            result = await contacts_collection.insert_one(contact_data)
+            
+            if not result.acknowledged:
+                raise HTTPException(status_code=500, detail="Failed to save contact form")
+
+        notification_broker.publish("inquiry", {
+            "id": str(contact_data["_id"]),
+            "name": contact_data["name"],
+            "subject": contact_data["subject"],
+            "is_flagged": is_flagged,
+            "created_at": now.isoformat()
+        })
         
-        logging.info(f"Contact form submitted successfully by {contact.name} ({contact.email}) from IP {client_ip}")
+        logger.info(f"Contact form submitted successfully by {contact.name} ({contact.email}) from IP {client_ip}")
         
         return {"message": "Form submitted successfully!"}
         
     except HTTPException:
         raise
     except Exception as e:
-        logging.error(f"Unexpected error processing contact form: {e}")
+        logger.error(f"Unexpected error processing contact form: {e}")
         raise HTTPException(status_code=500, detail="An error occurred while processing your request. Please try again later.")
 
-# ADD this health endpoint if you don't have it
+# Readiness probes - run in the background, results served from memory
+MONGO_PING_DEGRADED_MS = float(os.getenv("HEALTH_MONGO_PING_DEGRADED_MS", "250"))
+EMAIL_BACKLOG_DEGRADED = int(os.getenv("HEALTH_EMAIL_BACKLOG_DEGRADED", "500"))
+
+async def probe_mongo():
+    started = time.perf_counter()
+    await mongo.db.command("ping")
+    latency_ms = round((time.perf_counter() - started) * 1000, 2)
+    return (DEGRADED if latency_ms > MONGO_PING_DEGRADED_MS else OK), {"latency_ms": latency_ms}
+
+async def probe_mongo_pool():
+    snapshot = mongo_pool_monitor.snapshot()
+    pools = snapshot["pools"].values()
+    # Every connection busy with callers queued behind them
+    if any(p["checked_out"] >= p["max_size"] and p["waiting"] > 0 for p in pools):
+        return FAIL, snapshot
+    if any(p["utilization"] >= 0.8 for p in pools):
+        return DEGRADED, snapshot
+    return OK, snapshot
+
+async def probe_image_pool():
+    snapshot = image_pool.snapshot()
+    return (DEGRADED if snapshot["in_flight"] >= image_pool.max_pending else OK), snapshot
+
+async def probe_email_outbox():
+    backlog = await email_outbox_collection.count_documents({"status": {"$in": ["pending", "sending"]}})
+    oldest = await email_outbox_collection.find_one(
+        {"status": "pending"}, {"next_attempt_at": 1}, sort=[("next_attempt_at", 1)]
+    )
+    overdue = 0.0
+    if oldest:
+        overdue = max(0.0, (datetime.datetime.utcnow() - oldest["next_attempt_at"]).total_seconds())
+    status = DEGRADED if backlog > EMAIL_BACKLOG_DEGRADED else OK
+    return status, {"backlog": backlog, "oldest_overdue_seconds": round(overdue, 1)}
+
+health_monitor = HealthMonitor(
+    interval=float(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", "5")),
+    timeout=float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", "2"))
+)
+health_monitor.add_probe("mongo", probe_mongo)
+health_monitor.add_probe("mongo_pool", probe_mongo_pool)
+# Slow uploads or a mail backlog do not make this instance unable to serve
+health_monitor.add_probe("image_pool", probe_image_pool, critical=False)
+health_monitor.add_probe("email_outbox", probe_email_outbox, critical=False)
+
+metrics_registry.callback("health_ready", "1 when the readiness probes pass", lambda: 1 if health_monitor.ready else 0)
+metrics_registry.callback("image_pool_queue_depth", "Image jobs waiting for a worker", lambda: image_pool.queue_depth)
+metrics_registry.callback("image_pool_rejected_total", "Image jobs refused with 503 because the pool was full", lambda: image_pool.rejected, metric_type="counter")
+metrics_registry.callback("password_hasher_rejected_total", "Password hashes refused with 503 because the pool was full", lambda: password_hasher.rejected, metric_type="counter")
+metrics_registry.callback(
+    "mongo_pool_checked_out", "Connections checked out per server",
+    lambda: {(address,): pool["checked_out"] for address, pool in mongo_pool_monitor.snapshot()["pools"].items()},
+    labelnames=("address",)
+)
+if loop_monitor is not None:
+    metrics_registry.callback(
+        "event_loop_lag_seconds", "Latest event loop lag measured by the heartbeat",
+        lambda: loop_monitor.lag_samples[-1] if loop_monitor.lag_samples else 0.0
+    )
+    metrics_registry.callback(
+        "event_loop_stalls_total", "Callbacks that blocked the event loop past the threshold",
+        lambda: loop_monitor.stalls, metric_type="counter"
+    )
+
+# Liveness - the process is up and the event loop answers; /health kept for existing monitors
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
     """Health check endpoint for monitoring"""
     timestamp = datetime.datetime.utcnow().isoformat()
@@ -909,6 +1589,82 @@ async def health_check():
         "uptime": os.times().elapsed if hasattr(os, 'times') else 0
     }
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Cached dependency checks; 503 tells the load balancer to stop routing here"""
+    return JSONResponse(status_code=200 if health_monitor.ready else 503, content=health_monitor.snapshot())
+
+@app.get("/startup-report")
+async def get_startup_report(admin: dict = Depends(get_current_admin)):
+    """Import, init and pre-warm time per component for the current process"""
+    return {
+        **startup_profiler.report(),
+        "initialized": {"mongo": mongo.initialized, "imaging": imaging.initialized},
+        "prewarm": STARTUP_PREWARM,
+    }
+
+@app.get("/admin/stats")
+async def get_admin_stats(admin: dict = Depends(get_current_admin)):
+    """Dashboard counts and recent activity in one small response"""
+    try:
+        return await dashboard_stats.get()
+    except Exception as e:
+        logger.error(f"Error computing dashboard stats: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to compute dashboard stats")
+
+@app.get("/sync")
+async def sync_changes(
+    since: Optional[str] = None,
+    collections: Optional[str] = None,
+    admin: dict = Depends(get_current_admin)
+):
+    """Documents changed and ids deleted since the token returned by the previous call
+
+    Without ``since`` only a starting token is returned; load the lists, then poll
+    with it. ``reset: true`` means reload the lists instead of applying a delta.
+    """
+    try:
+        names = [name.strip() for name in collections.split(",") if name.strip()] if collections else None
+        result = await sync_feed.changes(since, names)
+        return jsonable_encoder(result, custom_encoder={ObjectId: str})
+    except InvalidSyncRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error building sync delta: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to build sync delta")
+
+@app.get(NOTIFICATIONS_STREAM_PATH)
+async def stream_notifications(request: Request, token: Optional[str] = None):
+    """Server-Sent Events for new inquiries and job applications
+
+    EventSource cannot set headers, so the admin token may be passed as ?token=.
+    """
+    authorization = request.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    await get_current_admin(token)
+    return StreamingResponse(
+        notification_broker.stream(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/loop-lag")
+async def get_loop_lag(admin: dict = Depends(get_current_admin)):
+    """Event loop lag and the routes whose handlers blocked it, worst first"""
+    if loop_monitor is None:
+        return {"enabled": False}
+    return {"enabled": True, **loop_monitor.snapshot()}
+
+@app.get("/metrics")
+async def get_metrics(request: Request):
+    """Prometheus text exposition of request, image and email metrics"""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 # Fetch Unsolved Inquiries
 @app.get("/inquiries")
 async def get_inquiries():
@@ -933,7 +1689,7 @@ async def get_inquiries():
             
         return formatted_inquiries
     except Exception as e:
-        print(f"Error fetching inquiries: {str(e)}")
+        logger.error(f"Error fetching inquiries: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Mark Inquiry as Solved
@@ -942,7 +1698,7 @@ async def solve_inquiry(inquiry_id: str):
     try:
         result = await contacts_collection.update_one(
             {"_id": ObjectId(inquiry_id)},
-            {"$set": {"is_solved": True}}
+            {"$set": with_updated_at({"is_solved": True})}
         )
 
         if result.matched_count == 0:
@@ -952,10 +1708,10 @@ async def solve_inquiry(inquiry_id: str):
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid inquiry ID")
     except Exception as e:
-        print(f"Error marking inquiry as solved: {str(e)}")
+        logger.error(f"Error marking inquiry as solved: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-# NEW: Updated function to send reply using Resend
+# Reply to an inquiry - delivered by the email outbox
 @app.post("/inquiries/{inquiry_id}/reply")
 async def reply_to_inquiry(inquiry_id: str, reply: ReplySchema):
     try:
@@ -1059,7 +1815,7 @@ E&S Decorations Team
         """
 
         # Send email using Resend
-        params: resend.Emails.SendParams = {
+        params = {
             "from": EMAIL_FROM,
             "to": [recipient_email],
             "subject": subject,
@@ -1068,31 +1824,469 @@ E&S Decorations Team
             "reply_to": "esdecorationsind@gmail.com"
         }
 
-        email_response = resend.Emails.send(params)
-        
-        # Handle different response formats
-        email_id = None
-        if hasattr(email_response, 'id'):
-            email_id = email_response.id
-        elif isinstance(email_response, dict) and 'id' in email_response:
-            email_id = email_response['id']
-        else:
-            email_id = "unknown"
+        outbox_id = await email_outbox.enqueue(params, kind="inquiry_reply")
             
-        print(f"✅ Reply email sent successfully to {recipient_email}. Email ID: {email_id}")
+        logger.info(f"Reply email queued for {recipient_email}. Outbox ID: {outbox_id}")
 
         # Update inquiry status
         await contacts_collection.update_one(
             {"_id": ObjectId(inquiry_id)},
-            {"$set": {"is_solved": True}}
+            {"$set": with_updated_at({"is_solved": True})}
         )
 
-        return {"message": "Reply sent successfully", "email_id": email_id}
+        return {"message": "Reply queued successfully", "email_id": outbox_id}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"Error sending reply: {str(e)}")
+        logger.error(f"Error sending reply: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to send reply")
 
+# Archived Inquiries and Applications
+@app.post("/archive/run")
+async def run_archive(admin: dict = Depends(get_current_admin)):
+    """Archive old solved/flagged inquiries and decided applications now"""
+    try:
+        return await archive_manager.run_once()
+    except Exception as e:
+        logger.error(f"Error running archive: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/archive/inquiries")
+async def search_archived_inquiries(
+    q: str = "",
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    admin: dict = Depends(get_current_admin)
+):
+    """Search archived inquiries by text, newest archived first"""
+    try:
+        result = await archive_manager.search("contacts", q, skip, limit)
+        return {
+            "total": result["total"],
+            "items": [
+                {
+                    "id": str(inq["_id"]),
+                    "name": inq["name"],
+                    "email": inq["email"],
+                    "subject": inq["subject"],
+                    "message": inq["message"],
+                    "is_solved": inq.get("is_solved", False),
+                    "is_flagged": inq.get("is_flagged", False),
+                    "created_at": inq["created_at"].isoformat() if inq.get("created_at") else None,
+                    "archived_at": inq["archived_at"].isoformat()
+                }
+                for inq in result["items"]
+            ]
+        }
+    except Exception as e:
+        logger.error(f"Error searching archived inquiries: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/archive/job-applications")
+async def search_archived_applications(
+    q: str = "",
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    admin: dict = Depends(get_current_admin)
+):
+    """Search archived job applications by text, without resumes"""
+    try:
+        result = await archive_manager.search(
+            "job_applications", q, skip, limit, projection={"resume": 0}
+        )
+        for application in result["items"]:
+            application["_id"] = str(application["_id"])
+            application["archived_at"] = application["archived_at"].isoformat()
+            application.pop("score", None)
+        return result
+    except Exception as e:
+        logger.error(f"Error searching archived applications: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+def parse_date_range(start: Optional[str], end: Optional[str]) -> Tuple[Optional[datetime.datetime], Optional[datetime.datetime]]:
+    """Search date filters; a bare end date includes the whole day"""
+    try:
+        start_at = parse_query_datetime(start) if start else None
+        end_at = None
+        if end:
+            end_at = parse_query_datetime(end)
+            if len(end) == 10:
+                end_at += datetime.timedelta(days=1)
+        return start_at, end_at
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date, use ISO format (YYYY-MM-DD)")
+
+@app.get("/search/inquiries")
+async def search_inquiries(
+    q: str = "",
+    is_solved: Optional[bool] = None,
+    is_flagged: Optional[bool] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 20,
+    admin: dict = Depends(get_current_admin)
+):
+    """Search current inquiries by relevance or name/email prefix, with filters"""
+    start_at, end_at = parse_date_range(start, end)
+    try:
+        result = await admin_search.search(
+            "contacts", q, {"is_solved": is_solved, "is_flagged": is_flagged}, start_at, end_at, max(0, skip), limit
+        )
+        return {
+            "match": result["match"],
+            "total": result["total"],
+            "items": [
+                {
+                    "id": str(inq["_id"]),
+                    "name": inq.get("name"),
+                    "email": inq.get("email"),
+                    "subject": inq.get("subject"),
+                    "preview": (inq.get("message") or "")[:200],
+                    "is_solved": inq.get("is_solved", False),
+                    "is_flagged": inq.get("is_flagged", False),
+                    "created_at": inq["created_at"].isoformat() if inq.get("created_at") else None,
+                    "score": round(inq["score"], 3) if "score" in inq else None
+                }
+                for inq in result["items"]
+            ]
+        }
+    except Exception as e:
+        logger.error(f"Error searching inquiries: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/search/job-applications")
+async def search_job_applications(
+    q: str = "",
+    status: Optional[str] = None,
+    jobId: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 20,
+    admin: dict = Depends(get_current_admin)
+):
+    """Search current job applications by relevance or name/email prefix, without resumes"""
+    start_at, end_at = parse_date_range(start, end)
+    try:
+        result = await admin_search.search(
+            "job_applications", q, {"status": status, "jobId": jobId}, start_at, end_at, max(0, skip), limit
+        )
+        for application in result["items"]:
+            application["_id"] = str(application["_id"])
+            if "score" in application:
+                application["score"] = round(application["score"], 3)
+        return result
+    except Exception as e:
+        logger.error(f"Error searching job applications: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/export/{kind}")
+async def export_records(
+    kind: str,
+    format: str = "csv",
+    fields: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    include_archived: bool = True,
+    admin: dict = Depends(get_current_admin)
+):
+    """Stream inquiries or job applications as CSV or NDJSON, oldest first"""
+    spec = export_specs.get(kind)
+    if spec is None:
+        raise HTTPException(status_code=404, detail=f"Unknown export, choose from {', '.join(export_specs)}")
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'csv' or 'ndjson'")
+    try:
+        selected = spec.select_fields(fields)
+    except InvalidExportRequest as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    start_at, end_at = parse_date_range(start, end)
+
+    filename = f"{kind}-{datetime.datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+    return StreamingResponse(
+        stream_export(spec, selected, format, start_at, end_at, include_archived),
+        media_type="text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+# Spam Rules
+def spam_rule_filter(rule_id: str) -> dict:
+    # Built-in rules have readable string ids, admin-created ones ObjectIds
+    return {"_id": ObjectId(rule_id) if ObjectId.is_valid(rule_id) else rule_id}
+
+def format_spam_rule(rule: dict) -> dict:
+    rule["_id"] = str(rule["_id"])
+    if rule.get("updated_at"):
+        rule["updated_at"] = rule["updated_at"].isoformat()
+    return rule
+
+async def apply_spam_rule_change():
+    """Recompile the rules here and bring is_flagged in line with them"""
+    await spam_scorer.load()
+    spam_scorer.schedule_rescore(contacts_collection)
+
+@app.get("/spam-rules")
+async def get_spam_rules(admin: dict = Depends(get_current_admin)):
+    try:
+        rules = await spam_rules_collection.find().sort([("kind", 1), ("pattern", 1)]).to_list(length=None)
+        last_rescore = spam_scorer.last_rescore
+        return {
+            "threshold": spam_scorer.threshold,
+            "rules": [format_spam_rule(rule) for rule in rules],
+            "rescoring": spam_scorer.rescoring,
+            "last_rescore": {
+                k: v.isoformat() if isinstance(v, datetime.datetime) else v
+                for k, v in last_rescore.items()
+            } if last_rescore else None
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/spam-rules")
+async def create_spam_rule(rule: SpamRule, admin: dict = Depends(get_current_admin)):
+    rule_data = rule.dict(exclude_none=True)
+    error = validate_rule(rule_data)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    try:
+        rule_data["updated_at"] = datetime.datetime.utcnow()
+        result = await spam_rules_collection.insert_one(rule_data)
+        await apply_spam_rule_change()
+        return {"message": "Spam rule created", "id": str(result.inserted_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.put("/spam-rules/{rule_id}")
+async def update_spam_rule(rule_id: str, rule: SpamRule, admin: dict = Depends(get_current_admin)):
+    rule_data = rule.dict(exclude_none=True)
+    error = validate_rule(rule_data)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    try:
+        rule_data["updated_at"] = datetime.datetime.utcnow()
+        result = await spam_rules_collection.update_one(spam_rule_filter(rule_id), {"$set": rule_data})
+        if result.matched_count == 0:
+            raise HTTPException(status_code=404, detail="Spam rule not found")
+        await apply_spam_rule_change()
+        return {"message": "Spam rule updated"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/spam-rules/{rule_id}")
+async def delete_spam_rule(rule_id: str, admin: dict = Depends(get_current_admin)):
+    try:
+        result = await spam_rules_collection.delete_one(spam_rule_filter(rule_id))
+        if result.deleted_count == 0:
+            raise HTTPException(status_code=404, detail="Spam rule not found")
+        await apply_spam_rule_change()
+        return {"message": "Spam rule deleted"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/spam-rules/rescore")
+async def rescore_contacts(admin: dict = Depends(get_current_admin)):
+    """Re-apply the current rules to every stored inquiry"""
+    spam_scorer.schedule_rescore(contacts_collection)
+    return {"message": "Rescoring started"}
+
+# Email Outbox
+@app.get("/email-outbox")
+async def get_email_outbox(admin: dict = Depends(get_current_admin)):
+    """Outbox backlog per status plus the most recent dead letters"""
+    try:
+        dead_letters = await email_outbox_collection.find(
+            {"status": "dead"},
+            {"kind": 1, "params.to": 1, "params.subject": 1, "attempts": 1, "last_error": 1, "failed_at": 1}
+        ).sort("failed_at", -1).limit(50).to_list(length=50)
+        for message in dead_letters:
+            message["_id"] = str(message["_id"])
+        return {"counts": await email_outbox.stats(), "dead_letters": dead_letters}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/email-transport")
+async def get_email_transport_stats(admin: dict = Depends(get_current_admin)):
+    """Send latency, error counts and circuit breaker state"""
+    return mail_transport.snapshot()
+
+@app.post("/email-outbox/{message_id}/retry")
+async def retry_outbox_email(message_id: str, admin: dict = Depends(get_current_admin)):
+    """Requeue a dead-lettered email"""
+    try:
+        if not await email_outbox.retry(message_id):
+            raise HTTPException(status_code=404, detail="Dead-lettered email not found")
+        return {"message": "Email requeued"}
+    except errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid email ID")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+# Bulk Email Campaigns
+CAMPAIGN_HTML_LAYOUT = """
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>E&S Decorations</title>
+</head>
+<body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 600px; margin: 0 auto; padding: 20px;">
+    <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); padding: 30px; text-align: center; border-radius: 10px 10px 0 0;">
+        <h1 style="color: white; margin: 0; font-size: 24px;">E&S Decorations</h1>
+    </div>
+    <div style="background: #f9f9f9; padding: 30px; border-radius: 0 0 10px 10px; box-shadow: 0 2px 10px rgba(0,0,0,0.1);">
+        <p style="font-size: 16px; margin-bottom: 20px;">Dear <strong>$name</strong>,</p>
+        <div style="color: #333; line-height: 1.6;">
+            {body}
+        </div>
+        <p style="margin-bottom: 5px;"><strong>Best regards,</strong></p>
+        <p style="margin-top: 0; color: #667eea; font-weight: bold;">E&S Decorations Team</p>
+    </div>
+    <div style="text-align: center; margin-top: 20px; color: #666; font-size: 12px;">
+        <p>© 2025 E&S Decorations. All rights reserved.</p>
+    </div>
+</body>
+</html>
+"""
+
+CAMPAIGN_TEXT_LAYOUT = """Dear $name,
+
+{body}
+
+Best regards,
+E&S Decorations Team
+
+© 2025 E&S Decorations. All rights reserved.
+"""
+
+def build_campaign_template(subject: str, html_body: str, plain_text_body: str) -> CampaignTemplate:
+    """Wrap admin-written content in the email layout; $name is filled per recipient"""
+    # Admin content is literal text - only the layout's $name is a placeholder
+    return CampaignTemplate(
+        sender=EMAIL_FROM,
+        reply_to="esdecorationsind@gmail.com",
+        subject=subject.replace("$", "$$"),
+        html_body=CAMPAIGN_HTML_LAYOUT.replace("{body}", html_body.replace("$", "$$")),
+        text_body=CAMPAIGN_TEXT_LAYOUT.replace("{body}", plain_text_body.replace("$", "$$"))
+    )
+
+def format_campaign(campaign: dict) -> dict:
+    campaign["_id"] = str(campaign["_id"])
+    campaign.pop("template", None)
+    if campaign.get("cursor") is not None:
+        campaign["cursor"] = str(campaign["cursor"])
+    for field in ("created_at", "finished_at", "heartbeat_at"):
+        if campaign.get(field):
+            campaign[field] = campaign[field].isoformat()
+    return campaign
+
+@app.post("/job-listings/{listing_id}/close")
+async def close_job_listing(listing_id: str, admin: dict = Depends(get_current_admin)):
+    """Deactivate a job listing and notify every pending applicant in one campaign"""
+    try:
+        # Only the request that actually closes the listing notifies its applicants
+        listing = await job_listings_collection.find_one_and_update(
+            {"_id": ObjectId(listing_id), "isActive": True},
+            {"$set": with_updated_at({"isActive": False})}
+        )
+        if not listing:
+            if await job_listings_collection.count_documents({"_id": ObjectId(listing_id)}, limit=1):
+                raise HTTPException(status_code=409, detail="Job listing is already closed")
+            raise HTTPException(status_code=404, detail="Job listing not found")
+        public_cache.invalidate("job_listings")
+
+        meta = {"jobId": listing["id"], "listing_id": listing_id}
+        total = await job_applications_collection.count_documents({"jobId": listing["id"], "status": "pending"})
+        template = build_campaign_template(
+            subject=f"Update on your application for {listing['title']}",
+            html_body=(
+                f"<p>Thank you for applying for the <strong>{listing['title']}</strong> position at E&S Decorations.</p>"
+                "<p>This position has now been filled and the listing is closed. We appreciate the time you took "
+                "to apply and encourage you to keep an eye on our future openings.</p>"
+            ),
+            plain_text_body=(
+                f"Thank you for applying for the {listing['title']} position at E&S Decorations.\n\n"
+                "This position has now been filled and the listing is closed. We appreciate the time you took "
+                "to apply and encourage you to keep an eye on our future openings."
+            )
+        )
+        campaign_id = await campaign_runner.start("job_closed", total, template, meta=meta)
+        return {"message": "Job listing closed", "campaign_id": campaign_id, "recipients": total}
+    except errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid listing ID")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error closing job listing: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/campaigns/services-announcement")
+async def send_services_announcement(message: CampaignMessage, admin: dict = Depends(get_current_admin)):
+    """Email every past (non-spam) inquirer once about new services"""
+    try:
+        counted = await contacts_collection.aggregate([
+            {"$match": SERVICES_ANNOUNCEMENT_MATCH},
+            {"$group": {"_id": "$email"}},
+            {"$count": "total"}
+        ]).to_list(length=1)
+        total = counted[0]["total"] if counted else 0
+
+        campaign_id = await campaign_runner.start(
+            "services_announcement",
+            total,
+            build_campaign_template(message.subject, message.html_body, message.plain_text_body)
+        )
+        return {"message": "Campaign started", "campaign_id": campaign_id, "recipients": total}
+    except Exception as e:
+        logger.error(f"Error starting services campaign: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/campaigns")
+async def list_campaigns(admin: dict = Depends(get_current_admin)):
+    try:
+        campaigns = await email_campaigns_collection.find().sort("created_at", -1).limit(50).to_list(length=50)
+        return [format_campaign(campaign) for campaign in campaigns]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/campaigns/{campaign_id}")
+async def get_campaign(campaign_id: str, admin: dict = Depends(get_current_admin)):
+    """Campaign progress: total, sent, failed and status"""
+    try:
+        campaign = await campaign_runner.get(campaign_id)
+        if not campaign:
+            raise HTTPException(status_code=404, detail="Campaign not found")
+        return format_campaign(campaign)
+    except errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid campaign ID")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/campaigns/{campaign_id}/resume")
+async def resume_campaign(campaign_id: str, admin: dict = Depends(get_current_admin)):
+    """Continue an interrupted or failed campaign after the last chunk it finished"""
+    try:
+        campaign = await campaign_runner.resume(campaign_id)
+        remaining = campaign["total"] - campaign["sent"] - campaign["failed"]
+        return {"message": "Campaign resumed", "campaign_id": campaign_id, "remaining": max(0, remaining)}
+    except errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid campaign ID")
+    except CampaignNotResumable as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error resuming campaign: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Admin Login with JWT
 def generate_verification_code() -> str:
     """Generate a 6-digit verification code"""
@@ -1179,7 +2373,7 @@ async def send_admin_verification_email(email: str, code: str, admin_name: str =
         This is an automated security message
         """
 
-        params: resend.Emails.SendParams = {
+        params = {
             "from": EMAIL_FROM,
             "to": [email],
             "subject": subject,
@@ -1188,44 +2382,37 @@ async def send_admin_verification_email(email: str, code: str, admin_name: str =
             "reply_to": "esdecorationsind@gmail.com"
         }
 
-        email_response = resend.Emails.send(params)
-        print(f"✅ Admin verification email sent to {email}")
+        await email_outbox.enqueue(params, kind="admin_verification")
+        logger.info(f"Admin verification email queued for {email}")
         return True
 
     except Exception as e:
-        print(f"❌ Error sending admin verification email: {str(e)}")
+        logger.error(f"Error queueing admin verification email: {str(e)}")
         return False
 
 # Replace your existing admin login endpoints with these two new endpoints:
 
-@app.post("/admin-management-pambady-kayathumkal/request-verification")
+@app.post(f"{ADMIN_PATH}/request-verification")
 async def request_admin_verification(request: RequestVerificationCode):
     """Step 1: Validate credentials and send verification code"""
     try:
         # First validate email and password
         admin = await admins_collection.find_one({"email": request.email})
-        if not admin or not verify_password(request.password, admin["password"]):
+        if not admin or not await verify_password(request.password, admin["password"]):
             raise HTTPException(status_code=401, detail="Invalid email or password")
 
-        # Generate verification code
+        # Generate and store verification code
         code = generate_verification_code()
-        expires_at = datetime.datetime.utcnow() + datetime.timedelta(minutes=5)
-        
-        # Store verification code
-        verification_codes[request.email] = {
-            "code": code,
-            "expires": expires_at,
-            "admin_name": admin.get("name", "Admin")
-        }
+        admin_name = admin.get("name", "Admin")
+        await verification_codes.issue(request.email, code, admin_name, VERIFICATION_CODE_TTL_SECONDS)
 
         # Send verification email
-        admin_name = admin.get("name", "Admin")
         success = await send_admin_verification_email(request.email, code, admin_name)
         
         if not success:
             raise HTTPException(status_code=500, detail="Failed to send verification email")
         
-        print(f"✅ Verification code sent to {request.email}")
+        logger.info(f"Verification code sent to {request.email}")
         return {
             "message": "Verification code sent to your email", 
             "email": request.email,
@@ -1235,77 +2422,62 @@ async def request_admin_verification(request: RequestVerificationCode):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error requesting verification: {str(e)}")
+        logger.error(f"Error requesting verification: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to process request")
 
-@app.post("/admin-management-pambady-kayathumkal/login", response_model=Token)
+@app.post(f"{ADMIN_PATH}/login", response_model=Token)
 async def admin_login_with_2fa(login_request: AdminLoginRequest):
     """Step 2: Verify code and complete login"""
     try:
-        # Check if verification code exists
-        if login_request.email not in verification_codes:
-            raise HTTPException(status_code=401, detail="No verification code requested. Please request a new code.")
+        # Verify admin credentials first, so a wrong password does not burn the code
+        admin = await admins_collection.find_one({"email": login_request.email})
+        if not admin or not await verify_password(login_request.password, admin["password"]):
+            raise HTTPException(status_code=401, detail="Invalid credentials")
 
-        stored_data = verification_codes[login_request.email]
-        
-        # Check if code expired
-        if datetime.datetime.utcnow() > stored_data["expires"]:
-            del verification_codes[login_request.email]
+        # Atomically check and consume the code - it can only be used once
+        outcome = await verification_codes.consume(login_request.email, login_request.verification_code)
+        if outcome == verification_store.MISSING:
+            raise HTTPException(status_code=401, detail="No verification code requested. Please request a new code.")
+        if outcome == verification_store.EXPIRED:
             raise HTTPException(status_code=401, detail="Verification code expired. Please request a new code.")
-
-        # Check if code matches
-        if login_request.verification_code != stored_data["code"]:
+        if outcome == verification_store.INVALID:
             raise HTTPException(status_code=401, detail="Invalid verification code")
 
-        # Verify admin credentials again (security)
-        admin = await admins_collection.find_one({"email": login_request.email})
-        if not admin or not verify_password(login_request.password, admin["password"]):
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-
-        # Clean up verification code
-        del verification_codes[login_request.email]
+        # Transparent upgrade when BCRYPT_ROUNDS changed since the hash was stored
+        await rehash_if_needed(admin, login_request.password)
 
         # Generate access token
         access_token = create_access_token(data={"sub": admin["email"]})
         
-        print(f"✅ Admin {admin.get('name')} successfully logged in with 2FA")
+        logger.info(f"Admin {admin.get('name')} successfully logged in with 2FA")
         return {"access_token": access_token, "token_type": "bearer"}
 
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Error during 2FA login: {str(e)}")
+        logger.error(f"Error during 2FA login: {str(e)}")
         raise HTTPException(status_code=500, detail="Login failed")
 
 # Add a cleanup endpoint (optional - for removing expired codes)
-@app.post("/admin-management-pambady-kayathumkal/cleanup-codes")
+@app.post(f"{ADMIN_PATH}/cleanup-codes")
 async def cleanup_expired_codes():
-    """Clean up expired verification codes"""
+    """Clean up expired verification codes (the Mongo store also expires them via TTL)"""
     try:
-        now = datetime.datetime.utcnow()
-        expired_emails = []
-        
-        for email, data in verification_codes.items():
-            if now > data["expires"]:
-                expired_emails.append(email)
-        
-        for email in expired_emails:
-            del verification_codes[email]
-        
-        return {"message": f"Cleaned up {len(expired_emails)} expired codes"}
+        removed = await verification_codes.cleanup()
+        return {"message": f"Cleaned up {removed} expired codes"}
     except Exception as e:
-        print(f"Error cleaning up codes: {str(e)}")
+        logger.error(f"Error cleaning up codes: {str(e)}")
         raise HTTPException(status_code=500, detail="Cleanup failed")
 
 # Add New Admin
-@app.post("/admin-management-pambady-kayathumkal/add")
+@app.post(f"{ADMIN_PATH}/add")
 async def add_admin(admin: AdminCreate):
     try:
         existing_admin = await admins_collection.find_one({"email": admin.email})
         if existing_admin:
             raise HTTPException(status_code=400, detail="Admin with this email already exists")
 
-        hashed_password = hash_password(admin.password)
+        hashed_password = await hash_password(admin.password)
         new_admin = {
             "name": admin.name,
             "email": admin.email,
@@ -1315,12 +2487,14 @@ async def add_admin(admin: AdminCreate):
 
         result = await admins_collection.insert_one(new_admin)
         return {"message": "Admin added successfully", "admin_id": str(result.inserted_id)}
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error adding admin: {str(e)}")
+        logger.error(f"Error adding admin: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Update Admin Details
-@app.patch("/admin-management-pambady-kayathumkal/update/{admin_id}")
+@app.patch(f"{ADMIN_PATH}/update/{{admin_id}}")
 async def update_admin(admin_id: str, admin_update: AdminUpdate):
     try:
         update_data = {}
@@ -1330,7 +2504,7 @@ async def update_admin(admin_id: str, admin_update: AdminUpdate):
         if admin_update.email:
             update_data["email"] = admin_update.email
         if admin_update.new_password:
-            update_data["password"] = hash_password(admin_update.new_password)
+            update_data["password"] = await hash_password(admin_update.new_password)
 
         if not update_data:
             raise HTTPException(status_code=400, detail="No update data provided")
@@ -1346,26 +2520,32 @@ async def update_admin(admin_id: str, admin_update: AdminUpdate):
         return {"message": "Admin updated successfully"}
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid admin ID")
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"Error updating admin: {str(e)}")
+        logger.error(f"Error updating admin: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Job Listings Endpoints
 @app.get("/job-listings")
-async def get_job_listings():
-    try:
+async def get_job_listings(request: Request):
+    async def load_listings():
         listings = await job_listings_collection.find().to_list(length=None)
         # Convert ObjectId to string for each listing
         for listing in listings:
             listing["_id"] = str(listing["_id"])
         return listings
+
+    try:
+        return await public_cache.respond(request, "job_listings", load_listings)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/job-listings")
 async def create_job_listing(listing: JobListing):
     try:
-        result = await job_listings_collection.insert_one(listing.dict())
+        result = await job_listings_collection.insert_one(with_updated_at(listing.dict()))
+        public_cache.invalidate("job_listings")
         if result.inserted_id:
             created_listing = await job_listings_collection.find_one(
                 {"_id": result.inserted_id}
@@ -1381,8 +2561,9 @@ async def update_job_listing(listing_id: str, listing: JobListing):
     try:
         result = await job_listings_collection.update_one(
             {"_id": ObjectId(listing_id)},
-            {"$set": listing.dict()}
+            {"$set": with_updated_at(listing.dict())}
         )
+        public_cache.invalidate("job_listings")
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Job listing not found")
         updated_listing = await job_listings_collection.find_one(
@@ -1401,8 +2582,10 @@ async def delete_job_listing(listing_id: str):
         result = await job_listings_collection.delete_one(
             {"_id": ObjectId(listing_id)}
         )
+        public_cache.invalidate("job_listings")
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Job listing not found")
+        await sync_feed.record_deleted("job_listings", [listing_id])
         return {"message": "Job listing deleted successfully"}
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid listing ID")
@@ -1439,9 +2622,16 @@ async def submit_job_application(application: JobApplication):
                 raise HTTPException(status_code=400, detail="Invalid resume format")
         
         # Insert application into database
-        result = await job_applications_collection.insert_one(application_dict)
+        admin_search.add_search_keys("job_applications", application_dict)
+        result = await job_applications_collection.insert_one(with_updated_at(application_dict))
         
         if result.inserted_id:
+            notification_broker.publish("job_application", {
+                "id": str(result.inserted_id),
+                "name": application_dict["name"],
+                "jobId": application_dict["jobId"],
+                "appliedDate": application_dict["appliedDate"]
+            })
             # Return the created application with string ID
             created_application = await job_applications_collection.find_one(
                 {"_id": result.inserted_id}
@@ -1467,7 +2657,7 @@ async def update_application_status(application_id: str, status: str):
         # Update the status
         result = await job_applications_collection.update_one(
             {"_id": ObjectId(application_id)},
-            {"$set": {"status": status}}
+            {"$set": with_updated_at({"status": status})}
         )
 
         if result.modified_count == 0:
@@ -1493,20 +2683,24 @@ async def update_application_status(application_id: str, status: str):
 
 # FAQ Endpoints
 @app.get("/faqs")
-async def get_faqs():
-    try:
+async def get_faqs(request: Request):
+    async def load_faqs():
         faqs = await faqs_collection.find().to_list(length=None)
         # Convert ObjectId to string for each FAQ
         for faq in faqs:
             faq["_id"] = str(faq["_id"])
         return faqs
+
+    try:
+        return await public_cache.respond(request, "faqs", load_faqs)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/faqs")
 async def create_faq(faq: FAQ):
     try:
-        result = await faqs_collection.insert_one(faq.dict())
+        result = await faqs_collection.insert_one(with_updated_at(faq.dict()))
+        public_cache.invalidate("faqs")
         if result.inserted_id:
             created_faq = await faqs_collection.find_one({"_id": result.inserted_id})
             created_faq["_id"] = str(created_faq["_id"])
@@ -1520,8 +2714,9 @@ async def update_faq(faq_id: str, faq: FAQ):
     try:
         result = await faqs_collection.update_one(
             {"_id": ObjectId(faq_id)},
-            {"$set": faq.dict()}
+            {"$set": with_updated_at(faq.dict())}
         )
+        public_cache.invalidate("faqs")
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="FAQ not found")
         updated_faq = await faqs_collection.find_one({"_id": ObjectId(faq_id)})
@@ -1536,8 +2731,10 @@ async def update_faq(faq_id: str, faq: FAQ):
 async def delete_faq(faq_id: str):
     try:
         result = await faqs_collection.delete_one({"_id": ObjectId(faq_id)})
+        public_cache.invalidate("faqs")
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="FAQ not found")
+        await sync_feed.record_deleted("faqs", [faq_id])
         return {"message": "FAQ deleted successfully"}
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid FAQ ID")
@@ -1550,7 +2747,7 @@ async def delete_faq(faq_id: str):
 @app.post("/upload-image")
 async def upload_image(file: UploadFile = File(...)):
     try:
-        print(f"\n🚀 Starting upload for: {file.filename}")
+        image_logger.debug(f"Starting upload for: {file.filename}")
         
         if not file.filename:
             raise HTTPException(status_code=400, detail="No filename provided")
@@ -1573,48 +2770,54 @@ async def upload_image(file: UploadFile = File(...)):
                 detail="File type not supported. Please upload: JPG, PNG, GIF, BMP, WebP, TIFF, or HEIC"
             )
         
-        is_valid, validation_message = image_compressor.is_image(file_content)
+        is_valid, validation_message = await run_image_job(image_compressor.is_image, file_content)
         if not is_valid:
             raise HTTPException(status_code=400, detail=validation_message)
         
-        print(f"✅ Validation passed: {validation_message}")
+        image_logger.debug(f"Validation passed: {validation_message}")
         
         file_size = len(file_content)
-        print(f"📏 File size: {file_size:,} bytes ({file_size / (1024*1024):.2f} MB)")
+        image_logger.debug(f"File size: {file_size:,} bytes ({file_size / (1024*1024):.2f} MB)")
         
         # Check if it's a HEIC file - always convert these
         is_heic = file.filename.lower().endswith(('.heic', '.heif'))
         
         if file_size > image_compressor.MAX_SIZE_BYTES or is_heic:
             if is_heic:
-                print(f"🔄 HEIC file detected - converting to JPEG for web compatibility")
+                image_logger.debug(f"HEIC file detected - converting to JPEG for web compatibility")
             else:
-                print(f"🗜️  File exceeds 15MB - applying compression")
+                image_logger.debug(f"File exceeds 15MB - applying compression")
             
             try:
                 if file_size > 25 * 1024 * 1024:
-                    final_content, metadata = image_compressor.progressive_compress(file_content)
+                    final_content, metadata = await run_image_job(image_compressor.progressive_compress, file_content)
                 else:
-                    final_content, metadata = image_compressor.convert_to_web_format(file_content)
+                    final_content, metadata = await run_image_job(image_compressor.convert_to_web_format, file_content)
                 
                 compression_applied = True
                 
                 if is_heic:
-                    print(f"✅ HEIC converted to JPEG: {metadata.get('savings_percent', 0)}% size change")
+                    image_logger.debug(f"HEIC converted to JPEG: {metadata.get('savings_percent', 0)}% size change")
                 else:
-                    print(f"✅ Compressed: {metadata['savings_percent']}% savings")
+                    image_logger.debug(f"Compressed: {metadata['savings_percent']}% savings")
                 
+            except HTTPException:
+                raise
             except Exception as e:
-                print(f"❌ Processing failed: {str(e)}")
+                image_logger.error(f"Processing failed: {str(e)}")
                 raise HTTPException(status_code=500, detail=f"Image processing failed: {str(e)}")
             
         else:
-            print(f"✨ File within 15MB limit")
+            image_logger.debug(f"File within 15MB limit")
             # Still convert to JPEG for consistency (optional)
             try:
-                final_content, metadata = image_compressor.convert_to_web_format(file_content, quality=95)
+                final_content, metadata = await run_image_job(
+                    image_compressor.convert_to_web_format, file_content, quality=95
+                )
                 compression_applied = True
-                print(f"🔄 Converted to JPEG for web compatibility")
+                image_logger.debug(f"Converted to JPEG for web compatibility")
+            except HTTPException:
+                raise
             except:
                 # Fallback to original if conversion fails
                 final_content = file_content
@@ -1628,10 +2831,18 @@ async def upload_image(file: UploadFile = File(...)):
                     'reason': 'under_15mb_limit'
                 }
         
+        # Tiny WebP and dominant colour the grids paint while the image loads; best effort,
+        # and outside the pool's admission check since the upload was already admitted
+        metadata['placeholder'] = await image_pool.run_background(placeholder_from_bytes, final_content)
+
+        image_bytes_processed.inc("in", amount=file_size)
+        image_bytes_processed.inc("out", amount=len(final_content))
+        image_uploads.inc("converted" if compression_applied else "passthrough")
+        
         # Convert to base64 - this should now always be a JPEG
         base64_string = base64.b64encode(final_content).decode('utf-8')
         
-        print(f"🎯 Final: {len(final_content):,} bytes as JPEG")
+        image_logger.debug(f"Final: {len(final_content):,} bytes as JPEG")
         
         return {
             "image": base64_string,
@@ -1649,7 +2860,7 @@ async def upload_image(file: UploadFile = File(...)):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"💥 Error: {str(e)}")
+        image_logger.error(f"Upload failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
 @app.get("/compression-stats")
@@ -1668,14 +2879,75 @@ async def get_compression_stats():
         raise HTTPException(status_code=500, detail=str(e))
 
 # Gallery Event Management Endpoints
+def stored_image_response(request: Request, value: Optional[str]) -> Response:
+    """Serve one stored base64 image as binary, so pages can load it lazily by URL"""
+    image_bytes = decode_data(value)
+    if not image_bytes:
+        raise HTTPException(status_code=404, detail="Image not found")
+    media_type = value.split(";", 1)[0][len("data:"):] if value.startswith("data:") else "image/jpeg"
+    etag = f'"{hashlib.sha1(image_bytes).hexdigest()[:20]}"'
+    # Pages add ?v=<updated_at>, so a versioned URL never changes content
+    cache_control = "public, max-age=31536000, immutable" if request.query_params.get("v") else "no-cache"
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=image_bytes, media_type=media_type, headers=headers)
+
 @app.get("/gallery-events")
-async def get_gallery_events():
-    try:
-        events = await events_collection.find({"type": "gallery"}).to_list(length=None)
+async def get_gallery_events(request: Request, include_images: bool = True):
+    """Gallery events; include_images=false returns placeholders and image counts without the base64 images"""
+    async def load_gallery_events():
+        if include_images:
+            events = await events_collection.find({"type": "gallery"}).to_list(length=None)
+        else:
+            events = await events_collection.aggregate([
+                {"$match": {"type": "gallery"}},
+                {"$addFields": {"image_count": {"$size": {"$ifNull": ["$images", []]}}}},
+                {"$project": {"images": 0, "thumbnail": 0}},
+            ]).to_list(length=None)
         # Convert ObjectId to string for each event
         for event in events:
             event["_id"] = str(event["_id"])
         return events
+
+    try:
+        return await public_cache.respond(
+            request, "events", load_gallery_events, params={"include_images": include_images}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/gallery-events/{event_id}/thumbnail")
+async def get_gallery_event_thumbnail(event_id: str, request: Request):
+    try:
+        event = await events_collection.find_one({"_id": ObjectId(event_id), "type": "gallery"}, {"thumbnail": 1})
+        if not event:
+            raise HTTPException(status_code=404, detail="Gallery event not found")
+        return stored_image_response(request, event.get("thumbnail"))
+    except errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid event ID")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/gallery-events/{event_id}/images/{index}")
+async def get_gallery_event_image(event_id: str, index: int, request: Request):
+    try:
+        if index < 0:
+            raise HTTPException(status_code=404, detail="Image not found")
+        event = await events_collection.find_one(
+            {"_id": ObjectId(event_id), "type": "gallery"},
+            {"images": {"$slice": [index, 1]}}
+        )
+        if not event:
+            raise HTTPException(status_code=404, detail="Gallery event not found")
+        images = event.get("images") or []
+        return stored_image_response(request, images[0] if images else None)
+    except errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid event ID")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1684,7 +2956,11 @@ async def create_gallery_event(event: GalleryEventCreate):
     try:
         event_dict = event.dict()
         event_dict["type"] = "gallery"  # Add type field to distinguish gallery events
+        event_dict["starts_at"] = parse_event_datetime(event.date)
+        event_dict["placeholders"] = await run_image_job(compute_placeholders, event_dict, GALLERY_IMAGE_FIELDS)
+        with_updated_at(event_dict)
         result = await events_collection.insert_one(event_dict)
+        public_cache.invalidate("events")
         if result.inserted_id:
             created_event = await events_collection.find_one(
                 {"_id": result.inserted_id}
@@ -1692,6 +2968,74 @@ async def create_gallery_event(event: GalleryEventCreate):
             created_event["_id"] = str(created_event["_id"])
             return created_event
         raise HTTPException(status_code=500, detail="Failed to create event")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/gallery-events/import", status_code=202)
+async def import_gallery_event(
+    file: UploadFile = File(...),
+    title: Optional[str] = Form(None),
+    date: Optional[str] = Form(None),
+    category: Optional[str] = Form(None),
+    details: Optional[str] = Form(None),
+    admin: dict = Depends(get_current_admin)
+):
+    """Create a gallery event from a ZIP of photos, with an optional manifest.json; poll the returned import for progress"""
+    try:
+        plan = await gallery_importer.prepare(
+            file.file,
+            {"title": title, "date": date, "category": category, "details": details}
+        )
+        defaults = {"description": "", "location": "", "attendees": 0, "category": "", "details": ""}
+        try:
+            fields = GalleryEventCreate(**{**defaults, **plan.fields, "thumbnail": "", "images": []}).dict()
+        except ValueError as e:
+            plan.discard()
+            raise HTTPException(status_code=400, detail=f"Invalid gallery event fields: {e}")
+        plan.fields = {key: fields[key] for key in fields if key not in ("thumbnail", "images")}
+
+        async def create_event(event_fields: dict) -> str:
+            event_dict = GalleryEventCreate(**event_fields).dict()
+            event_dict["type"] = "gallery"
+            event_dict["starts_at"] = parse_event_datetime(event_dict["date"])
+            # Computed by the compressor while the photos were processed
+            event_dict["placeholders"] = event_fields["placeholders"]
+            with_updated_at(event_dict)
+            result = await events_collection.insert_one(event_dict)
+            public_cache.invalidate("events")
+            return str(result.inserted_id)
+
+        import_id = await gallery_importer.start(
+            plan, create_event, meta={"filename": file.filename, "admin": admin.get("email")}
+        )
+        return {
+            "message": "Gallery import started",
+            "import_id": import_id,
+            "images": len(plan.members),
+            "status_url": f"/gallery-events/imports/{import_id}"
+        }
+    except InvalidGalleryImport as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error starting gallery import: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/gallery-events/imports/{import_id}")
+async def get_gallery_import(import_id: str, admin: dict = Depends(get_current_admin)):
+    """Import progress: total, processed, failed, status and the event id once created"""
+    try:
+        gallery_import = await gallery_importer.get(import_id)
+        if not gallery_import:
+            raise HTTPException(status_code=404, detail="Gallery import not found")
+        return jsonable_encoder(gallery_import, custom_encoder={ObjectId: str})
+    except errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid import ID")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1700,10 +3044,14 @@ async def update_gallery_event(event_id: str, event: GalleryEventUpdate):
     try:
         event_dict = event.dict()
         event_dict["type"] = "gallery"  # Ensure type remains gallery
+        event_dict["starts_at"] = parse_event_datetime(event.date)
+        event_dict["placeholders"] = await run_image_job(compute_placeholders, event_dict, GALLERY_IMAGE_FIELDS)
+        with_updated_at(event_dict)
         result = await events_collection.update_one(
             {"_id": ObjectId(event_id), "type": "gallery"},
             {"$set": event_dict}
         )
+        public_cache.invalidate("events")
         if result.modified_count == 0:
             raise HTTPException(status_code=404, detail="Gallery event not found")
         updated_event = await events_collection.find_one(
@@ -1713,6 +3061,8 @@ async def update_gallery_event(event_id: str, event: GalleryEventUpdate):
         return updated_event
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid event ID")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1722,8 +3072,10 @@ async def delete_gallery_event(event_id: str):
         result = await events_collection.delete_one(
             {"_id": ObjectId(event_id), "type": "gallery"}
         )
+        public_cache.invalidate("events")
         if result.deleted_count == 0:
             raise HTTPException(status_code=404, detail="Gallery event not found")
+        await sync_feed.record_deleted("events", [event_id])
         return {"message": "Gallery event deleted successfully"}
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid event ID")
@@ -1731,13 +3083,34 @@ async def delete_gallery_event(event_id: str):
         raise HTTPException(status_code=500, detail=str(e))
     
 @app.get("/latest-works")
-async def get_latest_works():
-    try:
-        works = await latest_works_collection.find().to_list(length=None)
+async def get_latest_works(request: Request, include_images: bool = True):
+    """Latest works; include_images=false returns placeholders without the base64 thumbnails"""
+    async def load_latest_works():
+        projection = None if include_images else {"thumbnail": 0}
+        works = await latest_works_collection.find({}, projection).to_list(length=None)
         # Convert ObjectId to string for each work
         for work in works:
             work["_id"] = str(work["_id"])
         return works
+
+    try:
+        return await public_cache.respond(
+            request, "latest_works", load_latest_works, params={"include_images": include_images}
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/latest-works/{work_id}/thumbnail")
+async def get_latest_work_thumbnail(work_id: str, request: Request):
+    try:
+        work = await latest_works_collection.find_one({"_id": ObjectId(work_id)}, {"thumbnail": 1})
+        if not work:
+            raise HTTPException(status_code=404, detail="Work not found")
+        return stored_image_response(request, work.get("thumbnail"))
+    except errors.InvalidId:
+        raise HTTPException(status_code=400, detail="Invalid work ID format")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1756,8 +3129,11 @@ async def create_latest_work(work: dict):
                 "processed": True
             }
 
+        work["placeholders"] = await run_image_job(compute_placeholders, work, LATEST_WORK_IMAGE_FIELDS)
+
         # Insert the work into MongoDB
-        result = await latest_works_collection.insert_one(work)
+        result = await latest_works_collection.insert_one(with_updated_at(work))
+        public_cache.invalidate("latest_works")
         
         if result.inserted_id:
             created_work = await latest_works_collection.find_one({"_id": result.inserted_id})
@@ -1765,6 +3141,8 @@ async def create_latest_work(work: dict):
             return created_work
             
         raise HTTPException(status_code=500, detail="Failed to create work")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -1774,14 +3152,14 @@ async def test_compression(file: UploadFile = File(...)):
     try:
         file_content = await file.read()
         
-        if not image_compressor.is_image(file_content):
+        if not await run_image_job(image_compressor.is_image, file_content):
             raise HTTPException(status_code=400, detail="File is not a valid image")
         
         file_size = len(file_content)
         
         # Always compress for testing
-        compressed_content, metadata = image_compressor.compress_image(file_content)
-        progressive_content, progressive_metadata = image_compressor.progressive_compress(file_content)
+        compressed_content, metadata = await run_image_job(image_compressor.compress_image, file_content)
+        progressive_content, progressive_metadata = await run_image_job(image_compressor.progressive_compress, file_content)
         
         return {
             "original_size": file_size,
@@ -1798,6 +3176,8 @@ async def test_compression(file: UploadFile = File(...)):
                 "savings": progressive_metadata['savings_percent']
             }
         }
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1812,10 +3192,12 @@ async def update_latest_work(work_id: str, work: dict):
         if not all(key in work for key in ["title", "thumbnail", "category"]):
             raise HTTPException(status_code=422, detail="Missing required fields")
 
+        work["placeholders"] = await run_image_job(compute_placeholders, work, LATEST_WORK_IMAGE_FIELDS)
         result = await latest_works_collection.update_one(
             {"_id": ObjectId(work_id)},
-            {"$set": work}
+            {"$set": with_updated_at(work)}
         )
+        public_cache.invalidate("latest_works")
         
         if result.matched_count == 0:
             raise HTTPException(status_code=404, detail="Work not found")
@@ -1828,6 +3210,8 @@ async def update_latest_work(work_id: str, work: dict):
         return updated_work
     except errors.InvalidId:
         raise HTTPException(status_code=400, detail="Invalid work ID format")
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1844,9 +3228,11 @@ async def delete_latest_work(work_id: str):
             raise HTTPException(status_code=404, detail="Work not found")
 
         result = await latest_works_collection.delete_one({"_id": ObjectId(work_id)})
+        public_cache.invalidate("latest_works")
         
         if result.deleted_count == 0:
             raise HTTPException(status_code=500, detail="Failed to delete work")
+        await sync_feed.record_deleted("latest_works", [work_id])
             
         return {"message": "Work deleted successfully"}
     except errors.InvalidId:
@@ -1854,12 +3240,12 @@ async def delete_latest_work(work_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-# NEW: Test endpoint to verify Resend integration
+# Test endpoint to verify the Resend integration
 @app.post("/test-email")
 async def test_email_sending():
     """Test endpoint to verify Resend API is working correctly"""
     try:
-        params: resend.Emails.SendParams = {
+        params = {
             "from": EMAIL_FROM,
             "to": ["esdecorationsind@gmail.com"],  # Send test email to yourself
             "subject": "🧪 E&S Decorations - Resend API Test",
@@ -1887,16 +3273,8 @@ async def test_email_sending():
             "reply_to": "esdecorationsind@gmail.com"
         }
 
-        email_response = resend.Emails.send(params)
-        
-        # Handle different response formats
-        email_id = None
-        if hasattr(email_response, 'id'):
-            email_id = email_response.id
-        elif isinstance(email_response, dict) and 'id' in email_response:
-            email_id = email_response['id']
-        else:
-            email_id = "unknown"
+        # Sent directly (not via the outbox) so the result reflects the provider right now
+        email_id = await send_email_via_resend(params)
             
         return {
             "success": True,
@@ -1912,6 +3290,8 @@ async def test_email_sending():
             "message": "Failed to send test email. Please check your Resend API configuration."
         }
 
+startup_profiler.checkpoint("app module")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
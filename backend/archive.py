@@ -0,0 +1,210 @@
+"""Hot/archive tiering for contacts and job applications.
+
+Solved or spam-flagged inquiries and decided job applications are moved out
+of the collections the admin panel scans into ``*_archive`` collections, in
+batches, once they are older than a configurable age.
+"""
+import asyncio
+import datetime
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+INDEX_OPTIONS_CONFLICT_ERRORS = (85, 86)
+
+
+class ArchiveTier:
+    """A hot collection, its archive collection and the filter selecting archivable documents"""
+
+    def __init__(
+        self,
+        name: str,
+        source,
+        archive,
+        select: Callable[[datetime.datetime], Dict[str, Any]],
+        text_fields: List[str],
+    ):
+        self.name = name
+        self.source = source
+        self.archive = archive
+        self.select = select
+        self.text_fields = text_fields
+
+
+class ArchiveManager:
+    """Moves old documents from hot collections into archive collections"""
+
+    def __init__(
+        self,
+        tiers: List[ArchiveTier],
+        archive_after_days: int = 90,
+        batch_size: int = 500,
+        ttl_days: int = 0,
+        interval_seconds: int = 3600,
+        on_moved: Optional[Callable[[str, List[Any]], Awaitable[None]]] = None,
+    ):
+        self.tiers = {tier.name: tier for tier in tiers}
+        self.archive_after_days = archive_after_days
+        self.batch_size = batch_size
+        self.ttl_days = ttl_days
+        self.interval_seconds = interval_seconds
+        # Called with the tier name and ids after documents leave the hot collection
+        self.on_moved = on_moved
+        self.last_run: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def ensure_indexes(self):
+        """Create archive indexes, including the optional TTL expiry index"""
+        for tier in self.tiers.values():
+            await tier.archive.create_index("created_at")
+            await tier.archive.create_index(
+                [(field, "text") for field in tier.text_fields],
+                name="archive_text"
+            )
+
+            if self.ttl_days > 0:
+                expire_after = self.ttl_days * 24 * 3600
+                # Left by a run with TTL off; same key, so it would block the TTL index
+                try:
+                    await tier.archive.drop_index("archived_at_1")
+                except OperationFailure:
+                    pass
+                try:
+                    await tier.archive.create_index(
+                        "archived_at",
+                        name="archived_at_ttl",
+                        expireAfterSeconds=expire_after
+                    )
+                except OperationFailure as e:
+                    if e.code not in INDEX_OPTIONS_CONFLICT_ERRORS:
+                        raise
+                    # TTL changed since the index was built - update it in place
+                    await tier.archive.database.command(
+                        "collMod",
+                        tier.archive.name,
+                        index={"name": "archived_at_ttl", "expireAfterSeconds": expire_after}
+                    )
+            else:
+                try:
+                    await tier.archive.drop_index("archived_at_ttl")
+                except OperationFailure:
+                    pass
+                await tier.archive.create_index("archived_at")
+
+    async def archive_tier(self, tier: ArchiveTier, cutoff: datetime.datetime) -> int:
+        """Move every archivable document of one tier, one batch at a time"""
+        moved = 0
+        query = tier.select(cutoff)
+
+        while True:
+            batch = await tier.source.find(query).sort("_id", 1).limit(self.batch_size).to_list(length=self.batch_size)
+            if not batch:
+                break
+
+            archived_at = datetime.datetime.utcnow()
+            for doc in batch:
+                doc["archived_at"] = archived_at
+
+            try:
+                await tier.archive.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Duplicates mean a previous run copied the document but died before
+                # deleting it from the hot collection - safe to delete now
+                write_errors = e.details.get("writeErrors", [])
+                if any(err.get("code") != DUPLICATE_KEY_ERROR for err in write_errors):
+                    raise
+
+            ids = [doc["_id"] for doc in batch]
+            await tier.source.delete_many({"_id": {"$in": ids}})
+            moved += len(ids)
+            if self.on_moved is not None:
+                await self.on_moved(tier.name, ids)
+
+            if len(batch) < self.batch_size:
+                break
+
+        return moved
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Archive every tier once and return the number of documents moved per tier"""
+        cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=self.archive_after_days)
+        moved = {}
+        for name, tier in self.tiers.items():
+            moved[name] = await self.archive_tier(tier, cutoff)
+
+        self.last_run = {
+            "finished_at": datetime.datetime.utcnow().isoformat(),
+            "cutoff": cutoff.isoformat(),
+            "moved": moved,
+        }
+        logger.info(f"Archive run finished: {moved}")
+        return self.last_run
+
+    async def search(
+        self,
+        tier_name: str,
+        text: str = "",
+        skip: int = 0,
+        limit: int = 50,
+        projection: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Search one archive collection, newest first or by text relevance"""
+        archive = self.tiers[tier_name].archive
+        query: Dict[str, Any] = {}
+        sort: List[Any] = [("archived_at", -1)]
+        projection = dict(projection or {})
+
+        if text.strip():
+            query["$text"] = {"$search": text.strip()}
+            projection["score"] = {"$meta": "textScore"}
+            sort = [("score", {"$meta": "textScore"})]
+
+        total = await archive.count_documents(query)
+        cursor = archive.find(query, projection or None).sort(sort).skip(skip).limit(limit)
+        items = await cursor.to_list(length=limit)
+        return {"total": total, "items": items}
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Archive run failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def archivable_contacts(cutoff: datetime.datetime) -> Dict[str, Any]:
+    """Solved or spam-flagged inquiries created before the cutoff"""
+    return {
+        "$or": [{"is_solved": True}, {"is_flagged": True}],
+        "created_at": {"$lt": cutoff},
+    }
+
+
+def archivable_applications(cutoff: datetime.datetime) -> Dict[str, Any]:
+    """Approved or rejected applications submitted before the cutoff"""
+    # appliedDate is a client-supplied string, so age is taken from the ObjectId
+    return {
+        "status": {"$in": ["approved", "rejected"]},
+        "_id": {"$lt": ObjectId.from_datetime(cutoff)},
+    }
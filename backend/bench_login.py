@@ -0,0 +1,102 @@
+"""Benchmark admin login password checks under concurrency.
+
+Compares bcrypt run inline on the event loop (the old verify_password) with the
+bounded PasswordHasher pool. For each mode it reports login throughput and how
+long the event loop stalled, which is the delay every other request sees
+while logins are being checked.
+
+    python bench_login.py --logins 40 --concurrency 8 --rounds 12
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import bcrypt
+
+from passwords import PasswordHasher, default_workers
+
+
+async def measure_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> list:
+    lags = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - started - interval)
+    return lags
+
+
+async def run_mode(name: str, verify, logins: int, concurrency: int) -> dict:
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_loop_lag(stop))
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def login():
+        async with semaphore:
+            started = time.perf_counter()
+            assert await verify()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    lags = await lag_task
+
+    latencies.sort()
+    return {
+        "mode": name,
+        "logins": logins,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "logins_per_second": round(logins / elapsed, 2),
+        "login_p50_ms": round(statistics.median(latencies) * 1000, 1),
+        "login_p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 1),
+        "loop_lag_max_ms": round(max(lags, default=0.0) * 1000, 1),
+        "loop_lag_p95_ms": round(sorted(lags)[int(len(lags) * 0.95) - 1] * 1000, 1) if lags else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    stored = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=args.rounds)).decode("utf-8")
+
+    async def verify_inline():
+        return bcrypt.checkpw(password.encode("utf-8"), stored.encode("utf-8"))
+
+    hasher = PasswordHasher(rounds=args.rounds, max_workers=args.workers)
+
+    async def verify_pooled():
+        return await hasher.verify(password, stored)
+
+    results = [
+        await run_mode("inline", verify_inline, args.logins, args.concurrency),
+        await run_mode(f"pooled({args.workers} workers)", verify_pooled, args.logins, args.concurrency),
+    ]
+    hasher.shutdown()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"bcrypt rounds={args.rounds}, {args.logins} logins, concurrency={args.concurrency}")
+    for result in results:
+        print(
+            f"{result['mode']:<22} {result['logins_per_second']:>7} logins/s  "
+            f"p50 {result['login_p50_ms']:>7} ms  p95 {result['login_p95_ms']:>7} ms  "
+            f"loop lag max {result['loop_lag_max_ms']:>7} ms"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,328 @@
+"""Bulk notification campaigns sent through the provider's batch API.
+
+Recipients are streamed from a MongoDB cursor, rendered from templates that
+are compiled once per campaign, and sent in chunks (Resend accepts up to 100
+messages per batch call). Requests are paced to stay under the provider's
+rate limit and progress is recorded on the campaign document after every chunk.
+
+Campaigns survive restarts:
+
+- The templates are stored on the campaign document, and recipient lists
+  come from a source registered per campaign kind. A source yields
+  recipients in ``_id`` order, starting after a given ``_id``.
+- The ``_id`` of the last recipient of each finished chunk is saved as the
+  campaign's ``cursor`` in the same update that counts the chunk.
+- Every runner heartbeats the campaigns it is sending. A ``running``
+  campaign whose heartbeat stopped belonged to a process that died; it is
+  marked ``interrupted``, and ``resume()`` carries on after its cursor.
+- Each batch carries an idempotency key derived from its recipients. A
+  chunk sent again after a crash, before its cursor was saved, is not
+  delivered twice as long as the provider still remembers the key (24 hours
+  for Resend).
+
+429s wait for the provider's Retry-After. Other errors are retried with
+exponential backoff unless the sender raises ``PermanentBatchError``.
+"""
+import asyncio
+import datetime
+import hashlib
+import html
+import logging
+import random
+import string
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 100
+
+# (campaign meta, _id to start after or None) -> recipients with _id, email and name, in _id order
+RecipientSource = Callable[[Dict[str, Any], Any], AsyncIterator[Dict[str, Any]]]
+
+
+class RateLimitedError(Exception):
+    """Raised by a batch sender when the provider answered 429"""
+
+    def __init__(self, message: str, retry_after: float = 1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class PermanentBatchError(Exception):
+    """Raised by a batch sender when retrying the batch can never succeed"""
+
+
+class CampaignNotResumable(Exception):
+    pass
+
+
+class CampaignTemplate:
+    """Subject/html/text templates compiled once and filled per recipient"""
+
+    def __init__(self, sender: str, reply_to: str, subject: str, html_body: str, text_body: str):
+        self.sender = sender
+        self.reply_to = reply_to
+        self.subject = string.Template(subject)
+        self.html_body = string.Template(html_body)
+        self.text_body = string.Template(text_body)
+
+    def render(self, recipient: Dict[str, Any]) -> Dict[str, Any]:
+        name = recipient.get("name") or "there"
+        text_values = {"name": name}
+        html_values = {"name": html.escape(name)}
+        return {
+            "from": self.sender,
+            "to": [recipient["email"]],
+            "subject": self.subject.safe_substitute(text_values),
+            "html": self.html_body.safe_substitute(html_values),
+            "text": self.text_body.safe_substitute(text_values),
+            "reply_to": self.reply_to,
+        }
+
+    def to_doc(self) -> Dict[str, str]:
+        return {
+            "sender": self.sender,
+            "reply_to": self.reply_to,
+            "subject": self.subject.template,
+            "html_body": self.html_body.template,
+            "text_body": self.text_body.template,
+        }
+
+    @classmethod
+    def from_doc(cls, doc: Dict[str, str]) -> "CampaignTemplate":
+        return cls(doc["sender"], doc["reply_to"], doc["subject"], doc["html_body"], doc["text_body"])
+
+
+def idempotency_key(campaign_id: ObjectId, recipient_ids: List[Any]) -> str:
+    """Same campaign and same recipients -> same key, however often the chunk is retried or resumed"""
+    digest = hashlib.sha256("\n".join(str(recipient_id) for recipient_id in recipient_ids).encode("utf-8"))
+    return f"campaign-{campaign_id}-{digest.hexdigest()[:32]}"
+
+
+class CampaignRunner:
+    """Runs campaigns in the background and tracks their progress"""
+
+    def __init__(
+        self,
+        collection,
+        send_batch: Callable[[List[Dict[str, Any]], str], Awaitable[Any]],
+        batch_size: int = MAX_BATCH_SIZE,
+        requests_per_second: float = 2.0,
+        max_rate_limit_retries: int = 5,
+        max_retries: int = 5,
+        base_delay: float = 2.0,
+        max_delay: float = 60.0,
+        heartbeat_interval: float = 30.0,
+        stale_after: float = 120.0,
+    ):
+        self.collection = collection
+        # (messages, idempotency key) -> provider response
+        self.send_batch = send_batch
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.min_interval = 1.0 / requests_per_second
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.heartbeat_interval = heartbeat_interval
+        self.stale_after = datetime.timedelta(seconds=stale_after)
+        self.owner = uuid.uuid4().hex[:12]
+        self._sources: Dict[str, RecipientSource] = {}
+        self._next_slot = 0.0
+        self._pace_lock = asyncio.Lock()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def register_source(self, kind: str, source: RecipientSource):
+        self._sources[kind] = source
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("status", 1), ("heartbeat_at", 1)])
+
+    async def start(
+        self,
+        kind: str,
+        total: int,
+        template: CampaignTemplate,
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Create the campaign document and start sending in the background"""
+        if kind not in self._sources:
+            raise ValueError(f"No recipient source registered for {kind!r} campaigns")
+        now = datetime.datetime.utcnow()
+        result = await self.collection.insert_one({
+            "kind": kind,
+            "meta": meta or {},
+            "subject": template.subject.safe_substitute(),
+            "template": template.to_doc(),
+            "status": "running",
+            "total": total,
+            "sent": 0,
+            "failed": 0,
+            "cursor": None,
+            "errors": [],
+            "owner": self.owner,
+            "heartbeat_at": now,
+            "created_at": now,
+            "finished_at": None,
+        })
+        self._launch(result.inserted_id, kind, meta or {}, None, template)
+        return str(result.inserted_id)
+
+    async def resume(self, campaign_id: str) -> Dict[str, Any]:
+        """Carry on an interrupted or failed campaign after the last chunk it finished"""
+        campaign = await self.collection.find_one_and_update(
+            {"_id": ObjectId(campaign_id), "status": {"$in": ["interrupted", "failed"]}},
+            {"$set": {
+                "status": "running",
+                "owner": self.owner,
+                "heartbeat_at": datetime.datetime.utcnow(),
+                "finished_at": None,
+            }},
+            return_document=ReturnDocument.AFTER,
+        )
+        if campaign is None:
+            raise CampaignNotResumable("Only interrupted or failed campaigns can be resumed")
+        logger.info(f"Resuming campaign {campaign_id} after {campaign['sent'] + campaign['failed']} recipients")
+        self._launch(
+            campaign["_id"], campaign["kind"], campaign["meta"], campaign.get("cursor"),
+            CampaignTemplate.from_doc(campaign["template"])
+        )
+        return campaign
+
+    def _launch(self, campaign_id: ObjectId, kind: str, meta: Dict[str, Any], after: Any, template: CampaignTemplate):
+        recipients = self._sources[kind](meta, after)
+        task = asyncio.create_task(self._run(campaign_id, recipients, template))
+        key = str(campaign_id)
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+
+    async def get(self, campaign_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": ObjectId(campaign_id)})
+
+    async def mark_stale(self) -> int:
+        """Mark running campaigns whose runner stopped heartbeating as interrupted"""
+        now = datetime.datetime.utcnow()
+        result = await self.collection.update_many(
+            {"status": "running", "heartbeat_at": {"$lt": now - self.stale_after}},
+            {"$set": {"status": "interrupted", "finished_at": now}}
+        )
+        if result.modified_count:
+            logger.warning(f"Marked {result.modified_count} campaign(s) of a stopped process as interrupted")
+        return result.modified_count
+
+    async def _heartbeat_forever(self):
+        while True:
+            try:
+                if self._tasks:
+                    await self.collection.update_many(
+                        {"_id": {"$in": [ObjectId(key) for key in self._tasks]}, "owner": self.owner},
+                        {"$set": {"heartbeat_at": datetime.datetime.utcnow()}}
+                    )
+                await self.mark_stale()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Campaign heartbeat failed: {e}")
+            await asyncio.sleep(self.heartbeat_interval)
+
+    def start_heartbeat(self):
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_forever())
+
+    async def _pace(self, not_before: float = 0.0):
+        # Reserve the next request slot; shared by all campaigns on this instance
+        async with self._pace_lock:
+            now = time.monotonic()
+            self._next_slot = max(self._next_slot, not_before)
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _send_chunk(self, campaign_id: ObjectId, chunk: List[Dict[str, Any]], key: str):
+        rate_limited = failures = 0
+        not_before = 0.0
+        while True:
+            await self._pace(not_before)
+            try:
+                await self.send_batch(chunk, key)
+                return
+            except PermanentBatchError:
+                raise
+            except RateLimitedError as e:
+                if rate_limited == self.max_rate_limit_retries:
+                    raise
+                rate_limited += 1
+                delay = e.retry_after
+                logger.warning(f"Campaign {campaign_id} rate limited, waiting {delay:.1f}s")
+            except Exception as e:
+                # 5xx, timeouts and an open circuit usually clear up
+                if failures == self.max_retries:
+                    raise
+                delay = self._backoff(failures)
+                failures += 1
+                logger.warning(f"Campaign {campaign_id} batch failed, retrying in {delay:.1f}s: {e}")
+            # Push every later request back too, not just this one
+            not_before = time.monotonic() + delay
+
+    async def _run(self, campaign_id: ObjectId, recipients: AsyncIterator[Dict[str, Any]], template: CampaignTemplate):
+        status = "completed"
+        try:
+            chunk: List[Dict[str, Any]] = []
+            async for recipient in recipients:
+                if not recipient.get("email"):
+                    continue
+                chunk.append(recipient)
+                if len(chunk) >= self.batch_size:
+                    await self._send_chunk_or_record(campaign_id, chunk, template)
+                    chunk = []
+            if chunk:
+                await self._send_chunk_or_record(campaign_id, chunk, template)
+        except asyncio.CancelledError:
+            status = "interrupted"
+            raise
+        except Exception as e:
+            logger.error(f"Campaign {campaign_id} failed: {e}")
+            status = "failed"
+            await self.collection.update_one({"_id": campaign_id}, {"$push": {"errors": str(e)}})
+        finally:
+            await self.collection.update_one(
+                {"_id": campaign_id},
+                {"$set": {"status": status, "finished_at": datetime.datetime.utcnow()}}
+            )
+
+    async def _send_chunk_or_record(
+        self, campaign_id: ObjectId, recipients: List[Dict[str, Any]], template: CampaignTemplate
+    ):
+        recipient_ids = [recipient["_id"] for recipient in recipients]
+        chunk = [template.render(recipient) for recipient in recipients]
+        update: Dict[str, Any]
+        try:
+            await self._send_chunk(campaign_id, chunk, idempotency_key(campaign_id, recipient_ids))
+            update = {"$inc": {"sent": len(chunk)}}
+        except Exception as e:
+            # One bad chunk should not stop the rest of the campaign
+            logger.error(f"Campaign {campaign_id} chunk of {len(chunk)} failed: {e}")
+            update = {"$inc": {"failed": len(chunk)}, "$push": {"errors": {"$each": [str(e)], "$slice": -20}}}
+        # Counted and checkpointed together, so a resume neither skips nor recounts the chunk
+        update["$set"] = {"cursor": recipient_ids[-1], "heartbeat_at": datetime.datetime.utcnow()}
+        await self.collection.update_one({"_id": campaign_id}, update)
+
+    async def stop(self):
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+            self._heartbeat_task = None
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
@@ -0,0 +1,134 @@
+"""gzip/Brotli negotiation and a compressing ASGI middleware for JSON responses.
+
+Brotli is used when the ``brotli`` package is installed and the client
+accepts it, otherwise gzip. Responses below ``minimum_size``, responses
+that already carry a Content-Encoding (e.g. precompressed public content)
+and streamed responses are passed through untouched.
+"""
+import asyncio
+import gzip
+from typing import Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # optional; gzip only
+    brotli = None
+
+BROTLI_AVAILABLE = brotli is not None
+# Compressed on a worker thread above this size so large lists do not stall the loop
+INLINE_COMPRESS_LIMIT = 256 * 1024
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick "br" or "gzip" from an Accept-Encoding header, or None for identity"""
+    offered = {}
+    for item in accept_encoding.lower().split(","):
+        token, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if token:
+            offered[token] = quality
+    wildcard = offered.get("*", 0.0)
+    candidates = ["br", "gzip"] if BROTLI_AVAILABLE else ["gzip"]
+    best, best_quality = None, 0.0
+    for encoding in candidates:
+        quality = offered.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    # mtime=0 keeps the output byte-identical for the same input
+    return gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+
+async def compress_async(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    # zlib and brotli release the GIL while compressing
+    if len(body) > INLINE_COMPRESS_LIMIT:
+        return await asyncio.to_thread(compress, body, encoding, gzip_level, brotli_quality)
+    return compress(body, encoding, gzip_level, brotli_quality)
+
+
+def _header(headers, name: bytes) -> Optional[bytes]:
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware compressing complete JSON response bodies"""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        media_types: Tuple[str, ...] = ("application/json",)
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.media_types = media_types
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = _header(scope["headers"], b"accept-encoding")
+        encoding = negotiate_encoding(accept.decode("latin-1")) if accept else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if message["type"] == "http.response.start":
+                headers = message.get("headers", [])
+                content_type = (_header(headers, b"content-type") or b"").decode("latin-1")
+                if _header(headers, b"content-encoding") is not None or not content_type.startswith(self.media_types):
+                    passthrough = True
+                    await send(message)
+                else:
+                    # Held back until we know the body size
+                    start_message = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            if message.get("more_body", False) or len(body) < self.minimum_size:
+                # Streamed or small: send as is
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            compressed = await compress_async(body, encoding, self.gzip_level, self.brotli_quality)
+            original = start_message.get("headers", [])
+            vary = _header(original, b"vary")
+            headers = [(key, value) for key, value in original if key.lower() not in (b"content-length", b"vary")]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"),
+            ]
+            await send({**start_message, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
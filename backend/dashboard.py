@@ -0,0 +1,176 @@
+"""Admin dashboard statistics from one ``$facet`` aggregation per collection.
+
+Each collection is scanned once. A ``$project`` ahead of the ``$facet``
+drops everything but the few fields the dashboard shows, so resumes and
+gallery images never enter the pipeline. The archive collections hold the
+older solved/flagged inquiries and decided applications, so their counts
+are added to the totals. The combined result is cached for a few seconds
+because the dashboard polls it on every visit.
+"""
+import asyncio
+import datetime
+import time
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+INQUIRY_STATE = {
+    "$cond": [
+        {"$eq": ["$is_flagged", True]}, "flagged",
+        {"$cond": [{"$eq": ["$is_solved", True]}, "solved", "open"]}
+    ]
+}
+# What the admin inquiry list shows as active
+UNSOLVED_FACET = [{"$match": {"is_solved": False}}, {"$count": "count"}]
+
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: _serialize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_serialize(item) for item in value]
+    return value
+
+
+def _counts(groups: List[Dict[str, Any]], missing: str = "unspecified") -> Dict[str, int]:
+    return {(group["_id"] if group["_id"] is not None else missing): group["count"] for group in groups}
+
+
+def _total(facet: List[Dict[str, Any]]) -> int:
+    return facet[0]["count"] if facet else 0
+
+
+class DashboardStats:
+    def __init__(
+        self,
+        contacts,
+        contacts_archive,
+        applications,
+        applications_archive,
+        events,
+        ttl: float = 15.0,
+        recent_limit: int = 5
+    ):
+        self.contacts = contacts
+        self.contacts_archive = contacts_archive
+        self.applications = applications
+        self.applications_archive = applications_archive
+        self.events = events
+        self.ttl = ttl
+        self.recent_limit = recent_limit
+        self._cached: Optional[Dict[str, Any]] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _facet(self, collection, projection: Dict[str, Any], facets: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        pipeline = [{"$project": projection}, {"$facet": facets}]
+        result = await collection.aggregate(pipeline).to_list(length=1)
+        return result[0] if result else {name: [] for name in facets}
+
+    async def _inquiries(self, since: datetime.datetime) -> Dict[str, Any]:
+        projection = {"name": 1, "subject": 1, "created_at": 1, "is_solved": 1, "is_flagged": 1, "spam_score": 1}
+        hot, archived = await asyncio.gather(
+            self._facet(self.contacts, projection, {
+                "total": [{"$count": "count"}],
+                "by_state": [{"$group": {"_id": INQUIRY_STATE, "count": {"$sum": 1}}}],
+                "unsolved": UNSOLVED_FACET,
+                "last_7_days": [{"$match": {"created_at": {"$gte": since}}}, {"$count": "count"}],
+                "recent": [{"$sort": {"created_at": -1}}, {"$limit": self.recent_limit}],
+            }),
+            self._facet(self.contacts_archive, {"is_solved": 1, "is_flagged": 1}, {
+                "total": [{"$count": "count"}],
+                "by_state": [{"$group": {"_id": INQUIRY_STATE, "count": {"$sum": 1}}}],
+                "unsolved": UNSOLVED_FACET,
+            })
+        )
+        states = {"open": 0, "solved": 0, "flagged": 0}
+        for facet in (hot, archived):
+            for state, count in _counts(facet["by_state"]).items():
+                states[state] = states.get(state, 0) + count
+        return {
+            "total": _total(hot["total"]) + _total(archived["total"]),
+            # open/solved/flagged partition the inquiries, so "open" leaves flagged ones
+            # out; "unsolved" counts every is_solved=false inquiry, flagged or not
+            **states,
+            "unsolved": _total(hot["unsolved"]) + _total(archived["unsolved"]),
+            "archived": _total(archived["total"]),
+            "last_7_days": _total(hot["last_7_days"]),
+            "recent": _serialize(hot["recent"]),
+        }
+
+    async def _applications(self) -> Dict[str, Any]:
+        projection = {"name": 1, "jobId": 1, "status": 1, "appliedDate": 1}
+        facets = {
+            "total": [{"$count": "count"}],
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+        }
+        hot, archived = await asyncio.gather(
+            # appliedDate is a client-supplied string, so the ObjectId gives the order
+            self._facet(self.applications, projection, {
+                **facets, "recent": [{"$sort": {"_id": -1}}, {"$limit": self.recent_limit}]
+            }),
+            self._facet(self.applications_archive, {"status": 1}, facets)
+        )
+        by_status: Dict[str, int] = {}
+        for facet in (hot, archived):
+            for status, count in _counts(facet["by_status"]).items():
+                by_status[status] = by_status.get(status, 0) + count
+        return {
+            "total": _total(hot["total"]) + _total(archived["total"]),
+            "by_status": by_status,
+            "archived": _total(archived["total"]),
+            "recent": _serialize(hot["recent"]),
+        }
+
+    async def _events(self, now: datetime.datetime) -> Dict[str, Any]:
+        projection = {"title": 1, "date": 1, "time": 1, "location": 1, "status": 1, "category": 1, "type": 1, "starts_at": 1}
+        facet = await self._facet(self.events, projection, {
+            "total": [{"$count": "count"}],
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "by_category": [
+                {"$match": {"category": {"$exists": True}}},
+                {"$group": {"_id": "$category", "count": {"$sum": 1}}}
+            ],
+            "by_type": [{"$group": {"_id": "$type", "count": {"$sum": 1}}}],
+            "upcoming": [
+                {"$match": {"starts_at": {"$gte": now}}},
+                {"$sort": {"starts_at": 1}},
+                {"$limit": self.recent_limit}
+            ],
+        })
+        return {
+            "total": _total(facet["total"]),
+            "by_status": _counts(facet["by_status"]),
+            "by_category": _counts(facet["by_category"]),
+            # Events without a type are regular (non-gallery) events
+            "by_type": _counts(facet["by_type"], missing="event"),
+            "upcoming": _serialize(facet["upcoming"]),
+        }
+
+    async def compute(self) -> Dict[str, Any]:
+        now = datetime.datetime.utcnow()
+        inquiries, applications, events = await asyncio.gather(
+            self._inquiries(now - datetime.timedelta(days=7)),
+            self._applications(),
+            self._events(now)
+        )
+        return {
+            "generated_at": now.isoformat(),
+            "inquiries": inquiries,
+            "applications": applications,
+            "events": events,
+        }
+
+    async def get(self) -> Dict[str, Any]:
+        if self._cached is not None and time.monotonic() < self._expires_at:
+            return self._cached
+        # One aggregation run at a time; concurrent callers reuse its result
+        async with self._lock:
+            if self._cached is None or time.monotonic() >= self._expires_at:
+                self._cached = await self.compute()
+                self._expires_at = time.monotonic() + self.ttl
+        return self._cached
@@ -0,0 +1,221 @@
+"""Persistent email outbox with an async dispatcher.
+
+Handlers enqueue a fully rendered message and return immediately. A pool of
+worker coroutines claims due messages with an atomic ``find_one_and_update``
+lease, sends them with bounded concurrency, retries failures with exponential
+backoff and dead-letters messages that keep failing.
+
+Delivery is at-least-once. Each send is cut off after ``send_timeout`` and
+the lease must be at least twice as long, so a message is only
+reclaimed once its worker has certainly given up on it or died. A worker
+that dies after the provider accepted the message but before recording
+it, or a send that times out after the provider already accepted it,
+still gets the message sent again.
+
+Sent messages lose their rendered body (``params.html``/``params.text``),
+which can hold one-time codes, and TTL indexes remove sent and
+dead-lettered messages ``retention_days`` after they finished. Dead
+messages keep their body until then so they can still be retried.
+
+``RESEND_API_URL`` can point the transport at ``fake_resend.py`` to run the
+outbox against a local stand-in.
+"""
+import asyncio
+import datetime
+import logging
+import random
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEX_OPTIONS_CONFLICT_ERRORS = (85, 86)
+
+
+class PermanentEmailError(Exception):
+    """Raised by a sender when retrying the message can never succeed"""
+
+
+class EmailOutbox:
+    """Outbox collection plus the dispatcher that drains it"""
+
+    def __init__(
+        self,
+        collection,
+        send: Callable[[Dict[str, Any]], Awaitable[Optional[str]]],
+        concurrency: int = 4,
+        max_attempts: int = 6,
+        base_delay: float = 5.0,
+        max_delay: float = 900.0,
+        send_timeout: float = 60.0,
+        lease_seconds: float = 600.0,
+        poll_interval: float = 5.0,
+        retention_days: int = 30,
+    ):
+        if lease_seconds < 2 * send_timeout:
+            raise ValueError("lease_seconds must be at least twice send_timeout")
+        self.collection = collection
+        self.send = send
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.send_timeout = send_timeout
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.retention = datetime.timedelta(days=retention_days)
+        self._wake = asyncio.Event()
+        self._workers: List[asyncio.Task] = []
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("status", 1), ("next_attempt_at", 1)])
+        # Each TTL index only sees documents that have its field
+        expire_after = int(self.retention.total_seconds())
+        for field in ("sent_at", "failed_at"):
+            name = f"{field}_ttl"
+            try:
+                await self.collection.create_index(field, name=name, expireAfterSeconds=expire_after)
+            except OperationFailure as e:
+                if e.code not in INDEX_OPTIONS_CONFLICT_ERRORS:
+                    raise
+                # Retention changed since the index was built - update it in place
+                await self.collection.database.command(
+                    "collMod",
+                    self.collection.name,
+                    index={"name": name, "expireAfterSeconds": expire_after}
+                )
+
+    async def enqueue(self, params: Dict[str, Any], kind: str = "") -> str:
+        """Store a rendered message for delivery and wake the dispatcher"""
+        now = datetime.datetime.utcnow()
+        result = await self.collection.insert_one({
+            "kind": kind,
+            "params": params,
+            "status": "pending",
+            "attempts": 0,
+            "next_attempt_at": now,
+            "created_at": now,
+            "last_error": None,
+        })
+        self._wake.set()
+        return str(result.inserted_id)
+
+    async def retry(self, message_id: str) -> bool:
+        """Move a dead-lettered message back into the queue"""
+        result = await self.collection.update_one(
+            {"_id": ObjectId(message_id), "status": "dead"},
+            {
+                "$set": {
+                    "status": "pending",
+                    "attempts": 0,
+                    "next_attempt_at": datetime.datetime.utcnow(),
+                },
+                # Otherwise the TTL index would delete it while it is queued again
+                "$unset": {"failed_at": ""},
+            }
+        )
+        if result.modified_count:
+            self._wake.set()
+        return result.modified_count > 0
+
+    async def stats(self) -> Dict[str, int]:
+        """Number of messages per status"""
+        counts = {"pending": 0, "sending": 0, "sent": 0, "dead": 0}
+        async for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            counts[row["_id"]] = row["count"]
+        return counts
+
+    async def _claim(self) -> Optional[Dict[str, Any]]:
+        # A "sending" message whose lease ran out belonged to a worker that died: the
+        # lease outlasts send_timeout, so a live worker has recorded its outcome by then
+        now = datetime.datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"status": {"$in": ["pending", "sending"]}, "next_attempt_at": {"$lte": now}},
+            {
+                "$set": {
+                    "status": "sending",
+                    "next_attempt_at": now + datetime.timedelta(seconds=self.lease_seconds),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        return delay * random.uniform(0.5, 1.5)
+
+    async def _deliver(self, message: Dict[str, Any]):
+        now = datetime.datetime.utcnow()
+        try:
+            provider_id = await asyncio.wait_for(self.send(message["params"]), self.send_timeout)
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                error = f"send took longer than {self.send_timeout:g}s"
+            else:
+                error = str(e)
+            permanent = isinstance(e, PermanentEmailError)
+            if permanent or message["attempts"] >= self.max_attempts:
+                logger.error(f"Email {message['_id']} ({message.get('kind')}) dead-lettered: {error}")
+                update = {"status": "dead", "last_error": error, "failed_at": now}
+            else:
+                delay = self._backoff(message["attempts"])
+                logger.warning(f"Email {message['_id']} attempt {message['attempts']} failed, retrying in {delay:.0f}s: {error}")
+                update = {
+                    "status": "pending",
+                    "last_error": error,
+                    "next_attempt_at": now + datetime.timedelta(seconds=delay),
+                }
+            await self.collection.update_one({"_id": message["_id"]}, {"$set": update})
+            return
+
+        await self.collection.update_one(
+            {"_id": message["_id"]},
+            {
+                "$set": {"status": "sent", "sent_at": now, "provider_id": provider_id, "last_error": None},
+                # The body is no longer needed and may hold a verification code
+                "$unset": {"params.html": "", "params.text": ""},
+            }
+        )
+
+    async def _worker(self):
+        while True:
+            # Cleared before claiming, so an enqueue racing the claim still wakes us
+            self._wake.clear()
+            try:
+                message = await self._claim()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Email outbox claim failed: {e}")
+                await asyncio.sleep(self.poll_interval)
+                continue
+
+            if message is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._deliver(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The lease expires and another worker picks the message up again
+                logger.error(f"Email outbox delivery bookkeeping failed: {e}")
+
+    def start(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
@@ -0,0 +1,87 @@
+"""Local stand-in for the Resend API, for tests and load runs.
+
+Accepts ``POST /emails`` and ``POST /emails/batch`` like Resend does and keeps
+every message in memory instead of delivering it. ``GET /emails`` lists what
+was received and ``DELETE /emails`` clears it. A repeated
+``Idempotency-Key`` gets the first response back without storing the
+messages again.
+
+Failures can be injected to exercise retries and the circuit breaker:
+
+- ``FAKE_RESEND_FAIL_RATE``: fraction of requests answered with an error (default 0)
+- ``FAKE_RESEND_FAIL_STATUS``: status code of those errors (default 503; 429 adds Retry-After)
+- ``FAKE_RESEND_LATENCY_MS``: delay before every response (default 0)
+
+Run it next to the app:
+
+    uvicorn fake_resend:app --port 8025
+    RESEND_API_URL=http://127.0.0.1:8025 uvicorn app:app --port 8000
+"""
+import asyncio
+import os
+import random
+import uuid
+from typing import Any, Dict, List, Optional
+
+from fastapi import Body, FastAPI, Header
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake Resend")
+
+FAIL_RATE = float(os.getenv("FAKE_RESEND_FAIL_RATE", "0"))
+FAIL_STATUS = int(os.getenv("FAKE_RESEND_FAIL_STATUS", "503"))
+LATENCY = float(os.getenv("FAKE_RESEND_LATENCY_MS", "0")) / 1000
+
+# Every accepted message, in arrival order, with the id handed back for it
+received: List[Dict[str, Any]] = []
+# Idempotency-Key -> response body
+responses: Dict[str, Any] = {}
+
+
+def _accept(params: Dict[str, Any]) -> Dict[str, str]:
+    email_id = str(uuid.uuid4())
+    received.append({"id": email_id, **params})
+    return {"id": email_id}
+
+
+async def _handle(payload: Any, idempotency_key: Optional[str], batch: bool):
+    if LATENCY:
+        await asyncio.sleep(LATENCY)
+    if idempotency_key and idempotency_key in responses:
+        return responses[idempotency_key]
+    if FAIL_RATE and random.random() < FAIL_RATE:
+        headers = {"Retry-After": "1"} if FAIL_STATUS == 429 else None
+        return JSONResponse({"message": "Injected failure"}, status_code=FAIL_STATUS, headers=headers)
+    if batch:
+        if not isinstance(payload, list) or not 0 < len(payload) <= 100:
+            return JSONResponse({"message": "A batch holds 1 to 100 emails"}, status_code=422)
+        body: Any = {"data": [_accept(params) for params in payload]}
+    else:
+        if not isinstance(payload, dict) or not payload.get("to"):
+            return JSONResponse({"message": "Missing `to` field"}, status_code=422)
+        body = _accept(payload)
+    if idempotency_key:
+        responses[idempotency_key] = body
+    return body
+
+
+@app.post("/emails")
+async def send_email(payload: Any = Body(...), idempotency_key: Optional[str] = Header(None)):
+    return await _handle(payload, idempotency_key, batch=False)
+
+
+@app.post("/emails/batch")
+async def send_batch(payload: Any = Body(...), idempotency_key: Optional[str] = Header(None)):
+    return await _handle(payload, idempotency_key, batch=True)
+
+
+@app.get("/emails")
+async def list_emails():
+    return {"count": len(received), "data": received}
+
+
+@app.delete("/emails")
+async def clear_emails():
+    received.clear()
+    responses.clear()
+    return {"count": 0}
@@ -0,0 +1,298 @@
+"""Bulk gallery imports from a ZIP archive.
+
+The upload is spooled to a temporary file and the archive is read from
+there one member at a time, so memory holds at most ``concurrency`` photos
+at once, never the whole ZIP. Images go through the regular compressor on
+the image worker pool, a few at a time so interactive uploads still get a
+worker. The finished gallery event is inserted with a single write.
+
+An optional ``manifest.json`` at the top of the archive supplies the event
+fields (title, date, category, details, description, location, attendees);
+form fields override it. Photos are added in file-name order and the first
+one is the thumbnail.
+
+Progress is recorded on a document in the imports collection, like bulk
+campaigns, so any worker can answer a status poll.
+"""
+import asyncio
+import base64
+import datetime
+import json
+import logging
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import bson
+from bson import ObjectId
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FIELDS = ("title", "description", "date", "location", "attendees", "category", "details")
+COPY_CHUNK_SIZE = 1024 * 1024
+# MongoDB rejects documents over 16MB; leave room for the fields added on insert
+MAX_EVENT_BYTES = 15 * 1024 * 1024
+# Base64 turns every 3 bytes into 4
+BASE64_OVERHEAD = 4 / 3
+# Text fields, the placeholders (a few hundred bytes per image) and BSON framing
+EVENT_FIELDS_ALLOWANCE = 256 * 1024
+PER_IMAGE_ALLOWANCE = 1024
+NATURAL_SORT = re.compile(r"(\d+)")
+
+
+class InvalidGalleryImport(ValueError):
+    pass
+
+
+def _natural_key(name: str) -> List[Any]:
+    """IMG_2.jpg before IMG_10.jpg"""
+    return [int(part) if part.isdigit() else part.lower() for part in NATURAL_SORT.split(name)]
+
+
+def _is_hidden(name: str) -> bool:
+    # macOS zips carry __MACOSX/ resource forks and ._ files next to every photo
+    return any(part.startswith((".", "__MACOSX")) for part in name.split("/"))
+
+
+class GalleryImportPlan:
+    """A validated archive waiting to be processed; owns the spooled file"""
+
+    def __init__(self, path: str, members: List[zipfile.ZipInfo], fields: Dict[str, Any]):
+        self.path = path
+        self.members = members
+        self.fields = fields
+
+    def discard(self):
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class GalleryImporter:
+    """Validates gallery archives and imports them in the background"""
+
+    def __init__(
+        self,
+        collection,
+        image_pool,
+        compress: Callable[[bytes, int], Tuple[bytes, Dict[str, Any]]],
+        validate: Callable[[bytes], Tuple[bool, str]],
+        is_image_name: Callable[[str], bool],
+        max_images: int = 200,
+        max_image_bytes: int = 50 * 1024 * 1024,
+        max_archive_bytes: int = 1024 * 1024 * 1024,
+        max_image_target: int = 5 * 1024 * 1024,
+        concurrency: int = 2,
+    ):
+        self.collection = collection
+        self.image_pool = image_pool
+        # (image bytes, target size) -> (jpeg bytes, metadata)
+        self.compress = compress
+        # image bytes -> (is valid, message)
+        self.validate = validate
+        self.is_image_name = is_image_name
+        self.max_images = max_images
+        self.max_image_bytes = max_image_bytes
+        self.max_archive_bytes = max_archive_bytes
+        self.max_image_target = max_image_target
+        self.concurrency = concurrency
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def _spool(self, source) -> str:
+        """Copy the upload to a file of our own; the request's copy is closed when it returns"""
+        fd, path = tempfile.mkstemp(prefix="gallery-import-", suffix=".zip")
+        try:
+            with os.fdopen(fd, "wb") as target:
+                copied = 0
+                while True:
+                    chunk = source.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    copied += len(chunk)
+                    if copied > self.max_archive_bytes:
+                        raise InvalidGalleryImport(
+                            f"Archive too large. Maximum size is {self.max_archive_bytes // (1024 * 1024)}MB"
+                        )
+                    target.write(chunk)
+            return path
+        except BaseException:
+            os.unlink(path)
+            raise
+
+    def _read_plan(self, path: str, overrides: Dict[str, Any]) -> GalleryImportPlan:
+        try:
+            archive = zipfile.ZipFile(path)
+        except zipfile.BadZipFile:
+            raise InvalidGalleryImport("File is not a valid ZIP archive")
+
+        with archive:
+            fields: Dict[str, Any] = {}
+            members = []
+            for info in archive.infolist():
+                name = info.filename
+                if info.is_dir() or _is_hidden(name):
+                    continue
+                if name == MANIFEST_NAME:
+                    try:
+                        manifest = json.loads(archive.read(info))
+                    except (ValueError, UnicodeDecodeError) as e:
+                        raise InvalidGalleryImport(f"{MANIFEST_NAME} is not valid JSON: {e}")
+                    if not isinstance(manifest, dict):
+                        raise InvalidGalleryImport(f"{MANIFEST_NAME} must be a JSON object")
+                    fields = {key: manifest[key] for key in MANIFEST_FIELDS if key in manifest}
+                    continue
+                if not self.is_image_name(name):
+                    continue
+                if info.file_size > self.max_image_bytes:
+                    raise InvalidGalleryImport(
+                        f"{name} is too large. Maximum size is {self.max_image_bytes // (1024 * 1024)}MB"
+                    )
+                members.append(info)
+
+        if not members:
+            raise InvalidGalleryImport("The archive contains no images")
+        if len(members) > self.max_images:
+            raise InvalidGalleryImport(f"Too many images ({len(members)}). Maximum is {self.max_images}")
+
+        fields.update({key: value for key, value in overrides.items() if value is not None})
+        if not fields.get("title") or not fields.get("date"):
+            raise InvalidGalleryImport(f"A title and date are required, as form fields or in {MANIFEST_NAME}")
+        members.sort(key=lambda info: _natural_key(info.filename))
+        return GalleryImportPlan(path, members, fields)
+
+    async def prepare(self, upload, overrides: Dict[str, Any]) -> GalleryImportPlan:
+        """Spool the upload and check it is a usable archive before accepting the import"""
+        def build():
+            path = self._spool(upload)
+            try:
+                return self._read_plan(path, overrides)
+            except BaseException:
+                os.unlink(path)
+                raise
+
+        return await asyncio.to_thread(build)
+
+    async def start(
+        self,
+        plan: GalleryImportPlan,
+        create_event: Callable[[Dict[str, Any]], Awaitable[str]],
+        meta: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        """Record the import and process it in the background; ``create_event`` inserts the gallery event"""
+        result = await self.collection.insert_one({
+            "status": "running",
+            "title": plan.fields["title"],
+            "meta": meta or {},
+            "total": len(plan.members),
+            "processed": 0,
+            "failed": 0,
+            "errors": [],
+            "event_id": None,
+            "created_at": datetime.datetime.utcnow(),
+            "finished_at": None,
+        })
+        import_id = str(result.inserted_id)
+        task = asyncio.create_task(self._run(result.inserted_id, plan, create_event))
+        self._tasks[import_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(import_id, None))
+        return import_id
+
+    async def get(self, import_id: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": ObjectId(import_id)})
+
+    def _process_member(self, archive: zipfile.ZipFile, info: zipfile.ZipInfo, target_size: int):
+        # ZipFile serialises reads of the shared file, so workers can open members concurrently
+        with archive.open(info) as member:
+            # The header's size can lie (zip bombs); never read more than the limit
+            image_bytes = member.read(self.max_image_bytes + 1)
+        if len(image_bytes) > self.max_image_bytes:
+            raise ValueError("image larger than the size limit once extracted")
+        is_valid, message = self.validate(image_bytes)
+        if not is_valid:
+            raise ValueError(message)
+        jpeg_bytes, metadata = self.compress(image_bytes, target_size)
+        return jpeg_bytes, len(image_bytes), metadata
+
+    async def _run(
+        self,
+        import_id: ObjectId,
+        plan: GalleryImportPlan,
+        create_event: Callable[[Dict[str, Any]], Awaitable[str]],
+    ):
+        status = "completed"
+        update: Dict[str, Any] = {}
+        try:
+            archive = await asyncio.to_thread(zipfile.ZipFile, plan.path)
+            # Split the event's size budget across the photos, plus the thumbnail's second copy
+            copies = len(plan.members) + 1
+            budget = MAX_EVENT_BYTES - EVENT_FIELDS_ALLOWANCE - PER_IMAGE_ALLOWANCE * copies
+            target_size = min(self.max_image_target, int(budget / BASE64_OVERHEAD / copies))
+            images: List[Optional[str]] = [None] * len(plan.members)
+            placeholders: List[Optional[Dict[str, Any]]] = [None] * len(plan.members)
+            slots = asyncio.Semaphore(self.concurrency)
+
+            async def process(index: int, info: zipfile.ZipInfo):
+                name = posixpath.basename(info.filename)
+                async with slots:
+                    try:
+                        jpeg_bytes, original_size, metadata = await self.image_pool.run_background(
+                            self._process_member, archive, info, target_size
+                        )
+                    except Exception as e:
+                        logger.warning(f"Gallery import {import_id}: skipping {name}: {e}")
+                        await self.collection.update_one(
+                            {"_id": import_id},
+                            {"$inc": {"failed": 1}, "$push": {"errors": {"$each": [f"{name}: {e}"], "$slice": -20}}}
+                        )
+                        return
+                images[index] = "data:image/jpeg;base64," + base64.b64encode(jpeg_bytes).decode("ascii")
+                placeholders[index] = metadata.get("placeholder")
+                await self.collection.update_one({"_id": import_id}, {"$inc": {"processed": 1}})
+
+            try:
+                await asyncio.gather(*(process(index, info) for index, info in enumerate(plan.members)))
+            finally:
+                archive.close()
+
+            processed = [index for index, image in enumerate(images) if image is not None]
+            if not processed:
+                raise ValueError("no image in the archive could be processed")
+            encoded = [images[index] for index in processed]
+            fields = dict(plan.fields)
+            fields["images"] = encoded
+            fields["thumbnail"] = encoded[0]
+            image_placeholders = [placeholders[index] for index in processed]
+            fields["placeholders"] = {"thumbnail": image_placeholders[0], "images": image_placeholders}
+            # The compressor's last resort can still miss its target; fail clearly rather
+            # than have MongoDB reject the insert
+            event_bytes = len(bson.encode(fields))
+            if event_bytes > MAX_EVENT_BYTES:
+                raise ValueError(
+                    f"the processed images total {event_bytes / (1024 * 1024):.1f}MB, over the "
+                    f"{MAX_EVENT_BYTES // (1024 * 1024)}MB a gallery event can hold; import fewer photos"
+                )
+            update["event_id"] = await create_event(fields)
+            logger.info(f"Gallery import {import_id} created event {update['event_id']} with {len(encoded)} images")
+        except asyncio.CancelledError:
+            status = "interrupted"
+            raise
+        except Exception as e:
+            logger.error(f"Gallery import {import_id} failed: {e}")
+            status = "failed"
+            await self.collection.update_one({"_id": import_id}, {"$push": {"errors": str(e)}})
+        finally:
+            await asyncio.to_thread(plan.discard)
+            await self.collection.update_one(
+                {"_id": import_id},
+                {"$set": {**update, "status": status, "finished_at": datetime.datetime.utcnow()}}
+            )
+
+    async def stop(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
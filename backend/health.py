@@ -0,0 +1,185 @@
+"""Liveness and cached, dependency-aware readiness.
+
+``HealthMonitor`` runs every probe on an interval in the background and keeps
+the latest results, so a load balancer can poll readiness as often as it
+likes without touching the database. A probe returns one of:
+
+- ``ok``
+- ``degraded``: worth alerting on, but still serving
+- ``fail``: take this instance out of rotation
+
+The instance is ready when no critical probe fails and the results are
+fresh. A probe that raises or times out counts as ``fail``.
+
+``PoolMonitor`` is a pymongo ``ConnectionPoolListener`` tracking connections
+per server, so pool exhaustion shows up before requests start timing out.
+"""
+import asyncio
+import datetime
+import logging
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from pymongo import common, monitoring
+
+logger = logging.getLogger(__name__)
+
+OK = "ok"
+DEGRADED = "degraded"
+FAIL = "fail"
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Connection counts per server address; callbacks arrive on driver threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pools: Dict[str, Dict[str, int]] = {}
+        self.checkout_failures = 0
+
+    def _pool(self, address) -> Dict[str, int]:
+        key = f"{address[0]}:{address[1]}"
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = {"max_size": common.MAX_POOL_SIZE, "open": 0, "checked_out": 0, "waiting": 0}
+            self._pools[key] = pool
+        return pool
+
+    def _update(self, address, **deltas):
+        with self._lock:
+            pool = self._pool(address)
+            for field, delta in deltas.items():
+                pool[field] = max(0, pool[field] + delta)
+
+    def pool_created(self, event):
+        with self._lock:
+            self._pool(event.address)["max_size"] = event.options.get("maxPoolSize", common.MAX_POOL_SIZE)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._pools.pop(f"{event.address[0]}:{event.address[1]}", None)
+
+    def connection_created(self, event):
+        self._update(event.address, open=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1)
+
+    def connection_check_out_started(self, event):
+        self._update(event.address, waiting=1)
+
+    def connection_check_out_failed(self, event):
+        self._update(event.address, waiting=-1)
+        with self._lock:
+            self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self._update(event.address, waiting=-1, checked_out=1)
+
+    def connection_checked_in(self, event):
+        self._update(event.address, checked_out=-1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            pools = {address: dict(pool) for address, pool in self._pools.items()}
+        for pool in pools.values():
+            pool["utilization"] = round(pool["checked_out"] / pool["max_size"], 3) if pool["max_size"] else 0.0
+        return {"pools": pools, "checkout_failures": self.checkout_failures}
+
+
+ProbeResult = Tuple[str, Dict[str, Any]]
+
+
+class HealthMonitor:
+    """Runs probes in the background and serves the cached results"""
+
+    def __init__(self, interval: float = 5.0, timeout: float = 2.0, stale_after: float = 30.0):
+        self.interval = interval
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self._probes: Dict[str, Tuple[Callable[[], Awaitable[ProbeResult]], bool]] = {}
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.checked_at: Optional[datetime.datetime] = None
+        self._checked_monotonic: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def add_probe(self, name: str, probe: Callable[[], Awaitable[ProbeResult]], critical: bool = True):
+        self._probes[name] = (probe, critical)
+
+    async def _run_probe(self, name: str, probe, critical: bool) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            status, details = await asyncio.wait_for(probe(), self.timeout)
+        except asyncio.TimeoutError:
+            status, details = FAIL, {"error": f"timed out after {self.timeout}s"}
+        except Exception as e:
+            status, details = FAIL, {"error": str(e)}
+        return {
+            "status": status,
+            "critical": critical,
+            "probe_ms": round((time.perf_counter() - started) * 1000, 2),
+            **details,
+        }
+
+    async def run_once(self):
+        names = list(self._probes)
+        results = await asyncio.gather(*(self._run_probe(name, *self._probes[name]) for name in names))
+        for name, result in zip(names, results):
+            previous = self.results.get(name, {}).get("status")
+            if previous is not None and previous != result["status"]:
+                logger.warning(f"Health probe {name} changed from {previous} to {result['status']}")
+        self.results = dict(zip(names, results))
+        self.checked_at = datetime.datetime.utcnow()
+        self._checked_monotonic = time.monotonic()
+
+    @property
+    def ready(self) -> bool:
+        if self._checked_monotonic is None:
+            return False
+        if time.monotonic() - self._checked_monotonic > self.stale_after:
+            return False
+        return not any(r["critical"] and r["status"] == FAIL for r in self.results.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        if self._checked_monotonic is None:
+            status = "starting"
+        else:
+            status = "ready" if self.ready else "not_ready"
+        return {
+            "status": status,
+            "checked_at": self.checked_at.isoformat() if self.checked_at else None,
+            "probes": self.results,
+        }
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Health probes failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
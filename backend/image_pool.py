@@ -0,0 +1,86 @@
+"""PIL work on a dedicated, size-limited thread pool.
+
+Decoding, resizing and re-encoding an upload can take hundreds of
+milliseconds. Run inline, that blocks every other request. Here it runs on
+its own executor (Pillow releases the GIL for most of that work). Once
+``max_pending`` request jobs are accepted, ``run`` fails fast with
+``ImagePoolBusy`` instead of queueing more, and the handler answers 503.
+Background jobs, which limit their own concurrency, use ``run_background``
+and wait their turn. The counters feed the readiness probe and metrics.
+"""
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+
+class ImagePoolBusy(Exception):
+    """Raised by ``run`` when max_pending jobs are already waiting or running"""
+
+
+class ImageWorkerPool:
+    """Async wrapper running image functions on a bounded executor"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image")
+        self._lock = threading.Lock()
+        # Jobs waiting for a worker thread, and those being processed
+        self.in_flight = 0
+        self.rejected = 0
+        self.running = 0
+        self.completed = 0
+
+    def _call(self, func, args, kwargs):
+        with self._lock:
+            self.running += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    async def run(self, func, *args, **kwargs) -> Any:
+        """Run a request's job, or raise ImagePoolBusy when max_pending jobs are already accepted"""
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise ImagePoolBusy(f"{self.in_flight} image jobs already pending")
+        return await self.run_background(func, *args, **kwargs)
+
+    async def run_background(self, func, *args, **kwargs) -> Any:
+        """Run a job without the max_pending check; for callers that bound their own concurrency"""
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            # Like asyncio.to_thread: log records from the worker keep the request id
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self._executor, context.run, self._call, func, args, kwargs)
+        finally:
+            self.in_flight -= 1
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs accepted but not yet running on a worker"""
+        return max(0, self.in_flight - self.running)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": self.in_flight,
+            "running": self.running,
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def default_image_workers() -> int:
+    return max(1, min(4, os.cpu_count() or 1))
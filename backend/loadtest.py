@@ -0,0 +1,228 @@
+"""Load generator for the backend with weighted, site-like scenarios.
+
+Virtual users loop over randomly chosen scenarios until the duration is up:
+
+- ``public``: a visitor opening the site (/faqs, /latest-works, /gallery-events)
+- ``submit``: a burst of contact form submissions from one client
+- ``admin``: admin list views (/inquiries, /job-applications, /campaigns);
+  needs --admin-token, otherwise skipped
+- ``upload``: an image upload through /upload-image
+
+Run it against a locally started app and local mongod, e.g.
+
+    RATE_LIMIT_SUBMIT=100000/60 uvicorn app:app --port 8000
+    python loadtest.py --users 50 --duration 30 --weights public=70,submit=10,upload=10,admin=10 --json
+
+Per endpoint it reports throughput, p50/p95/p99 latency, error rate (5xx and
+transport errors) and status counts. 429s are reported separately as
+rate-limited.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import httpx
+
+PUBLIC_PAGES = ["/faqs", "/latest-works", "/gallery-events"]
+ADMIN_VIEWS = ["/inquiries", "/job-applications", "/campaigns"]
+DEFAULT_WEIGHTS = "public=70,submit=10,admin=10,upload=10"
+
+
+class Recorder:
+    """Latencies and status codes per endpoint label"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    async def request(self, client: httpx.AsyncClient, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as e:
+            response = None
+            status = type(e).__name__
+        self.latencies[label].append(time.perf_counter() - started)
+        self.statuses[label][status] += 1
+        return response
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(fraction * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def make_test_image(size: int) -> bytes:
+    from PIL import Image
+    image = Image.effect_noise((size, size), 64).convert("RGB")
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+async def scenario_public(client, recorder, args):
+    for path in PUBLIC_PAGES:
+        await recorder.request(client, f"GET {path}", "GET", path)
+
+
+async def scenario_submit(client, recorder, args):
+    for i in range(args.submit_burst):
+        await recorder.request(client, "POST /submit", "POST", "/submit", json={
+            "name": "Load Test",
+            "email": f"loadtest{random.randint(0, 10**6)}@example.com",
+            "subject": "Decoration enquiry",
+            "message": f"Hello, we would like a quote for an event. Request {i}."
+        })
+
+
+async def scenario_admin(client, recorder, args):
+    headers = {"Authorization": f"Bearer {args.admin_token}"}
+    for path in ADMIN_VIEWS:
+        await recorder.request(client, f"GET {path}", "GET", path, headers=headers)
+
+
+async def scenario_upload(client, recorder, args):
+    await recorder.request(
+        client, "POST /upload-image", "POST", "/upload-image",
+        files={"file": ("loadtest.jpg", args.image_bytes, "image/jpeg")}
+    )
+
+
+SCENARIOS = {
+    "public": scenario_public,
+    "submit": scenario_submit,
+    "admin": scenario_admin,
+    "upload": scenario_upload,
+}
+
+
+def parse_weights(spec: str) -> Dict[str, float]:
+    weights = {}
+    for item in spec.split(","):
+        name, weight = item.split("=")
+        if name.strip() not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario {name!r}; choose from {', '.join(SCENARIOS)}")
+        weights[name.strip()] = float(weight)
+    return weights
+
+
+async def virtual_user(client, recorder, args, names, weights, deadline, scenario_counts):
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        scenario_counts[name] += 1
+        await SCENARIOS[name](client, recorder, args)
+        if args.think_ms:
+            await asyncio.sleep(random.uniform(0, 2 * args.think_ms) / 1000)
+
+
+def build_report(recorder: Recorder, elapsed: float, args, scenario_counts) -> dict:
+    endpoints = {}
+    total_requests = total_errors = 0
+    for label in sorted(recorder.latencies):
+        latencies = sorted(recorder.latencies[label])
+        statuses = dict(recorder.statuses[label])
+        errors = sum(count for status, count in statuses.items() if not status.isdigit() or int(status) >= 500)
+        rate_limited = statuses.get("429", 0)
+        total_requests += len(latencies)
+        total_errors += errors
+        endpoints[label] = {
+            "requests": len(latencies),
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "latency_ms": {
+                "p50": round(percentile(latencies, 0.50) * 1000, 2),
+                "p95": round(percentile(latencies, 0.95) * 1000, 2),
+                "p99": round(percentile(latencies, 0.99) * 1000, 2),
+                "mean": round(statistics.fmean(latencies) * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2),
+            },
+            "error_rate": round(errors / len(latencies), 4),
+            "rate_limited": rate_limited,
+            "statuses": statuses,
+        }
+    return {
+        "base_url": args.base_url,
+        "users": args.users,
+        "duration_seconds": round(elapsed, 3),
+        "scenarios": dict(scenario_counts),
+        "total": {
+            "requests": total_requests,
+            "throughput_rps": round(total_requests / elapsed, 2) if elapsed else 0.0,
+            "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        },
+        "endpoints": endpoints,
+    }
+
+
+def print_table(report: dict):
+    print(f"{report['base_url']}: {report['users']} users for {report['duration_seconds']}s, "
+          f"{report['total']['requests']} requests, {report['total']['throughput_rps']} req/s, "
+          f"error rate {report['total']['error_rate']:.2%}")
+    print(f"{'endpoint':<26}{'req':>7}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}{'429':>6}")
+    for label, stats in report["endpoints"].items():
+        latency = stats["latency_ms"]
+        print(f"{label:<26}{stats['requests']:>7}{stats['throughput_rps']:>9}{latency['p50']:>10}"
+              f"{latency['p95']:>10}{latency['p99']:>10}{stats['error_rate']:>8.2%}{stats['rate_limited']:>6}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to run")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS, help="scenario weights, e.g. public=70,submit=10")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause between scenarios per user")
+    parser.add_argument("--submit-burst", type=int, default=5, help="submissions per submit scenario")
+    parser.add_argument("--image-size", type=int, default=1600, help="test image width and height in pixels")
+    parser.add_argument("--admin-token", default=os.getenv("ADMIN_TOKEN"), help="bearer token for admin views")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--json", action="store_true", help="print a machine-readable report")
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    args = parser.parse_args()
+
+    weights = parse_weights(args.weights)
+    if "admin" in weights and not args.admin_token:
+        # stderr, so --json output stays parseable
+        print("No --admin-token given, skipping the admin scenario", file=sys.stderr)
+        weights.pop("admin")
+    names = [name for name, weight in weights.items() if weight > 0]
+    if not names:
+        raise SystemExit("No scenarios to run")
+    if "upload" in names:
+        args.image_bytes = make_test_image(args.image_size)
+
+    recorder = Recorder()
+    scenario_counts: Dict[str, int] = defaultdict(int)
+    limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(
+            virtual_user(client, recorder, args, names, [weights[n] for n in names], deadline, scenario_counts)
+            for _ in range(args.users)
+        ))
+        elapsed = time.perf_counter() - started
+
+    report = build_report(recorder, elapsed, args, scenario_counts)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_table(report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,177 @@
+"""Event-loop lag monitor and blocking-call detector.
+
+A heartbeat coroutine wakes every ``interval`` seconds and records how late
+it ran; that lateness is the event-loop lag every request is paying. A
+watchdog thread watches the heartbeat. Once it has been silent longer than
+``threshold``, something is running synchronously on the loop, so the
+watchdog captures the loop thread's stack and works out which request (or
+background task) was running.
+
+When the loop recovers, the stall is logged with its duration and stack and
+added to per-route totals for the admin endpoint.
+"""
+import asyncio
+import collections
+import datetime
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LoopLagMonitor:
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, max_events: int = 50, stack_limit: int = 25):
+        self.threshold = threshold
+        self.interval = interval
+        self.stack_limit = stack_limit
+        self.events: Deque[Dict[str, Any]] = collections.deque(maxlen=max_events)
+        self.routes: Dict[str, Dict[str, Any]] = {}
+        self.lag_samples: Deque[float] = collections.deque(maxlen=1200)
+        self.max_lag = 0.0
+        self.stalls = 0
+        # asyncio task -> ASGI scope of the request it is serving
+        self._active: Dict[asyncio.Task, dict] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._last_beat = time.monotonic()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    # Request attribution
+
+    def track(self, scope: dict):
+        task = asyncio.current_task()
+        if task is not None:
+            self._active[task] = scope
+
+    def untrack(self):
+        task = asyncio.current_task()
+        if task is not None:
+            self._active.pop(task, None)
+
+    def _describe_current_task(self) -> str:
+        # Read from the watchdog thread while the loop is stuck, so nothing is changing underneath
+        task = asyncio.current_task(self._loop) if self._loop is not None else None
+        if task is None:
+            return "event loop callback"
+        scope = self._active.get(task)
+        if scope is None:
+            return f"background:{task.get_name()}"
+        route = scope.get("route")
+        return f"{scope['method']} {getattr(route, 'path', None) or scope['path']}"
+
+    # Heartbeat (event loop) and watchdog (thread)
+
+    async def _heartbeat(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - started - self.interval)
+            self._last_beat = now
+            self.lag_samples.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if self._pending is not None:
+                self._finish_stall(self._pending, now)
+                self._pending = None
+
+    def _watch(self):
+        while not self._stop.wait(self.interval / 2):
+            silent_for = time.monotonic() - self._last_beat
+            if silent_for < self.threshold or self._pending is not None:
+                continue
+            last_beat = self._last_beat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = traceback.format_stack(frame, limit=self.stack_limit) if frame is not None else []
+            self._pending = {
+                "last_beat": last_beat,
+                "route": self._describe_current_task(),
+                "detected_at": datetime.datetime.utcnow(),
+                "stack": "".join(stack),
+            }
+
+    def _finish_stall(self, stall: Dict[str, Any], now: float):
+        # The heartbeat was due one interval after its last beat
+        blocked_ms = round(max(0.0, now - stall["last_beat"] - self.interval) * 1000, 1)
+        self.stalls += 1
+        event = {
+            "route": stall["route"],
+            "blocked_ms": blocked_ms,
+            "detected_at": stall["detected_at"].isoformat(),
+            "stack": stall["stack"],
+        }
+        self.events.append(event)
+
+        totals = self.routes.setdefault(stall["route"], {"stalls": 0, "total_blocked_ms": 0.0, "max_blocked_ms": 0.0})
+        totals["stalls"] += 1
+        totals["total_blocked_ms"] = round(totals["total_blocked_ms"] + blocked_ms, 1)
+        if blocked_ms >= totals["max_blocked_ms"]:
+            totals["max_blocked_ms"] = blocked_ms
+            totals["worst_stack"] = stall["stack"]
+        totals["last_at"] = event["detected_at"]
+
+        logger.warning(
+            f"Event loop blocked for {blocked_ms}ms in {stall['route']}",
+            extra={"blocked_ms": blocked_ms, "route": stall["route"], "stack": stall["stack"]}
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = sorted(self.lag_samples)
+        p99 = samples[int(len(samples) * 0.99) - 1] if len(samples) >= 100 else (samples[-1] if samples else 0.0)
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "lag_ms": {
+                "current": round(self.lag_samples[-1] * 1000, 2) if self.lag_samples else 0.0,
+                "p99": round(p99 * 1000, 2),
+                "max": round(self.max_lag * 1000, 2),
+            },
+            "stalls": self.stalls,
+            "routes": dict(sorted(self.routes.items(), key=lambda item: -item[1]["total_blocked_ms"])),
+            "recent": list(reversed(self.events)),
+        }
+
+    def start(self):
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class LoopMonitorMiddleware:
+    """Pure ASGI middleware letting the monitor attribute stalls to the request being served"""
+
+    def __init__(self, app, monitor: LoopLagMonitor):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        # The router fills scope["route"] in later; the monitor reads it when a stall happens
+        self.monitor.track(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.untrack()
@@ -0,0 +1,211 @@
+"""Async mail transport for the Resend HTTP API.
+
+One keep-alive ``httpx.AsyncClient`` is shared by every send, so messages
+reuse pooled TLS connections instead of paying a handshake each. Every call
+has a timeout budget, and a circuit breaker fails fast once the provider
+keeps erroring, instead of tying up admin requests and outbox workers.
+
+httpx is imported when the client is first built, keeping it off the
+cold-start path.
+"""
+import bisect
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+class MailTransportError(Exception):
+    """Sending failed; status_code is None for network errors and timeouts"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(MailTransportError):
+    """Raised without calling the provider while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, lets one probe through after a cool-down"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.state = "closed"
+        self.opened_at = 0.0
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = "half_open"
+            return True
+        # Half-open: a probe is already in flight
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.state = "closed"
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                logger.warning(f"Mail circuit opened after {self.failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+
+class SendMetrics:
+    """Send counters and a fixed-bucket latency histogram"""
+
+    def __init__(self):
+        self.requests = 0
+        self.messages_sent = 0
+        self.errors = 0
+        self.rejected_by_circuit = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        self.requests += 1
+        self.latency_sum += seconds
+        self.latency_max = max(self.latency_max, seconds)
+        self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(LATENCY_BUCKETS + [float("inf")], self.bucket_counts):
+            cumulative += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+        return {
+            "requests": self.requests,
+            "messages_sent": self.messages_sent,
+            "errors": self.errors,
+            "rejected_by_circuit": self.rejected_by_circuit,
+            "latency_avg_seconds": round(self.latency_sum / self.requests, 4) if self.requests else 0.0,
+            "latency_max_seconds": round(self.latency_max, 4),
+            "latency_buckets": buckets,
+        }
+
+
+class MailTransport:
+    """Pooled client for POST /emails and POST /emails/batch"""
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_connections: int = 10,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ):
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_connections = max_connections
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = SendMetrics()
+        self._client: Optional["httpx.AsyncClient"] = None
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(
+                base_url=self.api_url,
+                headers={"Authorization": f"Bearer {self.api_key}", "Accept": "application/json"},
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0
+                ),
+            )
+        return self._client
+
+    async def send(self, params: Dict[str, Any]) -> str:
+        """Send one message and return the provider's email ID"""
+        response = await self._post("/emails", params, message_count=1)
+        return response.get("id", "unknown") if isinstance(response, dict) else "unknown"
+
+    async def send_batch(
+        self, params_list: List[Dict[str, Any]], idempotency_key: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Send up to 100 messages in one request; a repeated idempotency key is not delivered twice"""
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        response = await self._post("/emails/batch", params_list, message_count=len(params_list), headers=headers)
+        return response.get("data", []) if isinstance(response, dict) else response
+
+    async def _post(self, path: str, payload: Any, message_count: int, headers: Optional[Dict[str, str]] = None) -> Any:
+        if not self.breaker.allow():
+            self.metrics.rejected_by_circuit += 1
+            raise CircuitOpenError("Mail provider circuit is open")
+
+        client = self.client
+        import httpx
+
+        started = time.perf_counter()
+        try:
+            response = await client.post(path, json=payload, headers=headers)
+        except httpx.HTTPError as e:
+            self.metrics.observe(time.perf_counter() - started)
+            self.metrics.errors += 1
+            self.breaker.record_failure()
+            raise MailTransportError(f"{type(e).__name__}: {e}")
+        self.metrics.observe(time.perf_counter() - started)
+
+        if response.status_code == 429:
+            # The provider is healthy, just busy - not a breaker failure
+            self.metrics.errors += 1
+            self.breaker.record_success()
+            raise MailTransportError("Rate limited", 429, self._retry_after(response))
+
+        if response.status_code >= 500:
+            self.metrics.errors += 1
+            self.breaker.record_failure()
+            raise MailTransportError(f"Provider error {response.status_code}: {response.text[:200]}", response.status_code)
+
+        self.breaker.record_success()
+        if response.status_code >= 400:
+            self.metrics.errors += 1
+            raise MailTransportError(f"Rejected {response.status_code}: {response.text[:200]}", response.status_code)
+
+        self.metrics.messages_sent += message_count
+        return response.json() if response.content else None
+
+    @staticmethod
+    def _retry_after(response: "httpx.Response") -> float:
+        for header in ("retry-after", "ratelimit-reset"):
+            try:
+                return max(float(response.headers[header]), 0.1)
+            except (KeyError, ValueError):
+                continue
+        return 1.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "circuit_state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            **self.metrics.snapshot(),
+        }
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,138 @@
+"""In-process broker pushing admin notifications over Server-Sent Events.
+
+``/submit`` and ``/job-applications`` publish a small summary of each new
+document. Every open admin stream has its own bounded queue, and the last
+``history`` events are kept so a reconnecting browser (which sends
+``Last-Event-ID`` automatically) gets whatever it missed.
+
+Event ids are ``<boot>-<seq>``. A reconnect carrying an id from another
+process (a restart, or a different worker) or one older than the history
+gets a ``reset`` event, telling the client to reload its lists.
+
+Notifications only reach streams connected to the worker that handled the
+write. Cross-worker delivery needs a shared bus such as MongoDB change
+streams, which require a replica set.
+"""
+import asyncio
+import collections
+import json
+import logging
+import time
+import uuid
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+Event = Tuple[int, str, Dict[str, Any]]
+
+
+def format_sse(event: str, data: Dict[str, Any], event_id: Optional[str] = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+class NotificationBroker:
+    def __init__(
+        self,
+        history: int = 500,
+        queue_size: int = 100,
+        heartbeat: float = 15.0,
+        max_connection_seconds: float = 300.0
+    ):
+        self.boot_id = uuid.uuid4().hex[:8]
+        self.heartbeat = heartbeat
+        # Streams end periodically and the browser reconnects with Last-Event-ID, so
+        # an open stream never holds up a graceful shutdown for longer than this
+        self.max_connection_seconds = max_connection_seconds
+        self.queue_size = queue_size
+        self._seq = 0
+        self._history: Deque[Event] = collections.deque(maxlen=history)
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.published = 0
+        self.dropped = 0
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def _event_id(self, seq: int) -> str:
+        return f"{self.boot_id}-{seq}"
+
+    def publish(self, event: str, data: Dict[str, Any]):
+        self._seq += 1
+        item: Event = (self._seq, event, data)
+        self._history.append(item)
+        self.published += 1
+        for queue in self._subscribers:
+            if queue.qsize() < self.queue_size:
+                queue.put_nowait(item)
+                continue
+            # A stalled client: drop its backlog and end the stream (None). It
+            # reconnects and resumes from the history, or gets a reset.
+            self.dropped += 1
+            while not queue.empty():
+                queue.get_nowait()
+            queue.put_nowait(None)
+
+    def _replay(self, last_event_id: Optional[str]) -> Tuple[bool, list]:
+        """Events after ``last_event_id``, or (True, []) when the client must reload"""
+        if not last_event_id:
+            return False, []
+        boot_id, _, seq = last_event_id.partition("-")
+        if boot_id != self.boot_id or not seq.isdigit():
+            return True, []
+        seq = int(seq)
+        if seq >= self._seq:
+            return False, []
+        if not self._history or self._history[0][0] > seq + 1:
+            return True, []
+        return False, [item for item in self._history if item[0] > seq]
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        try:
+            # Subscribing and reading the history with no await in between delivers
+            # every event exactly once, either replayed or through the queue
+            self._subscribers.add(queue)
+            reset, missed = self._replay(last_event_id)
+            current_id = self._event_id(self._seq)
+
+            yield "retry: 3000\n\n"
+            if reset:
+                yield format_sse("reset", {"reason": "history unavailable"}, current_id)
+            elif missed:
+                for seq, event, data in missed:
+                    yield format_sse(event, data, self._event_id(seq))
+            else:
+                # Gives the browser a Last-Event-ID even if nothing happens before it reconnects
+                yield format_sse("ready", {}, current_id)
+
+            deadline = time.monotonic() + self.max_connection_seconds
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                try:
+                    item = await asyncio.wait_for(queue.get(), min(self.heartbeat, remaining))
+                except asyncio.TimeoutError:
+                    # Comment line; keeps proxies from closing an idle connection
+                    yield ": keepalive\n\n"
+                    continue
+                if item is None:
+                    return
+                seq, event, data = item
+                yield format_sse(event, data, self._event_id(seq))
+        finally:
+            self._subscribers.discard(queue)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self.subscribers,
+            "published": self.published,
+            "dropped": self.dropped,
+            "last_event_id": self._event_id(self._seq),
+        }
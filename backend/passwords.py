@@ -0,0 +1,67 @@
+"""bcrypt hashing on a dedicated, size-limited thread pool.
+
+bcrypt is deliberately slow, and running it inline blocks the event loop for
+the whole hash. Here every hash/verify runs on its own small executor (bcrypt
+releases the GIL while it works). At most ``max_pending`` hashes may be
+queued or running; beyond that, calls fail fast with ``PasswordHasherBusy``
+and the endpoint answers 503, so a burst of login attempts cannot build an
+unbounded queue.
+"""
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when max_pending hashes are already queued or running"""
+
+
+class PasswordHasher:
+    """Async bcrypt with a configurable work factor"""
+
+    def __init__(self, rounds: int = 12, max_workers: int = 2, max_pending: int = 32):
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self.max_pending = max_pending
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def _run(self, func, *args):
+        if self.in_flight >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHasherBusy(f"{self.in_flight} password hashes already pending")
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        salt = bcrypt.gensalt(rounds=self.rounds)
+        hashed = await self._run(bcrypt.hashpw, password.encode("utf-8"), salt)
+        return hashed.decode("utf-8")
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        try:
+            return await self._run(bcrypt.checkpw, password.encode("utf-8"), hashed_password.encode("utf-8"))
+        except ValueError:
+            # Malformed stored hash
+            return False
+
+    def needs_rehash(self, hashed_password: str) -> bool:
+        """True when the stored hash was made with a different work factor"""
+        try:
+            return int(hashed_password.split("$")[2]) != self.rounds
+        except (IndexError, ValueError):
+            return True
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def default_workers() -> int:
+    return max(1, min(4, os.cpu_count() or 1))
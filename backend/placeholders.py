@@ -0,0 +1,133 @@
+"""Low-quality image placeholders (LQIP) for the gallery and latest-works grids.
+
+Each stored image gets a placeholder: a WebP of at most ``LQIP_SIZE`` pixels
+a side, as a data URI of a couple of hundred bytes, plus its dominant
+colour and its dimensions. List responses carry the placeholders next to
+the full base64 images, so the grid can paint blurred tiles (or flat colour)
+immediately and fill them in as the images decode.
+
+The dominant colour is the mean of the most populated bucket of a 4-bit per
+channel histogram, computed over the pixels with numpy. numpy is imported
+when the first placeholder is computed, keeping it off the cold-start path.
+"""
+import base64
+import binascii
+import datetime
+import io
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+LQIP_SIZE = 16
+LQIP_QUALITY = 40
+# Colour statistics are taken from a copy this size; more pixels do not change the answer
+SAMPLE_SIZE = 64
+COLOR_BITS = 4
+
+
+def dominant_color(pixels) -> str:
+    """Hex colour of the most common 4-bit/channel bucket in an (h, w, 3) uint8 array"""
+    import numpy as np
+
+    flat = pixels.reshape(-1, 3)
+    shift = 8 - COLOR_BITS
+    quantized = (flat >> shift).astype(np.int32)
+    buckets = (quantized[:, 0] << (2 * COLOR_BITS)) | (quantized[:, 1] << COLOR_BITS) | quantized[:, 2]
+    top = np.bincount(buckets, minlength=1 << (3 * COLOR_BITS)).argmax()
+    red, green, blue = flat[buckets == top].mean(axis=0).round().astype(int)
+    return f"#{red:02x}{green:02x}{blue:02x}"
+
+
+def placeholder_from_image(image) -> Dict[str, Any]:
+    """Placeholder for a PIL image already converted to RGB"""
+    import numpy as np
+    from PIL import Image
+
+    width, height = image.size
+    sample = image.copy()
+    sample.thumbnail((SAMPLE_SIZE, SAMPLE_SIZE), Image.Resampling.BILINEAR)
+    color = dominant_color(np.asarray(sample))
+
+    sample.thumbnail((LQIP_SIZE, LQIP_SIZE), Image.Resampling.LANCZOS)
+    output = io.BytesIO()
+    sample.save(output, format="WEBP", quality=LQIP_QUALITY, method=6)
+    return {
+        "lqip": "data:image/webp;base64," + base64.b64encode(output.getvalue()).decode("ascii"),
+        "color": color,
+        "width": width,
+        "height": height,
+    }
+
+
+def placeholder_from_bytes(image_bytes: bytes) -> Optional[Dict[str, Any]]:
+    """Placeholder for an encoded image; best effort, None when it cannot be made"""
+    try:
+        from PIL import Image
+
+        image = Image.open(io.BytesIO(image_bytes))
+        full_size = image.size
+        # JPEG decodes at 1/2, 1/4 or 1/8 scale when asked first, which is most of the cost saved
+        image.draft("RGB", (SAMPLE_SIZE * 2, SAMPLE_SIZE * 2))
+        placeholder = placeholder_from_image(image.convert("RGB"))
+    except Exception as e:
+        # A missing placeholder only costs the blurred preview, never the image itself
+        logger.warning(f"Could not build an image placeholder: {e}")
+        return None
+    placeholder["width"], placeholder["height"] = full_size
+    return placeholder
+
+
+def decode_data(value: Optional[str]) -> Optional[bytes]:
+    """Bytes of a stored image, a data URI or bare base64"""
+    if not value or not isinstance(value, str):
+        return None
+    _, _, payload = value.rpartition(",")
+    try:
+        return base64.b64decode(payload)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def placeholder_from_data(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Placeholder for a stored image; None when it cannot be decoded"""
+    image_bytes = decode_data(value)
+    if image_bytes is None:
+        return None
+    return placeholder_from_bytes(image_bytes)
+
+
+def compute_placeholders(doc: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Placeholders for the image fields of a document; list fields give lists"""
+    placeholders: Dict[str, Any] = {}
+    for field in fields:
+        value = doc.get(field)
+        if isinstance(value, list):
+            placeholders[field] = [placeholder_from_data(item) for item in value]
+        elif value is not None:
+            placeholders[field] = placeholder_from_data(value)
+    return placeholders
+
+
+async def backfill_placeholders(
+    collection,
+    fields: Sequence[str],
+    run: Callable[..., Awaitable[Any]],
+    query: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Compute placeholders for documents stored before they existed; ``run`` executes off the event loop"""
+    match = {**(query or {}), "placeholders": {"$exists": False}, fields[0]: {"$exists": True}}
+    updated = 0
+    ids: List[Any] = [doc["_id"] async for doc in collection.find(match, {"_id": 1})]
+    # One document at a time: gallery documents can each be several MB of base64
+    for doc_id in ids:
+        doc = await collection.find_one({"_id": doc_id}, {field: 1 for field in fields})
+        if doc is None:
+            continue
+        placeholders = await run(compute_placeholders, doc, fields)
+        await collection.update_one(
+            {"_id": doc_id, "placeholders": {"$exists": False}},
+            {"$set": {"placeholders": placeholders, "updated_at": datetime.datetime.utcnow()}}
+        )
+        updated += 1
+    return updated
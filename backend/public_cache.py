@@ -0,0 +1,185 @@
+"""In-process cache of rendered, precompressed public JSON responses.
+
+Public pages (FAQs, job listings, events, gallery, latest works) change only
+when an admin edits them but are read on every visit. Each response is
+rendered to JSON once per content version. Its gzip and Brotli encodings are
+produced once, on the first request that asks for them, and reused until the
+version changes. Every content group has a version counter: write endpoints
+call ``invalidate(group)``, and a TTL bounds staleness across processes,
+which cannot see each other's invalidations.
+
+Entries are keyed on the path plus the query parameters the endpoint
+actually reads, so arbitrary query strings cannot multiply them. The cache
+is bounded by the bytes it holds, bodies and encodings together, since a
+single gallery payload can be several MB of base64 images.
+
+Responses carry a weak ETag, so revalidating clients get a 304 with no body.
+"""
+import asyncio
+import collections
+import hashlib
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from compression import compress_async, negotiate_encoding
+
+CacheKey = Tuple[str, str, str]
+
+
+class CachedPayload:
+    """One rendered response body and its compressed encodings"""
+
+    def __init__(self, key: CacheKey, body: bytes, version: int, expires_at: float):
+        self.key = key
+        self.body = body
+        self.version = version
+        self.expires_at = expires_at
+        self.etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+        self.encoded: Dict[str, bytes] = {}
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+
+class PublicContentCache:
+    def __init__(
+        self,
+        ttl: float = 30.0,
+        max_bytes: int = 64 * 1024 * 1024,
+        minimum_size: int = 1024,
+        gzip_level: int = 9,
+        brotli_quality: int = 9
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self._versions: Dict[str, int] = collections.defaultdict(int)
+        self._entries: "collections.OrderedDict[CacheKey, CachedPayload]" = collections.OrderedDict()
+        self._bytes = 0
+        # In-progress renders and compressions, so concurrent misses share one
+        self._pending: Dict[Any, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.compressions = 0
+
+    def invalidate(self, *groups: str):
+        for group in groups:
+            self._versions[group] += 1
+        for key in [key for key in self._entries if key[0] in groups]:
+            self._remove(key)
+
+    def _remove(self, key: CacheKey):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _store(self, entry: CachedPayload):
+        self._remove(entry.key)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[entry.key] = entry
+        self._bytes += entry.size
+        self._evict()
+
+    def _evict(self):
+        # Least recently used first
+        while self._bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+
+    async def _single_flight(self, key, factory: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._pending[key] = task
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        # A disconnecting client must not cancel the work other requests wait on
+        return await asyncio.shield(task)
+
+    async def _render(self, key: CacheKey, loader: Callable[[], Awaitable[Any]]) -> CachedPayload:
+        group = key[0]
+        version = self._versions[group]
+        data = await loader()
+        body = JSONResponse(content=jsonable_encoder(data)).body
+        entry = CachedPayload(key, body, version, time.monotonic() + self.ttl)
+        # Do not store a render that an edit made stale while it was loading
+        if self._versions[group] == version:
+            self._store(entry)
+        return entry
+
+    async def _encode(self, entry: CachedPayload, encoding: str) -> bytes:
+        encoded = entry.encoded.get(encoding)
+        if encoded is None:
+            async def factory():
+                data = await compress_async(entry.body, encoding, self.gzip_level, self.brotli_quality)
+                self.compressions += 1
+                entry.encoded[encoding] = data
+                if self._entries.get(entry.key) is entry:
+                    self._bytes += len(data)
+                    self._evict()
+                return data
+            encoded = await self._single_flight((id(entry), encoding), factory)
+        return encoded
+
+    def _lookup(self, key: CacheKey) -> Optional[CachedPayload]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.version != self._versions[key[0]] or entry.expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def respond(
+        self,
+        request: Request,
+        group: str,
+        loader: Callable[[], Awaitable[Any]],
+        params: Optional[Dict[str, Any]] = None
+    ) -> Response:
+        """Serve ``loader()``'s result from the cache, rendering it on a miss
+
+        ``params`` are the query parameters ``loader`` depends on; any others
+        in the URL share the same entry.
+        """
+        query = "&".join(f"{name}={value}" for name, value in sorted((params or {}).items()) if value is not None)
+        key: CacheKey = (group, request.url.path, query)
+        entry = self._lookup(key)
+        if entry is None:
+            self.misses += 1
+            entry = await self._single_flight(key, lambda: self._render(key, loader))
+        else:
+            self.hits += 1
+
+        headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and entry.etag in [tag.strip() for tag in if_none_match.split(",")]:
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        encoding = None
+        if len(entry.body) >= self.minimum_size:
+            encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding is None:
+            return Response(content=entry.body, media_type="application/json", headers=headers)
+        headers["Content-Encoding"] = encoding
+        return Response(content=await self._encode(entry, encoding), media_type="application/json", headers=headers)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "versions": dict(self._versions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "compressions": self.compressions,
+        }
@@ -0,0 +1,223 @@
+"""Sliding-window rate limiting with pluggable backends.
+
+Both backends use the sliding-window counter approximation: a request is
+allowed while ``previous_window * (1 - elapsed_fraction) + current_window``
+stays under the limit. That is O(1) time and memory per key, unlike keeping
+a timestamp per request. ``Retry-After`` is the time until that estimate
+decays below the limit, which can fall inside the current window or in the
+next one.
+
+- ``InMemoryRateLimiter``: per-process, LRU-bounded, with a background sweeper.
+- ``MongoRateLimiter``: shared by every worker/instance; counters expire
+  through a TTL index.
+"""
+import asyncio
+import datetime
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+logger = logging.getLogger(__name__)
+
+
+class RatePolicy:
+    """At most ``limit`` requests per ``window_seconds`` for one route"""
+
+    def __init__(self, name: str, limit: int, window_seconds: int):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+
+    @classmethod
+    def parse(cls, name: str, spec: str) -> "RatePolicy":
+        """Build a policy from a "limit/seconds" string such as "3/3600" """
+        limit, window = spec.split("/")
+        return cls(name, int(limit), int(window))
+
+
+def sliding_count(previous: int, current: int, window_start: float, now: float, window_seconds: int) -> float:
+    elapsed_fraction = (now - window_start) / window_seconds
+    return previous * (1.0 - elapsed_fraction) + current
+
+
+def sliding_retry_after(previous: int, current: int, window_start: float, now: float, policy: RatePolicy) -> float:
+    """Seconds until ``sliding_count`` drops below the limit, assuming no further requests
+
+    The previous window's weight decays as the current one elapses; once the
+    current window's own count is at the limit, only its decay through the
+    next window can free a slot.
+    """
+    window = policy.window_seconds
+    if current < policy.limit:
+        if previous <= 0:
+            return 0.0
+        # previous * (1 - fraction) < limit - current
+        fraction = 1.0 - (policy.limit - current) / previous
+        return max(0.0, window_start + fraction * window - now)
+    # Next window: current * (1 - fraction) < limit
+    fraction = 1.0 - policy.limit / current
+    return window_start + window + fraction * window - now
+
+
+class InMemoryRateLimiter:
+    """Per-process limiter holding at most ``max_keys`` counters"""
+
+    def __init__(self, max_keys: int = 100_000, sweep_interval: float = 60.0):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        # key -> [window_index, current_count, previous_count, expires_at]
+        self._counters: "OrderedDict[str, list]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+
+    async def hit(self, key: str, policy: RatePolicy) -> Tuple[bool, float]:
+        """Count a request; returns (allowed, retry_after_seconds)"""
+        now = time.time()
+        window = policy.window_seconds
+        index = int(now // window)
+        counter_key = f"{policy.name}:{key}"
+
+        counter = self._counters.get(counter_key)
+        if counter is None:
+            counter = [index, 0, 0, 0.0]
+            self._counters[counter_key] = counter
+            if len(self._counters) > self.max_keys:
+                # Least recently seen key goes first
+                self._counters.popitem(last=False)
+        else:
+            self._counters.move_to_end(counter_key)
+            if counter[0] != index:
+                # Roll forward; more than one window idle means no previous traffic
+                counter[2] = counter[1] if counter[0] == index - 1 else 0
+                counter[1] = 0
+                counter[0] = index
+        # Past the end of the next window this counter cannot affect a decision
+        counter[3] = (index + 2) * window
+
+        if sliding_count(counter[2], counter[1], index * window, now, window) >= policy.limit:
+            return False, sliding_retry_after(counter[2], counter[1], index * window, now, policy)
+        counter[1] += 1
+        return True, 0.0
+
+    def sweep(self) -> int:
+        """Drop counters that can no longer affect a decision"""
+        now = time.time()
+        expired = [key for key, counter in self._counters.items() if counter[3] <= now]
+        for key in expired:
+            del self._counters[key]
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._counters)
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            removed = self.sweep()
+            if removed:
+                logger.debug(f"Rate limiter swept {removed} idle keys")
+
+    async def ensure_indexes(self):
+        pass
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._sweep_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+class MongoRateLimiter:
+    """Limiter shared across workers; one small document per key and window"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def hit(self, key: str, policy: RatePolicy) -> Tuple[bool, float]:
+        now = time.time()
+        window = policy.window_seconds
+        index = int(now // window)
+        prefix = f"{policy.name}:{key}"
+        # Kept for two windows so it can still serve as the "previous" window
+        expires_at = datetime.datetime.utcfromtimestamp((index + 2) * window)
+
+        current, previous = await asyncio.gather(
+            self.collection.find_one_and_update(
+                {"_id": f"{prefix}:{index}"},
+                {"$inc": {"count": 1}, "$setOnInsert": {"expires_at": expires_at}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            ),
+            self.collection.find_one({"_id": f"{prefix}:{index - 1}"}),
+        )
+        previous_count = previous["count"] if previous else 0
+
+        # The increment above already counted this request
+        if sliding_count(previous_count, current["count"] - 1, index * window, now, window) >= policy.limit:
+            # Rejected requests do not use up quota
+            await self.collection.update_one({"_id": f"{prefix}:{index}"}, {"$inc": {"count": -1}})
+            return False, sliding_retry_after(previous_count, current["count"] - 1, index * window, now, policy)
+        return True, 0.0
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying per-route policies keyed by client IP"""
+
+    def __init__(self, app, limiter, policies: Dict[Tuple[str, str], RatePolicy]):
+        self.app = app
+        self.limiter = limiter
+        self.policies = policies
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        policy = self.policies.get((scope["method"], scope["path"]))
+        if policy is None:
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = scope["client"][0] if scope.get("client") else "unknown"
+        try:
+            allowed, retry_after = await self.limiter.hit(client_ip, policy)
+        except Exception as e:
+            # Fail open - a limiter outage must not take the site down
+            logger.error(f"Rate limiter error, allowing request: {e}")
+            allowed, retry_after = True, 0.0
+
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        logger.warning(f"Rate limit exceeded for IP: {client_ip} on {policy.name}")
+        body = json.dumps({"detail": "Too many requests. Please try again later."}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, int(retry_after + 0.999))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,113 @@
+"""Pooled reCAPTCHA verification with a replay cache.
+
+A single long-lived ``httpx.AsyncClient`` keeps connections to the verify
+endpoint warm, and every call runs within a short timeout budget. reCAPTCHA
+tokens are single-use and live for two minutes. Tokens already seen are kept
+in a bounded LRU, so a replayed token is rejected locally without a round
+trip to Google. A token whose check never reached Google (a network error or
+a 5xx) is forgotten again, so the user's retry is not taken for a replay.
+httpx is imported when the client is first built.
+"""
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+TOKEN_LIFETIME_SECONDS = 120
+
+
+class RecaptchaVerifier:
+    """Verifies tokens against a configurable siteverify URL"""
+
+    def __init__(
+        self,
+        secret_key: Optional[str],
+        verify_url: str,
+        timeout: float = 3.0,
+        cache_size: int = 10_000,
+        max_connections: int = 20,
+    ):
+        self.secret_key = secret_key
+        self.verify_url = verify_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.cache_size = cache_size
+        # sha256(token) -> monotonic time it was first seen
+        self._seen: "OrderedDict[bytes, float]" = OrderedDict()
+        self._client: Optional["httpx.AsyncClient"] = None
+        self.replays_rejected = 0
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        if self._client is None or self._client.is_closed:
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 2.0)),
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+            )
+        return self._client
+
+    def _check_and_remember(self, key: bytes) -> bool:
+        """Record a token; returns False if it was already seen within its lifetime"""
+        now = time.monotonic()
+        seen_at = self._seen.get(key)
+        if seen_at is not None and now - seen_at < TOKEN_LIFETIME_SECONDS:
+            return False
+        self._seen[key] = now
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.cache_size:
+            self._seen.popitem(last=False)
+        return True
+
+    async def verify(self, token: str, client_ip: str) -> Dict[str, Any]:
+        """Verify reCAPTCHA token with Google's API"""
+        if not self.secret_key or not token:
+            return {"success": False, "score": 0.0, "error": "Missing reCAPTCHA configuration"}
+
+        # Remembered before the call, so concurrent replays are rejected too
+        key = hashlib.sha256(token.encode("utf-8")).digest()
+        if not self._check_and_remember(key):
+            self.replays_rejected += 1
+            return {"success": False, "score": 0.0, "error": ["timeout-or-duplicate"]}
+
+        try:
+            response = await self.client.post(
+                self.verify_url,
+                data={
+                    "secret": self.secret_key,
+                    "response": token,
+                    "remoteip": client_ip
+                }
+            )
+
+            if response.status_code == 200:
+                result = response.json()
+                verification = {
+                    "success": result.get("success", False),
+                    "score": result.get("score", 0.0),
+                    "action": result.get("action", ""),
+                    "error": result.get("error-codes", [])
+                }
+            else:
+                verification = {"success": False, "score": 0.0, "error": "reCAPTCHA verification failed"}
+                if response.status_code >= 500:
+                    # Google never judged the token, so it is still unused
+                    self._seen.pop(key, None)
+
+        except Exception as e:
+            logger.error(f"reCAPTCHA verification error: {e}")
+            verification = {"success": False, "score": 0.0, "error": str(e)}
+            self._seen.pop(key, None)
+
+        return verification
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
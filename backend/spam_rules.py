@@ -0,0 +1,300 @@
+"""Rule-based spam scoring for contact submissions.
+
+Rules live in the ``spam_rules`` collection and are compiled into an
+immutable ``CompiledRules`` snapshot:
+
+- ``keyword``: every keyword is folded into one regex and scanned in a
+  single pass (a lookahead alternation, so overlapping keywords are found)
+- ``regex``: a pattern searched in the message or in all fields;
+  case-sensitive unless the rule sets ``ignore_case``
+- ``uppercase_ratio``: the message is mostly capital letters
+- ``link_count``: the message contains more than ``threshold`` links
+
+A submission is spam when the weighted sum of matching rules reaches the
+threshold. Workers pick up rule edits without a restart by polling a cheap
+version check, and ``rescore_contacts`` re-applies the current rules to the
+whole contact history in vectorized batches. numpy is only imported for
+rescoring, so it stays off the cold-start path.
+"""
+import asyncio
+import datetime
+import logging
+import re
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+if TYPE_CHECKING:
+    import numpy as np
+
+logger = logging.getLogger(__name__)
+
+RULE_KINDS = ("keyword", "regex", "uppercase_ratio", "link_count")
+
+DEFAULT_RULES = [
+    *[
+        {"_id": f"default:keyword:{keyword}", "kind": "keyword", "pattern": keyword, "weight": 1.0}
+        for keyword in [
+            'viagra', 'casino', 'lottery', 'winner', 'congratulations',
+            'million dollars', 'click here', 'buy now', 'limited time',
+            'crypto', 'bitcoin', 'investment opportunity', 'make money fast'
+        ]
+    ],
+    {"_id": "default:uppercase_ratio", "kind": "uppercase_ratio", "threshold": 0.7, "weight": 1.0},
+    {"_id": "default:link_count", "kind": "link_count", "threshold": 2, "weight": 2.0},
+    {"_id": "default:repeated_characters", "kind": "regex", "pattern": r"(.)\1{4,}", "field": "message", "weight": 1.0},
+]
+
+LINK_PATTERN = re.compile(r"https?://")
+
+
+class CompiledRules:
+    """Immutable, ready-to-evaluate form of a rule set"""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        keyword_weights: Dict[str, float] = {}
+        self.regex_rules: List[Tuple[re.Pattern, str, float]] = []
+        self.uppercase_rules: List[Tuple[float, float]] = []
+        self.link_rules: List[Tuple[int, float]] = []
+
+        for rule in rules:
+            if not rule.get("enabled", True):
+                continue
+            kind, weight = rule["kind"], float(rule.get("weight", 1.0))
+            if kind == "keyword":
+                keyword_weights[rule["pattern"].lower()] = weight
+            elif kind == "regex":
+                flags = re.IGNORECASE if rule.get("ignore_case") else 0
+                self.regex_rules.append((re.compile(rule["pattern"], flags), rule.get("field", "message"), weight))
+            elif kind == "uppercase_ratio":
+                self.uppercase_rules.append((float(rule.get("threshold", 0.7)), weight))
+            elif kind == "link_count":
+                self.link_rules.append((int(rule.get("threshold", 2)), weight))
+
+        self.keyword_weights = keyword_weights
+        # Only the longest keyword is captured at each position, but every keyword
+        # inside it (e.g. "buy" in "buy now") is present too
+        self.keyword_contains = {
+            keyword: [other for other in keyword_weights if other != keyword and other in keyword]
+            for keyword in keyword_weights
+        }
+        self.keyword_regex: Optional[re.Pattern] = None
+        if keyword_weights:
+            # Longest first so a keyword wins over its own prefix at the same position
+            alternation = "|".join(re.escape(k) for k in sorted(keyword_weights, key=len, reverse=True))
+            self.keyword_regex = re.compile(f"(?=({alternation}))")
+
+        # Column order of features(): keyword score, regex rules, uppercase rules, link rules
+        self.weights = (
+            [1.0]
+            + [weight for _, _, weight in self.regex_rules]
+            + [weight for _, weight in self.uppercase_rules]
+            + [weight for _, weight in self.link_rules]
+        )
+
+    def features(self, name: str, email: str, subject: str, message: str) -> List[float]:
+        """One feature row; the keyword column is already weighted"""
+        content = f"{name} {email} {subject} {message}".lower()
+
+        keyword_score = 0.0
+        if self.keyword_regex is not None:
+            # Each keyword counts once, however often it appears
+            matched = {m.group(1) for m in self.keyword_regex.finditer(content)}
+            matched.update(*(self.keyword_contains[k] for k in list(matched)))
+            keyword_score = sum(self.keyword_weights[k] for k in matched)
+
+        row = [keyword_score]
+        for regex, field, _ in self.regex_rules:
+            text = message if field == "message" else content
+            row.append(1.0 if regex.search(text) else 0.0)
+
+        if self.uppercase_rules:
+            uppercase = sum(map(str.isupper, message))
+            for ratio, _ in self.uppercase_rules:
+                row.append(1.0 if uppercase > len(message) * ratio else 0.0)
+
+        if self.link_rules:
+            links = len(LINK_PATTERN.findall(message))
+            for threshold, _ in self.link_rules:
+                row.append(1.0 if links > threshold else 0.0)
+
+        return row
+
+    def score(self, name: str, email: str, subject: str, message: str) -> float:
+        row = self.features(name, email, subject, message)
+        return float(sum(value * weight for value, weight in zip(row, self.weights)))
+
+    def score_batch(self, docs: List[Dict[str, Any]]) -> "np.ndarray":
+        """Scores for many contacts with one matrix-vector product"""
+        import numpy as np
+        if not docs:
+            return np.zeros(0)
+        matrix = np.array([
+            self.features(d.get("name", ""), d.get("email", ""), d.get("subject", ""), d.get("message", ""))
+            for d in docs
+        ])
+        return matrix @ np.array(self.weights)
+
+
+def validate_rule(rule: Dict[str, Any]) -> Optional[str]:
+    """Return an error message for an invalid rule, or None"""
+    if rule.get("kind") not in RULE_KINDS:
+        return f"kind must be one of {', '.join(RULE_KINDS)}"
+    if rule["kind"] in ("keyword", "regex") and not rule.get("pattern"):
+        return "pattern is required"
+    if rule["kind"] == "regex":
+        try:
+            re.compile(rule["pattern"])
+        except re.error as e:
+            return f"Invalid regex: {e}"
+    return None
+
+
+class SpamScorer:
+    """Holds the current compiled rules and reloads them when the collection changes"""
+
+    def __init__(self, collection, threshold: float = 2.0, reload_interval: float = 30.0):
+        self.collection = collection
+        self.threshold = threshold
+        self.reload_interval = reload_interval
+        self.rules = CompiledRules(DEFAULT_RULES)
+        self._version: Optional[Tuple[int, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._rescore_task: Optional[asyncio.Task] = None
+        self.last_rescore: Optional[Dict[str, Any]] = None
+
+    def score(self, name: str, email: str, subject: str, message: str) -> float:
+        return self.rules.score(name, email, subject, message)
+
+    def is_spam(self, score: float) -> bool:
+        return score >= self.threshold
+
+    async def seed_defaults(self):
+        """Insert the built-in rules once; fixed _ids make this idempotent across workers"""
+        now = datetime.datetime.utcnow()
+        await self.collection.bulk_write([
+            UpdateOne(
+                {"_id": rule["_id"]},
+                {"$setOnInsert": {**{k: v for k, v in rule.items() if k != "_id"}, "enabled": True, "updated_at": now}},
+                upsert=True
+            )
+            for rule in DEFAULT_RULES
+        ], ordered=False)
+
+    async def _current_version(self) -> Tuple[int, Any]:
+        latest = await self.collection.find({}, {"updated_at": 1}).sort("updated_at", -1).limit(1).to_list(length=1)
+        count = await self.collection.count_documents({})
+        return count, latest[0].get("updated_at") if latest else None
+
+    async def load(self):
+        """Compile the rules currently stored in the collection"""
+        version = await self._current_version()
+        rules = await self.collection.find({"enabled": {"$ne": False}}).to_list(length=None)
+        self.rules = CompiledRules(rules)
+        self._version = version
+        logger.info(f"Loaded {len(rules)} spam rules")
+
+    async def reload_if_changed(self) -> bool:
+        if await self._current_version() == self._version:
+            return False
+        await self.load()
+        return True
+
+    async def rescore_contacts(self, contacts_collection, batch_size: int = 1000) -> Dict[str, int]:
+        """Re-apply the current rules to every stored contact, updating spam_score and is_flagged
+
+        Only contacts whose score or flag actually changed are written.
+        """
+        rules = self.rules
+        scanned = changed = 0
+        batch: List[Dict[str, Any]] = []
+        cursor = contacts_collection.find(
+            {},
+            {"name": 1, "email": 1, "subject": 1, "message": 1, "is_flagged": 1, "spam_score": 1}
+        ).batch_size(batch_size)
+
+        import numpy as np
+
+        async def apply(docs: List[Dict[str, Any]]) -> int:
+            scores = rules.score_batch(docs)
+            flagged = scores >= self.threshold
+            previous = np.array([bool(d.get("is_flagged", False)) for d in docs])
+            # NaN for contacts stored before scores were kept, so they always differ
+            previous_scores = np.array([d.get("spam_score", np.nan) for d in docs], dtype=float)
+            stale = (flagged != previous) | ~np.isclose(scores, previous_scores)
+            updated_at = datetime.datetime.utcnow()
+            operations = [
+                UpdateOne(
+                    {"_id": docs[i]["_id"]},
+                    {"$set": {"is_flagged": bool(flagged[i]), "spam_score": float(scores[i]), "updated_at": updated_at}}
+                )
+                for i in np.flatnonzero(stale)
+            ]
+            if operations:
+                await contacts_collection.bulk_write(operations, ordered=False)
+            return len(operations)
+
+        async for doc in cursor:
+            batch.append(doc)
+            if len(batch) >= batch_size:
+                changed += await apply(batch)
+                scanned += len(batch)
+                batch = []
+        if batch:
+            changed += await apply(batch)
+            scanned += len(batch)
+
+        logger.info(f"Spam rescoring scanned {scanned} contacts, changed {changed}")
+        return {"scanned": scanned, "changed": changed}
+
+    async def _run_rescore(self, contacts_collection):
+        started_at = datetime.datetime.utcnow()
+        try:
+            result = await self.rescore_contacts(contacts_collection)
+            self.last_rescore = {**result, "started_at": started_at, "finished_at": datetime.datetime.utcnow()}
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Spam rescoring failed: {e}")
+            self.last_rescore = {"error": str(e), "started_at": started_at, "finished_at": datetime.datetime.utcnow()}
+
+    def schedule_rescore(self, contacts_collection):
+        """Rescore in the background, superseding a run that used older rules"""
+        if self.rescoring:
+            self._rescore_task.cancel()
+        self._rescore_task = asyncio.create_task(self._run_rescore(contacts_collection))
+
+    @property
+    def rescoring(self) -> bool:
+        return self._rescore_task is not None and not self._rescore_task.done()
+
+    async def _reload_forever(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload_if_changed()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Spam rule reload failed: {e}")
+
+    async def start(self):
+        try:
+            await self.seed_defaults()
+            await self.load()
+        except Exception as e:
+            # Keep scoring with the built-in defaults until the database is reachable
+            logger.error(f"Could not load spam rules, using defaults: {e}")
+        if self._task is None:
+            self._task = asyncio.create_task(self._reload_forever())
+
+    async def stop(self):
+        if self.rescoring:
+            self._rescore_task.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,161 @@
+"""Cold-start helpers: a startup profiler and lazily initialized components.
+
+The host spins the backend down when idle, so import and startup time is
+user-facing. Heavy subsystems (Motor client, PIL/HEIF, HTTP clients) are
+wrapped in ``LazyComponent`` and built on first use, or ahead of time by a
+background pre-warm task that runs after the app already accepts requests.
+
+``StartupProfiler`` records how long each import block, lifespan step and
+lazy component took, and ``report()`` returns them for logs and the admin
+startup report.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """Wall-clock timings per component, measured from when this object was created"""
+
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self._last_checkpoint = self.origin
+        self.timings: List[Dict[str, Any]] = []
+        self.ready_after: Optional[float] = None
+        self._logged = 0
+
+    def record(self, component: str, phase: str, seconds: float):
+        self.timings.append({
+            "component": component,
+            "phase": phase,
+            "seconds": round(seconds, 4),
+            "at_seconds": round(time.perf_counter() - self.origin, 4),
+        })
+
+    def checkpoint(self, component: str, phase: str = "import"):
+        """Record the time since the previous checkpoint, e.g. after a block of imports"""
+        now = time.perf_counter()
+        self.record(component, phase, now - self._last_checkpoint)
+        self._last_checkpoint = now
+
+    @contextmanager
+    def measure(self, component: str, phase: str = "init"):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(component, phase, time.perf_counter() - started)
+
+    def log_new_timings(self):
+        for timing in self.timings[self._logged:]:
+            logger.info(f"Startup timing: {timing['component']} ({timing['phase']}) {timing['seconds']:.4f}s")
+        self._logged = len(self.timings)
+
+    def mark_ready(self):
+        self.ready_after = time.perf_counter() - self.origin
+        self.log_new_timings()
+        logger.info(f"Ready to serve after {self.ready_after:.3f}s")
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready_after_seconds": round(self.ready_after, 4) if self.ready_after is not None else None,
+            "components": list(self.timings),
+        }
+
+
+class LazyComponent:
+    """Builds a value on first ``get()``; safe to call from the event loop and worker threads"""
+
+    def __init__(self, name: str, factory: Callable[[], Any], profiler: StartupProfiler):
+        self.name = name
+        self.factory = factory
+        self.profiler = profiler
+        self._value: Any = None
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._ready
+
+    def get(self, phase: str = "lazy init") -> Any:
+        if self._ready:
+            return self._value
+        with self._lock:
+            if not self._ready:
+                with self.profiler.measure(self.name, phase):
+                    self._value = self.factory()
+                self._ready = True
+        return self._value
+
+    async def prewarm(self):
+        """Build the value in a worker thread so imports and DNS do not block the loop"""
+        if not self._ready:
+            await asyncio.to_thread(self.get, "prewarm")
+
+
+class LazyMongo(LazyComponent):
+    """Motor client created on first use; a mongodb+srv URI resolves DNS at construction"""
+
+    def __init__(self, uri: str, db_name: str, profiler: StartupProfiler, **client_options):
+        super().__init__("mongo", self._connect, profiler)
+        self.uri = uri
+        self.db_name = db_name
+        self.client_options = client_options
+
+    def _connect(self):
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient(self.uri, **self.client_options)
+
+    @property
+    def client(self):
+        return self.get()
+
+    @property
+    def db(self):
+        return self.get()[self.db_name]
+
+    def collection(self, name: str) -> "LazyCollection":
+        return LazyCollection(self, name)
+
+    async def prewarm(self):
+        await super().prewarm()
+        # Opens the first pooled connection
+        with self.profiler.measure(self.name, "ping"):
+            await self.db.command("ping")
+
+
+class LazyCollection:
+    """Stands in for a Motor collection and resolves it on first attribute access"""
+
+    __slots__ = ("_mongo", "_name", "_collection")
+
+    def __init__(self, mongo: LazyMongo, name: str):
+        self._mongo = mongo
+        self._name = name
+        self._collection = None
+
+    def __getattr__(self, attribute: str):
+        if self._collection is None:
+            self._collection = self._mongo.db[self._name]
+        return getattr(self._collection, attribute)
+
+    def __repr__(self) -> str:
+        return f"LazyCollection({self._name!r})"
+
+
+def load_env_file(path: str = ".env") -> bool:
+    """Load a .env file if one exists; python-dotenv is only imported when needed"""
+    candidates = [path, os.path.join(os.path.dirname(os.path.abspath(__file__)), path)]
+    for candidate in candidates:
+        if os.path.isfile(candidate):
+            from dotenv import load_dotenv
+            load_dotenv(candidate)
+            return True
+    return False
@@ -0,0 +1,134 @@
+"""Incremental "changes since" feed for the admin panel.
+
+Every write to a synced collection stamps ``updated_at``. Deletes, and moves
+into the archive tier, leave a tombstone in the tombstones collection.
+``changes(token)`` returns the documents changed and the ids removed since
+the token, together with the token to send next time.
+
+A token is a millisecond timestamp handed out ``overlap`` seconds in the
+past. That way a write that was still in flight during a sync, or one
+stamped by a server whose clock runs slightly behind, is picked up by the
+next sync. Clients apply changes by id, so receiving one twice is harmless.
+
+The client gets ``reset: true`` and reloads from the regular list endpoints
+when:
+
+- its token is older than the tombstone retention, or
+- a collection changed by more than ``limit`` documents.
+"""
+import datetime
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+INDEX_OPTIONS_CONFLICT_ERRORS = (85, 86)
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class InvalidSyncRequest(ValueError):
+    pass
+
+
+def encode_token(moment: datetime.datetime) -> str:
+    return str(int((moment - EPOCH).total_seconds() * 1000))
+
+
+def decode_token(token: str) -> datetime.datetime:
+    try:
+        return EPOCH + datetime.timedelta(milliseconds=int(token))
+    except (TypeError, ValueError, OverflowError):
+        raise InvalidSyncRequest(f"Invalid sync token: {token!r}")
+
+
+class SyncFeed:
+    def __init__(
+        self,
+        collections: Dict[str, Any],
+        tombstones,
+        projections: Optional[Dict[str, Dict[str, int]]] = None,
+        overlap_seconds: float = 5.0,
+        retention_days: int = 30,
+        limit: int = 500
+    ):
+        self.collections = collections
+        self.tombstones = tombstones
+        # Per-collection projections, e.g. to leave resumes out of the feed
+        self.projections = projections or {}
+        self.overlap = datetime.timedelta(seconds=overlap_seconds)
+        self.retention = datetime.timedelta(days=retention_days)
+        self.limit = limit
+
+    async def ensure_indexes(self):
+        for collection in self.collections.values():
+            await collection.create_index("updated_at")
+        await self.tombstones.create_index([("collection", 1), ("deleted_at", 1)])
+        expire_after = int(self.retention.total_seconds())
+        try:
+            await self.tombstones.create_index("deleted_at", name="deleted_at_ttl", expireAfterSeconds=expire_after)
+        except OperationFailure as e:
+            if e.code not in INDEX_OPTIONS_CONFLICT_ERRORS:
+                raise
+            # Retention changed since the index was built - update it in place
+            await self.tombstones.database.command(
+                "collMod",
+                self.tombstones.name,
+                index={"name": "deleted_at_ttl", "expireAfterSeconds": expire_after}
+            )
+
+    async def record_deleted(self, collection: str, ids: Iterable[Any], reason: str = "deleted"):
+        """Leave tombstones for documents removed from a synced collection"""
+        deleted_at = datetime.datetime.utcnow()
+        tombstones = [
+            {"collection": collection, "doc_id": str(doc_id), "reason": reason, "deleted_at": deleted_at}
+            for doc_id in ids
+        ]
+        if tombstones:
+            await self.tombstones.insert_many(tombstones, ordered=False)
+
+    def current_token(self) -> str:
+        return encode_token(datetime.datetime.utcnow() - self.overlap)
+
+    async def changes(self, token: Optional[str], names: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Documents changed and ids deleted since ``token``, or just a starting token when it is None"""
+        names = names or list(self.collections)
+        unknown = [name for name in names if name not in self.collections]
+        if unknown:
+            raise InvalidSyncRequest(f"Unknown collections: {', '.join(unknown)}")
+
+        next_token = self.current_token()
+        if token is None:
+            return {"token": next_token, "reset": True, "changes": {}, "deleted": {}}
+
+        since = decode_token(token)
+        if since < datetime.datetime.utcnow() - self.retention:
+            # Tombstones this old may have expired, so the delta would be incomplete
+            return {"token": next_token, "reset": True, "changes": {}, "deleted": {}}
+
+        changes: Dict[str, List[Dict[str, Any]]] = {}
+        for name in names:
+            docs = await self.collections[name].find(
+                {"updated_at": {"$gte": since}},
+                self.projections.get(name)
+            ).sort("updated_at", 1).limit(self.limit + 1).to_list(length=self.limit + 1)
+            if len(docs) > self.limit:
+                logger.info(f"Sync delta for {name} exceeds {self.limit} documents, asking the client to reload")
+                return {"token": next_token, "reset": True, "changes": {}, "deleted": {}}
+            if docs:
+                changes[name] = docs
+
+        deleted: Dict[str, List[str]] = {}
+        cursor = self.tombstones.find(
+            {"collection": {"$in": names}, "deleted_at": {"$gte": since}},
+            {"collection": 1, "doc_id": 1}
+        )
+        async for tombstone in cursor:
+            ids = deleted.setdefault(tombstone["collection"], [])
+            ids.append(tombstone["doc_id"])
+            if len(ids) > self.limit:
+                # e.g. a large archive run; reloading is cheaper than the delta
+                return {"token": next_token, "reset": True, "changes": {}, "deleted": {}}
+
+        return {"token": next_token, "reset": False, "changes": changes, "deleted": deleted}
@@ -0,0 +1,120 @@
+import asyncio
+import datetime
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from archive import ArchiveManager, ArchiveTier, archivable_applications, archivable_contacts
+
+NOW = datetime.datetime.utcnow()
+OLD = NOW - datetime.timedelta(days=200)
+RECENT = NOW - datetime.timedelta(days=10)
+
+
+def make_manager(**kwargs):
+    db = AsyncMongoMockClient().db
+    moved = []
+
+    async def on_moved(name, ids):
+        moved.append((name, ids))
+
+    manager = ArchiveManager(
+        [
+            ArchiveTier("contacts", db.contacts, db.contacts_archive, archivable_contacts, ["name", "message"]),
+            ArchiveTier(
+                "job_applications", db.job_applications, db.job_applications_archive,
+                archivable_applications, ["name"]
+            ),
+        ],
+        on_moved=on_moved,
+        **kwargs,
+    )
+    return db, manager, moved
+
+
+def test_moves_only_old_solved_or_flagged_inquiries():
+    db, manager, moved = make_manager(archive_after_days=90, batch_size=2)
+
+    async def scenario():
+        await db.contacts.insert_many([
+            {"_id": 1, "is_solved": True, "created_at": OLD},
+            {"_id": 2, "is_flagged": True, "created_at": OLD},
+            {"_id": 3, "is_solved": True, "created_at": OLD},
+            {"_id": 4, "is_solved": False, "created_at": OLD},
+            {"_id": 5, "is_solved": True, "created_at": RECENT},
+        ])
+        result = await manager.run_once()
+        hot = sorted(doc["_id"] for doc in await db.contacts.find().to_list(None))
+        archived = await db.contacts_archive.find().sort("_id", 1).to_list(None)
+        return result, hot, archived
+
+    result, hot, archived = asyncio.run(scenario())
+    assert result["moved"] == {"contacts": 3, "job_applications": 0}
+    assert hot == [4, 5]
+    assert [doc["_id"] for doc in archived] == [1, 2, 3]
+    assert all("archived_at" in doc for doc in archived)
+    # One callback per batch, so the sync feed can leave tombstones
+    assert moved == [("contacts", [1, 2]), ("contacts", [3])]
+
+
+def test_applications_are_aged_by_object_id():
+    db, manager, _ = make_manager(archive_after_days=90)
+    old_id, recent_id, pending_id = (ObjectId.from_datetime(OLD), ObjectId.from_datetime(RECENT),
+                                     ObjectId.from_datetime(OLD - datetime.timedelta(days=1)))
+
+    async def scenario():
+        await db.job_applications.insert_many([
+            {"_id": old_id, "status": "approved"},
+            {"_id": recent_id, "status": "rejected"},
+            {"_id": pending_id, "status": "pending"},
+        ])
+        await manager.run_once()
+        return sorted(doc["_id"] for doc in await db.job_applications.find().to_list(None))
+
+    assert asyncio.run(scenario()) == sorted([recent_id, pending_id])
+
+
+def test_rerun_after_a_crash_between_copy_and_delete():
+    db, manager, _ = make_manager()
+
+    async def scenario():
+        doc = {"_id": 1, "is_solved": True, "created_at": OLD}
+        await db.contacts.insert_one(dict(doc))
+        # The previous run copied the document, then died before deleting it
+        await db.contacts_archive.insert_one(dict(doc, archived_at=NOW))
+        result = await manager.run_once()
+        return result, await db.contacts.count_documents({}), await db.contacts_archive.count_documents({})
+
+    result, hot, archived = asyncio.run(scenario())
+    assert result["moved"]["contacts"] == 1
+    assert (hot, archived) == (0, 1)
+
+
+def test_search_pages_newest_archived_first():
+    db, manager, _ = make_manager()
+
+    async def scenario():
+        await db.contacts_archive.insert_many([
+            {"_id": n, "archived_at": NOW - datetime.timedelta(hours=n)} for n in range(5)
+        ])
+        return await manager.search("contacts", skip=1, limit=2)
+
+    result = asyncio.run(scenario())
+    assert result["total"] == 5
+    assert [doc["_id"] for doc in result["items"]] == [1, 2]
+
+
+def test_ttl_index_replaces_plain_archived_at_index():
+    db, manager, _ = make_manager(ttl_days=0)
+
+    async def scenario():
+        await manager.ensure_indexes()
+        before = await db.contacts_archive.index_information()
+        manager.ttl_days = 30
+        await manager.ensure_indexes()
+        return before, await db.contacts_archive.index_information()
+
+    before, after = asyncio.run(scenario())
+    assert "archived_at_1" in before
+    assert "archived_at_1" not in after
+    assert after["archived_at_ttl"]["expireAfterSeconds"] == 30 * 24 * 3600
@@ -0,0 +1,155 @@
+import asyncio
+import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from campaigns import (
+    CampaignNotResumable,
+    CampaignRunner,
+    CampaignTemplate,
+    PermanentBatchError,
+    RateLimitedError,
+    idempotency_key,
+)
+
+TEMPLATE = CampaignTemplate("shop@example.com", "help@example.com", "Hello $name", "<p>Hi $name</p>", "Hi $name")
+
+
+class Provider:
+    """Batch sender recording every call; ``failures`` are raised first, one per call"""
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.calls = []
+        self.delivered = {}
+
+    async def send_batch(self, messages, key):
+        self.calls.append(key)
+        if self.failures:
+            raise self.failures.pop(0)
+        # Like Resend, a repeated key is answered without sending again
+        self.delivered.setdefault(key, [message["to"][0] for message in messages])
+        return []
+
+    @property
+    def emails(self):
+        return [email for batch in self.delivered.values() for email in batch]
+
+
+def make_runner(provider, count=5, **kwargs):
+    db = AsyncMongoMockClient().db
+    options = dict(batch_size=2, requests_per_second=1000, base_delay=0.001)
+    options.update(kwargs)
+    runner = CampaignRunner(db.campaigns, provider.send_batch, **options)
+
+    def recipients(meta, after):
+        query = {} if after is None else {"_id": {"$gt": after}}
+        return db.people.find(query).sort("_id", 1)
+
+    runner.register_source("news", recipients)
+    people = [{"_id": n, "email": f"{n}@example.com", "name": f"P{n}"} for n in range(count)]
+    return db, runner, people
+
+
+async def run_campaign(db, runner, people):
+    await db.people.insert_many(people)
+    campaign_id = await runner.start("news", len(people), TEMPLATE)
+    await asyncio.gather(*runner._tasks.values())
+    return await runner.get(campaign_id)
+
+
+def test_sends_in_chunks_and_checkpoints():
+    provider = Provider()
+    db, runner, people = make_runner(provider)
+    campaign = asyncio.run(run_campaign(db, runner, people))
+
+    assert campaign["status"] == "completed"
+    assert (campaign["sent"], campaign["failed"], campaign["cursor"]) == (5, 0, 4)
+    assert len(provider.calls) == 3
+    assert provider.emails == [f"{n}@example.com" for n in range(5)]
+    assert CampaignTemplate.from_doc(campaign["template"]).render({"email": "x", "name": "Ann"})["subject"] == "Hello Ann"
+
+
+def test_idempotency_key_depends_on_campaign_and_recipients():
+    assert idempotency_key("c1", [1, 2]) == idempotency_key("c1", [1, 2])
+    assert idempotency_key("c1", [1, 2]) != idempotency_key("c1", [1, 3])
+    assert idempotency_key("c1", [1, 2]) != idempotency_key("c2", [1, 2])
+
+
+def test_transient_errors_are_retried_with_the_same_key():
+    provider = Provider([ConnectionError("timeout"), RateLimitedError("slow down", 0.001), RuntimeError("503")])
+    db, runner, people = make_runner(provider, count=2)
+    campaign = asyncio.run(run_campaign(db, runner, people))
+
+    assert (campaign["sent"], campaign["failed"]) == (2, 0)
+    assert len(set(provider.calls)) == 1
+    assert len(provider.calls) == 4
+
+
+def test_retries_are_bounded():
+    provider = Provider([RuntimeError("503")] * 3)
+    db, runner, people = make_runner(provider, count=4, max_retries=2)
+    campaign = asyncio.run(run_campaign(db, runner, people))
+
+    # The first chunk gave up after two retries; the second went through
+    assert (campaign["sent"], campaign["failed"]) == (2, 2)
+    assert campaign["status"] == "completed"
+
+
+def test_permanent_errors_are_not_retried():
+    provider = Provider([PermanentBatchError("invalid from address")])
+    db, runner, people = make_runner(provider, count=2)
+    campaign = asyncio.run(run_campaign(db, runner, people))
+
+    assert (campaign["sent"], campaign["failed"]) == (0, 2)
+    assert len(provider.calls) == 1
+    assert campaign["errors"] == ["invalid from address"]
+
+
+def test_stale_campaign_is_interrupted_and_resumes_after_its_cursor():
+    provider = Provider()
+    db, runner, people = make_runner(provider, stale_after=60)
+
+    async def scenario():
+        await db.people.insert_many(people)
+        # A process sent the first chunk, then died before finishing
+        await provider.send_batch([TEMPLATE.render(person) for person in people[:2]], idempotency_key("c", [0, 1]))
+        result = await db.campaigns.insert_one({
+            "kind": "news", "meta": {}, "template": TEMPLATE.to_doc(), "status": "running",
+            "total": 5, "sent": 2, "failed": 0, "cursor": 1, "errors": [], "owner": "gone",
+            "heartbeat_at": datetime.datetime.utcnow() - datetime.timedelta(minutes=5),
+            "created_at": datetime.datetime.utcnow(), "finished_at": None,
+        })
+        campaign_id = str(result.inserted_id)
+        marked = await runner.mark_stale()
+        interrupted = await runner.get(campaign_id)
+        await runner.resume(campaign_id)
+        with pytest.raises(CampaignNotResumable):
+            await runner.resume(campaign_id)
+        await asyncio.gather(*runner._tasks.values())
+        return marked, interrupted, await runner.get(campaign_id)
+
+    marked, interrupted, campaign = asyncio.run(scenario())
+    assert marked == 1
+    assert interrupted["status"] == "interrupted"
+    assert campaign["status"] == "completed"
+    assert campaign["sent"] == 5
+    assert provider.emails == [f"{n}@example.com" for n in range(5)]
+
+
+def test_running_campaign_with_fresh_heartbeat_is_left_alone():
+    provider = Provider()
+    db, runner, _ = make_runner(provider)
+
+    async def scenario():
+        await db.campaigns.insert_one({"status": "running", "heartbeat_at": datetime.datetime.utcnow()})
+        return await runner.mark_stale()
+
+    assert asyncio.run(scenario()) == 0
+
+
+def test_unknown_kind_is_rejected():
+    _, runner, _ = make_runner(Provider())
+    with pytest.raises(ValueError):
+        asyncio.run(runner.start("unknown", 0, TEMPLATE))
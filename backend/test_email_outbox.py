@@ -0,0 +1,212 @@
+import asyncio
+import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from email_outbox import EmailOutbox, PermanentEmailError
+
+
+def make_outbox(send, **kwargs):
+    return EmailOutbox(AsyncMongoMockClient().db.email_outbox, send, **kwargs)
+
+
+async def sent_ok(params):
+    return "provider-1"
+
+
+def test_lease_must_outlast_send_timeout():
+    with pytest.raises(ValueError):
+        make_outbox(sent_ok, send_timeout=60, lease_seconds=90)
+
+
+def test_claim_takes_a_lease():
+    outbox = make_outbox(sent_ok, send_timeout=10, lease_seconds=300)
+
+    async def scenario():
+        await outbox.enqueue({"to": "a@example.com"}, kind="test")
+        message = await outbox._claim()
+        # Leased, so no other worker can take it
+        return message, await outbox._claim()
+
+    message, second = asyncio.run(scenario())
+    assert second is None
+    assert message["status"] == "sending"
+    assert message["attempts"] == 1
+    lease = message["next_attempt_at"] - datetime.datetime.utcnow()
+    assert datetime.timedelta(seconds=290) < lease <= datetime.timedelta(seconds=300)
+
+
+def test_expired_lease_is_reclaimed():
+    outbox = make_outbox(sent_ok)
+
+    async def scenario():
+        message_id = await outbox.enqueue({"to": "a@example.com"})
+        await outbox._claim()
+        # The worker died; its lease ran out
+        await outbox.collection.update_one(
+            {}, {"$set": {"next_attempt_at": datetime.datetime.utcnow() - datetime.timedelta(seconds=1)}}
+        )
+        return message_id, await outbox._claim()
+
+    message_id, message = asyncio.run(scenario())
+    assert str(message["_id"]) == message_id
+    assert message["attempts"] == 2
+
+
+def test_delivery_records_provider_id():
+    outbox = make_outbox(sent_ok)
+
+    async def scenario():
+        await outbox.enqueue({"to": "a@example.com"})
+        await outbox._deliver(await outbox._claim())
+        return await outbox.collection.find_one({}), await outbox.stats()
+
+    message, stats = asyncio.run(scenario())
+    assert message["status"] == "sent"
+    assert message["provider_id"] == "provider-1"
+    assert stats["sent"] == 1
+
+
+def test_failure_backs_off_then_dead_letters():
+    async def failing(params):
+        raise RuntimeError("provider down")
+
+    outbox = make_outbox(failing, max_attempts=2)
+
+    async def scenario():
+        await outbox.enqueue({"to": "a@example.com"})
+        await outbox._deliver(await outbox._claim())
+        first = await outbox.collection.find_one({})
+        await outbox.collection.update_one({}, {"$set": {"next_attempt_at": datetime.datetime.utcnow()}})
+        await outbox._deliver(await outbox._claim())
+        return first, await outbox.collection.find_one({})
+
+    first, second = asyncio.run(scenario())
+    assert first["status"] == "pending"
+    assert first["next_attempt_at"] > datetime.datetime.utcnow()
+    assert second["status"] == "dead"
+    assert second["last_error"] == "provider down"
+
+
+def test_permanent_error_dead_letters_at_once():
+    async def rejected(params):
+        raise PermanentEmailError("invalid recipient")
+
+    outbox = make_outbox(rejected)
+
+    async def scenario():
+        message_id = await outbox.enqueue({"to": "nobody"})
+        await outbox._deliver(await outbox._claim())
+        dead = await outbox.collection.find_one({})
+        retried = await outbox.retry(message_id)
+        return dead, retried, await outbox.collection.find_one({})
+
+    dead, retried, requeued = asyncio.run(scenario())
+    assert dead["status"] == "dead"
+    assert retried is True
+    assert requeued["status"] == "pending"
+    assert requeued["attempts"] == 0
+
+
+def test_slow_send_times_out():
+    async def hanging(params):
+        await asyncio.sleep(10)
+
+    outbox = make_outbox(hanging, send_timeout=0.05, lease_seconds=1)
+
+    async def scenario():
+        await outbox.enqueue({"to": "a@example.com"})
+        await outbox._deliver(await outbox._claim())
+        return await outbox.collection.find_one({})
+
+    message = asyncio.run(scenario())
+    assert message["status"] == "pending"
+    assert "0.05s" in message["last_error"]
+
+
+def test_workers_drain_the_queue():
+    delivered = []
+
+    async def send(params):
+        delivered.append(params["to"])
+        return "ok"
+
+    outbox = make_outbox(send, concurrency=2, poll_interval=0.05)
+
+    async def scenario():
+        outbox.start()
+        for n in range(5):
+            await outbox.enqueue({"to": f"{n}@example.com"})
+        for _ in range(100):
+            if (await outbox.stats())["sent"] == 5:
+                break
+            await asyncio.sleep(0.01)
+        await outbox.stop()
+
+    asyncio.run(scenario())
+    assert sorted(delivered) == [f"{n}@example.com" for n in range(5)]
+
+
+def test_sent_message_drops_its_body():
+    outbox = make_outbox(sent_ok)
+
+    async def scenario():
+        await outbox.enqueue({"to": "a@example.com", "subject": "Code", "html": "<b>123456</b>", "text": "123456"})
+        await outbox._deliver(await outbox._claim())
+        return await outbox.collection.find_one({})
+
+    message = asyncio.run(scenario())
+    assert message["params"] == {"to": "a@example.com", "subject": "Code"}
+
+
+def test_finished_messages_expire():
+    outbox = make_outbox(sent_ok, retention_days=7)
+
+    async def scenario():
+        await outbox.ensure_indexes()
+        return await outbox.collection.index_information()
+
+    indexes = asyncio.run(scenario())
+    assert indexes["sent_at_ttl"]["expireAfterSeconds"] == 7 * 86400
+    assert indexes["failed_at_ttl"]["expireAfterSeconds"] == 7 * 86400
+
+
+def test_retried_message_leaves_the_dead_letter_ttl():
+    async def rejected(params):
+        raise PermanentEmailError("invalid recipient")
+
+    outbox = make_outbox(rejected)
+
+    async def scenario():
+        message_id = await outbox.enqueue({"to": "nobody"})
+        await outbox._deliver(await outbox._claim())
+        await outbox.retry(message_id)
+        return await outbox.collection.find_one({})
+
+    assert "failed_at" not in asyncio.run(scenario())
+
+
+def test_delivers_through_fake_resend():
+    import httpx
+
+    import fake_resend
+    from mail_transport import MailTransport
+
+    transport = MailTransport("http://fake-resend", "test-key")
+    transport._client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=fake_resend.app), base_url="http://fake-resend"
+    )
+    outbox = make_outbox(transport.send)
+    fake_resend.received.clear()
+
+    async def scenario():
+        await outbox.enqueue({"from": "a@example.com", "to": ["b@example.com"], "subject": "Hi", "html": "<p>Hi</p>"})
+        await outbox._deliver(await outbox._claim())
+        message = await outbox.collection.find_one({})
+        await transport.aclose()
+        return message
+
+    message = asyncio.run(scenario())
+    assert message["status"] == "sent"
+    assert [email["id"] for email in fake_resend.received] == [message["provider_id"]]
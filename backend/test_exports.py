@@ -0,0 +1,74 @@
+import asyncio
+import csv
+import datetime
+import io
+
+import pytest
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from exports import ExportSpec, InvalidExportRequest, _csv_cell, stream_export
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("=HYPERLINK(\"http://x\")", "'=HYPERLINK(\"http://x\")"),
+    ("@SUM(A1)", "'@SUM(A1)"),
+    ("+cmd|' /C calc'!A0", "'+cmd|' /C calc'!A0"),
+    ("-2+3+cmd|' /C calc'!A0", "'-2+3+cmd|' /C calc'!A0"),
+    ("\tTab", "'\tTab"),
+    ("-", "'-"),
+    ("+44 20 7946 0958", "+44 20 7946 0958"),
+    ("+1 (555) 123-4567", "+1 (555) 123-4567"),
+    ("-3.5", "-3.5"),
+    (-3.5, "-3.5"),
+    (42, "42"),
+    ("Hello", "Hello"),
+    (None, ""),
+    (True, "true"),
+    (datetime.datetime(2024, 1, 2, 3, 4, 5), "2024-01-02T03:04:05"),
+])
+def test_csv_cell(value, expected):
+    assert _csv_cell(value) == expected
+
+
+def make_spec():
+    db = AsyncMongoMockClient().db
+    spec = ExportSpec("contacts", [db.contacts, db.contacts_archive], ["id", "name", "phone", "created_at"], ["name"])
+    return db, spec
+
+
+def test_unknown_fields_rejected():
+    _, spec = make_spec()
+    with pytest.raises(InvalidExportRequest):
+        spec.select_fields("name,resume")
+    assert spec.select_fields(None) == ["name"]
+
+
+def test_stream_csv_hot_then_archive():
+    db, spec = make_spec()
+    created = datetime.datetime(2024, 1, 1)
+
+    async def scenario():
+        await db.contacts.insert_one({"_id": ObjectId(), "name": "=evil()", "phone": "+44 1234", "created_at": created})
+        await db.contacts_archive.insert_one({"_id": ObjectId(), "name": "Old", "phone": "-", "created_at": created})
+        return b"".join([chunk async for chunk in stream_export(spec, ["name", "phone"])])
+
+    rows = list(csv.reader(io.StringIO(asyncio.run(scenario()).decode("utf-8"))))
+    assert rows == [["name", "phone"], ["'=evil()", "+44 1234"], ["Old", "'-"]]
+
+
+def test_stream_respects_archive_flag_and_dates():
+    db, spec = make_spec()
+
+    async def scenario():
+        await db.contacts.insert_many([
+            {"name": "early", "created_at": datetime.datetime(2024, 1, 1)},
+            {"name": "late", "created_at": datetime.datetime(2024, 6, 1)},
+        ])
+        await db.contacts_archive.insert_one({"name": "archived", "created_at": datetime.datetime(2024, 6, 1)})
+        chunks = stream_export(
+            spec, ["name"], fmt="ndjson", start=datetime.datetime(2024, 3, 1), include_archived=False
+        )
+        return b"".join([chunk async for chunk in chunks])
+
+    assert asyncio.run(scenario()).decode("utf-8") == '{"name": "late"}\n'
@@ -0,0 +1,130 @@
+import asyncio
+import io
+import json
+import zipfile
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from gallery_import import MAX_EVENT_BYTES, GalleryImporter, InvalidGalleryImport
+
+
+class InlinePool:
+    async def run_background(self, func, *args):
+        return func(*args)
+
+
+def make_archive(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, data in files.items():
+            archive.writestr(name, data)
+    buffer.seek(0)
+    return buffer
+
+
+def make_importer(compress=None, **kwargs):
+    targets = []
+
+    def default_compress(image_bytes, target_size):
+        targets.append(target_size)
+        return image_bytes, {"placeholder": {"color": "#000000"}}
+
+    importer = GalleryImporter(
+        AsyncMongoMockClient().db.gallery_imports,
+        InlinePool(),
+        compress=compress or default_compress,
+        validate=lambda data: (not data.startswith(b"bad"), "not an image"),
+        is_image_name=lambda name: name.lower().endswith((".jpg", ".png")),
+        **kwargs,
+    )
+    return importer, targets
+
+
+def prepare(importer, files, **overrides):
+    return asyncio.run(importer.prepare(make_archive(files), overrides))
+
+
+def test_manifest_hidden_files_and_order():
+    importer, _ = make_importer()
+    plan = prepare(importer, {
+        "manifest.json": json.dumps({"title": "Wedding", "date": "2024-05-01", "secret": "x"}),
+        "IMG_10.jpg": b"10",
+        "IMG_2.jpg": b"2",
+        "__MACOSX/._IMG_2.jpg": b"fork",
+        "notes.txt": b"ignored",
+    }, title="Reception")
+    try:
+        assert [info.filename for info in plan.members] == ["IMG_2.jpg", "IMG_10.jpg"]
+        assert plan.fields == {"title": "Reception", "date": "2024-05-01"}
+    finally:
+        plan.discard()
+
+
+@pytest.mark.parametrize("files, kwargs, message", [
+    ({"a.jpg": b"1", "b.jpg": b"2", "c.jpg": b"3"}, {"max_images": 2}, "Too many images"),
+    ({"a.jpg": b"x" * 20}, {"max_image_bytes": 10}, "too large"),
+    ({"notes.txt": b"x"}, {}, "no images"),
+    ({"a.jpg": b"1"}, {"max_archive_bytes": 10}, "Archive too large"),
+    ({"manifest.json": b"[1]", "a.jpg": b"1"}, {}, "JSON object"),
+])
+def test_archive_limits(files, kwargs, message):
+    importer, _ = make_importer(**kwargs)
+    with pytest.raises(InvalidGalleryImport, match=message):
+        prepare(importer, files, title="t", date="d")
+
+
+def test_not_a_zip():
+    importer, _ = make_importer()
+    with pytest.raises(InvalidGalleryImport, match="not a valid ZIP"):
+        asyncio.run(importer.prepare(io.BytesIO(b"plain text"), {"title": "t", "date": "d"}))
+
+
+def test_title_and_date_required():
+    importer, _ = make_importer()
+    with pytest.raises(InvalidGalleryImport, match="title and date"):
+        prepare(importer, {"a.jpg": b"1"}, title="t")
+
+
+def run_import(importer, plan):
+    created = []
+
+    async def create_event(fields):
+        created.append(fields)
+        return "event-1"
+
+    async def scenario():
+        import_id = await importer.start(plan, create_event)
+        await asyncio.gather(*importer._tasks.values())
+        return await importer.get(import_id)
+
+    return asyncio.run(scenario()), created
+
+
+def test_import_skips_bad_images():
+    importer, targets = make_importer()
+    plan = prepare(importer, {"a.jpg": b"one", "b.jpg": b"bad", "c.jpg": b"three"}, title="t", date="d")
+    status, created = run_import(importer, plan)
+
+    assert status["status"] == "completed"
+    assert (status["processed"], status["failed"]) == (2, 1)
+    assert status["event_id"] == "event-1"
+    [fields] = created
+    assert len(fields["images"]) == 2
+    assert fields["thumbnail"] == fields["images"][0]
+    assert len(fields["placeholders"]["images"]) == 2
+    # Three photos plus the thumbnail's copy share the budget
+    assert targets[0] * 4 / 3 * 4 < MAX_EVENT_BYTES
+
+
+def test_import_refuses_oversized_event():
+    def incompressible(image_bytes, target_size):
+        return b"x" * (MAX_EVENT_BYTES // 2), {}
+
+    importer, _ = make_importer(compress=incompressible)
+    plan = prepare(importer, {"a.jpg": b"1", "b.jpg": b"2"}, title="t", date="d")
+    status, created = run_import(importer, plan)
+
+    assert status["status"] == "failed"
+    assert created == []
+    assert "over the" in status["errors"][-1]
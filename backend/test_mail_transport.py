@@ -0,0 +1,129 @@
+import asyncio
+
+import httpx
+import pytest
+
+import mail_transport
+from mail_transport import CircuitBreaker, CircuitOpenError, MailTransport, MailTransportError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(mail_transport.time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_opens_and_probes_once(clock):
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open" and not breaker.allow()
+
+    clock.now += 30
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Only one probe at a time
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def make_transport(handler, **kwargs):
+    transport = MailTransport("https://mail.test", "key", **kwargs)
+    # Reuse the real client's settings, only routing requests to the handler
+    client = transport.client
+    transport._client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), base_url=client.base_url, headers=client.headers
+    )
+    return transport
+
+
+def send(transport, params=None):
+    return asyncio.run(transport.send(params or {"to": "a@example.com"}))
+
+
+def test_send_returns_provider_id():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"id": "email-1"})
+
+    transport = make_transport(handler)
+    assert send(transport) == "email-1"
+    assert seen[0].headers["authorization"] == "Bearer key"
+    assert transport.metrics.messages_sent == 1
+
+
+def test_rate_limit_carries_retry_after_and_keeps_the_circuit_closed():
+    transport = make_transport(lambda request: httpx.Response(429, headers={"retry-after": "7"}))
+    with pytest.raises(MailTransportError) as raised:
+        send(transport)
+    assert (raised.value.status_code, raised.value.retry_after) == (429, 7.0)
+    assert transport.breaker.failures == 0
+
+
+def test_server_errors_open_the_circuit():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503, text="down")
+
+    transport = make_transport(handler, failure_threshold=2)
+    for _ in range(2):
+        with pytest.raises(MailTransportError):
+            send(transport)
+    with pytest.raises(CircuitOpenError):
+        send(transport)
+    assert len(calls) == 2
+    assert transport.metrics.rejected_by_circuit == 1
+
+
+def test_network_errors_have_no_status():
+    def handler(request):
+        raise httpx.ConnectTimeout("timed out", request=request)
+
+    with pytest.raises(MailTransportError) as raised:
+        send(make_transport(handler))
+    assert raised.value.status_code is None
+
+
+def test_client_errors_do_not_count_against_the_circuit():
+    transport = make_transport(lambda request: httpx.Response(422, json={"message": "bad to"}), failure_threshold=1)
+    with pytest.raises(MailTransportError) as raised:
+        send(transport)
+    assert raised.value.status_code == 422
+    assert transport.breaker.state == "closed"
+
+
+def test_batch_sends_idempotency_key():
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(200, json={"data": [{"id": "1"}, {"id": "2"}]})
+
+    transport = make_transport(handler)
+
+    async def run():
+        return await transport.send_batch([{"to": "a"}, {"to": "b"}], idempotency_key="campaign-1")
+
+    assert asyncio.run(run()) == [{"id": "1"}, {"id": "2"}]
+    assert seen[0].headers["idempotency-key"] == "campaign-1"
+    assert transport.metrics.messages_sent == 2
@@ -0,0 +1,93 @@
+import asyncio
+
+from notifications import NotificationBroker
+
+
+async def collect(broker, last_event_id=None, count=1):
+    stream = broker.stream(last_event_id)
+    frames = [await stream.__anext__() for _ in range(count + 1)]
+    await stream.aclose()
+    # The first frame is the reconnect delay
+    assert frames[0] == "retry: 3000\n\n"
+    return frames[1:]
+
+
+def frame_id(frame):
+    return frame.split("\n")[0].removeprefix("id: ")
+
+
+def test_fresh_stream_sends_ready_with_current_id():
+    broker = NotificationBroker()
+    broker.publish("contact", {"id": "1"})
+    [frame] = asyncio.run(collect(broker))
+    assert "event: ready" in frame
+    assert frame_id(frame) == f"{broker.boot_id}-1"
+
+
+def test_reconnect_replays_missed_events():
+    broker = NotificationBroker()
+    for n in range(3):
+        broker.publish("contact", {"id": n})
+    frames = asyncio.run(collect(broker, f"{broker.boot_id}-1", count=2))
+    assert [frame_id(frame) for frame in frames] == [f"{broker.boot_id}-2", f"{broker.boot_id}-3"]
+
+
+def test_reconnect_when_up_to_date_sends_ready():
+    broker = NotificationBroker()
+    broker.publish("contact", {"id": 1})
+    [frame] = asyncio.run(collect(broker, f"{broker.boot_id}-1"))
+    assert "event: ready" in frame
+
+
+def test_id_from_another_process_resets():
+    broker = NotificationBroker()
+    broker.publish("contact", {"id": 1})
+    [frame] = asyncio.run(collect(broker, "deadbeef-1"))
+    assert "event: reset" in frame
+
+
+def test_id_older_than_history_resets():
+    broker = NotificationBroker(history=2)
+    for n in range(5):
+        broker.publish("contact", {"id": n})
+    [frame] = asyncio.run(collect(broker, f"{broker.boot_id}-1"))
+    assert "event: reset" in frame
+
+
+def test_malformed_id_resets():
+    broker = NotificationBroker()
+    [frame] = asyncio.run(collect(broker, f"{broker.boot_id}-abc"))
+    assert "event: reset" in frame
+
+
+def test_live_events_reach_subscribers():
+    broker = NotificationBroker()
+
+    async def scenario():
+        stream = broker.stream()
+        await stream.__anext__()
+        await stream.__anext__()
+        broker.publish("application", {"id": "a"})
+        frame = await stream.__anext__()
+        await stream.aclose()
+        return frame
+
+    frame = asyncio.run(scenario())
+    assert "event: application" in frame
+    assert broker.subscribers == 0
+
+
+def test_stalled_subscriber_is_dropped():
+    broker = NotificationBroker(queue_size=2)
+
+    async def scenario():
+        stream = broker.stream()
+        await stream.__anext__()
+        await stream.__anext__()
+        for n in range(3):
+            broker.publish("contact", {"id": n})
+        frames = [frame async for frame in stream]
+        return frames
+
+    assert asyncio.run(scenario()) == []
+    assert broker.dropped == 1
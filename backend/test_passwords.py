@@ -0,0 +1,69 @@
+import asyncio
+import threading
+
+import pytest
+
+from image_pool import ImagePoolBusy, ImageWorkerPool
+from passwords import PasswordHasher, PasswordHasherBusy
+
+
+def test_hash_and_verify():
+    hasher = PasswordHasher(rounds=4)
+
+    async def scenario():
+        hashed = await hasher.hash("secret")
+        return hashed, await hasher.verify("secret", hashed), await hasher.verify("wrong", hashed)
+
+    hashed, right, wrong = asyncio.run(scenario())
+    assert (right, wrong) == (True, False)
+    assert not hasher.needs_rehash(hashed)
+    assert PasswordHasher(rounds=5).needs_rehash(hashed)
+    hasher.shutdown()
+
+
+def test_malformed_hash_does_not_verify():
+    hasher = PasswordHasher(rounds=4)
+    assert asyncio.run(hasher.verify("secret", "not-a-hash")) is False
+    assert hasher.needs_rehash("not-a-hash")
+    hasher.shutdown()
+
+
+def test_hasher_rejects_beyond_max_pending():
+    hasher = PasswordHasher(rounds=4, max_workers=1, max_pending=2)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = [asyncio.ensure_future(hasher._run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash("secret")
+        release.set()
+        await asyncio.gather(*blocked)
+
+    asyncio.run(scenario())
+    assert hasher.rejected == 1
+    assert hasher.in_flight == 0
+    hasher.shutdown()
+
+
+def test_image_pool_rejects_requests_but_queues_background_jobs():
+    pool = ImageWorkerPool(max_workers=1, max_pending=1)
+    release = threading.Event()
+
+    async def scenario():
+        blocked = asyncio.ensure_future(pool.run(release.wait))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ImagePoolBusy):
+            await pool.run(sum, [1, 2])
+        background = asyncio.ensure_future(pool.run_background(sum, [1, 2]))
+        await asyncio.sleep(0.01)
+        depth = pool.queue_depth
+        release.set()
+        await blocked
+        return depth, await background
+
+    depth, total = asyncio.run(scenario())
+    assert (depth, total) == (1, 3)
+    snapshot = pool.snapshot()
+    assert (snapshot["rejected"], snapshot["completed"], snapshot["in_flight"]) == (1, 2, 0)
+    pool.shutdown()
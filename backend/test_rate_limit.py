@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+import rate_limit
+from rate_limit import InMemoryRateLimiter, MongoRateLimiter, RatePolicy, sliding_count, sliding_retry_after
+
+POLICY = RatePolicy("submit", 3, 100)
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock(1000.0)
+    monkeypatch.setattr(rate_limit.time, "time", clock)
+    return clock
+
+
+def hits(limiter, count, key="1.2.3.4"):
+    async def run():
+        return [await limiter.hit(key, POLICY) for _ in range(count)]
+    return asyncio.run(run())
+
+
+def test_parse():
+    policy = RatePolicy.parse("submit", "3/3600")
+    assert (policy.limit, policy.window_seconds) == (3, 3600)
+
+
+def test_previous_window_decays():
+    assert sliding_count(10, 0, 0, 0, 100) == 10
+    assert sliding_count(10, 2, 0, 75, 100) == pytest.approx(4.5)
+
+
+def test_retry_after_when_previous_window_blocks():
+    # 6 * (1 - fraction) < 3 once half the window has passed
+    assert sliding_retry_after(6, 0, 0, 10, POLICY) == pytest.approx(40)
+
+
+def test_retry_after_when_current_window_is_full():
+    # Only the next window's decay frees a slot: 3 * (1 - fraction) < 3 right after it starts,
+    # 6 * (1 - fraction) < 3 half way through it
+    assert sliding_retry_after(0, 3, 0, 10, POLICY) == pytest.approx(90)
+    assert sliding_retry_after(0, 6, 0, 10, POLICY) == pytest.approx(140)
+
+
+@pytest.mark.parametrize("make_limiter", [
+    lambda: InMemoryRateLimiter(),
+    lambda: MongoRateLimiter(AsyncMongoMockClient().db.rate_limits),
+])
+def test_limit_and_retry_after(clock, make_limiter):
+    limiter = make_limiter()
+    results = hits(limiter, 4)
+    assert [allowed for allowed, _ in results] == [True, True, True, False]
+    retry_after = results[-1][1]
+    assert retry_after == pytest.approx(100)
+
+    # Blocked just before Retry-After, allowed right after it
+    clock.now += retry_after - 1
+    assert hits(limiter, 1)[0][0] is False
+    clock.now += 2
+    assert hits(limiter, 1)[0][0] is True
+
+
+def test_keys_are_independent(clock):
+    limiter = InMemoryRateLimiter()
+    hits(limiter, 3, key="a")
+    assert hits(limiter, 1, key="b")[0][0] is True
+
+
+def test_rejected_requests_do_not_use_quota(clock):
+    limiter = MongoRateLimiter(AsyncMongoMockClient().db.rate_limits)
+    hits(limiter, 10)
+    doc = asyncio.run(limiter.collection.find_one({}))
+    assert doc["count"] == 3
+
+
+def test_lru_bound_and_sweep(clock):
+    limiter = InMemoryRateLimiter(max_keys=2)
+    for key in ("a", "b", "c"):
+        hits(limiter, 1, key=key)
+    assert len(limiter) == 2
+
+    clock.now += 2 * POLICY.window_seconds
+    assert limiter.sweep() == 2
+    assert len(limiter) == 0
@@ -0,0 +1,121 @@
+import asyncio
+import re
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from spam_rules import DEFAULT_RULES, CompiledRules, SpamScorer, validate_rule
+
+
+def legacy_is_spam(name, email, message, subject):
+    """The detect_spam_content the default rules replaced"""
+    spam_keywords = [
+        'viagra', 'casino', 'lottery', 'winner', 'congratulations',
+        'million dollars', 'click here', 'buy now', 'limited time',
+        'crypto', 'bitcoin', 'investment opportunity', 'make money fast'
+    ]
+    content = f"{name} {email} {subject} {message}".lower()
+    spam_score = sum(1 for keyword in spam_keywords if keyword in content)
+    if len([c for c in message if c.isupper()]) > len(message) * 0.7:
+        spam_score += 1
+    if message.count('http://') + message.count('https://') > 2:
+        spam_score += 2
+    if re.search(r'(.)\1{4,}', message):
+        spam_score += 1
+    return spam_score >= 2
+
+
+@pytest.mark.parametrize("name, email, subject, message", [
+    ("Ann", "ann@example.com", "Wedding", "We would like a quote for 120 guests."),
+    ("Bob", "bob@example.com", "WINNER", "Congratulations, click here"),
+    ("Cy", "cy@example.com", "Hi", "aAaAa mixed case run, buy now"),
+    ("Di", "di@example.com", "Hi", "Sooooo excited, buy now"),
+    ("Ed", "ed@example.com", "Links", "http://a https://b http://c"),
+    ("Fay", "fay@example.com", "Shout", "PLEASE CALL ME BACK TODAY"),
+    ("Gus", "gus@crypto.example", "Hi", "BITCOIN bitcoin"),
+])
+def test_default_rules_match_the_old_detector(name, email, subject, message):
+    scorer = SpamScorer(collection=None)
+    assert scorer.is_spam(scorer.score(name, email, subject, message)) == legacy_is_spam(name, email, message, subject)
+
+
+def test_regex_rules_are_case_sensitive_unless_asked():
+    rules = CompiledRules([
+        {"kind": "regex", "pattern": "free", "weight": 1.0},
+        {"kind": "regex", "pattern": "offer", "weight": 2.0, "ignore_case": True},
+    ])
+    assert rules.score("", "", "", "FREE OFFER") == 2.0
+    assert rules.score("", "", "", "free offer") == 3.0
+
+
+def test_keywords_count_once_and_overlap():
+    rules = CompiledRules([
+        {"kind": "keyword", "pattern": "buy", "weight": 1.0},
+        {"kind": "keyword", "pattern": "buy now", "weight": 2.0},
+    ])
+    assert rules.score("", "", "", "Buy now! buy now!") == 3.0
+
+
+def test_disabled_rules_are_skipped():
+    rules = CompiledRules([{"kind": "keyword", "pattern": "casino", "enabled": False}])
+    assert rules.score("", "", "", "casino") == 0.0
+
+
+def test_batch_scores_match_single_scores():
+    rules = CompiledRules(DEFAULT_RULES)
+    docs = [
+        {"name": "A", "email": "a@x", "subject": "s", "message": "buy now, click here"},
+        {"name": "B", "email": "b@x", "subject": "s", "message": "hello"},
+    ]
+    batch = rules.score_batch(docs)
+    assert list(batch) == [rules.score(d["name"], d["email"], d["subject"], d["message"]) for d in docs]
+
+
+def test_validate_rule():
+    assert validate_rule({"kind": "regex", "pattern": "("}).startswith("Invalid regex")
+    assert validate_rule({"kind": "keyword"}) == "pattern is required"
+    assert validate_rule({"kind": "bayes"}).startswith("kind must be one of")
+    assert validate_rule({"kind": "regex", "pattern": "a+"}) is None
+
+
+def test_rescore_writes_only_changed_contacts():
+    db = AsyncMongoMockClient().db
+    scorer = SpamScorer(db.spam_rules, threshold=2.0)
+
+    async def scenario():
+        await scorer.seed_defaults()
+        await scorer.seed_defaults()
+        await scorer.load()
+        await db.contacts.insert_many([
+            # Flag and score already right - left alone
+            {"_id": 1, "name": "A", "email": "a@x", "subject": "s", "message": "hello", "is_flagged": False, "spam_score": 0.0},
+            # Spam that was never flagged
+            {"_id": 2, "name": "B", "email": "b@x", "subject": "s", "message": "buy now, click here", "is_flagged": False},
+            # Right flag, but stored before scores were kept
+            {"_id": 3, "name": "C", "email": "c@x", "subject": "s", "message": "hi", "is_flagged": False},
+        ])
+        result = await scorer.rescore_contacts(db.contacts, batch_size=2)
+        docs = {doc["_id"]: doc for doc in await db.contacts.find().to_list(None)}
+        return await db.spam_rules.count_documents({}), result, docs
+
+    rule_count, result, docs = asyncio.run(scenario())
+    assert rule_count == len(DEFAULT_RULES)
+    assert result == {"scanned": 3, "changed": 2}
+    assert "updated_at" not in docs[1]
+    assert docs[2]["is_flagged"] is True and docs[2]["spam_score"] == 2.0
+    assert docs[3]["spam_score"] == 0.0
+
+
+def test_reload_picks_up_rule_edits():
+    db = AsyncMongoMockClient().db
+    scorer = SpamScorer(db.spam_rules)
+
+    async def scenario():
+        await scorer.seed_defaults()
+        await scorer.load()
+        unchanged = await scorer.reload_if_changed()
+        await db.spam_rules.insert_one({"kind": "keyword", "pattern": "discount", "weight": 5.0})
+        return unchanged, await scorer.reload_if_changed()
+
+    assert asyncio.run(scenario()) == (False, True)
+    assert scorer.score("", "", "", "discount") == 5.0
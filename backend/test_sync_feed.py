@@ -0,0 +1,88 @@
+import asyncio
+import datetime
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from sync_feed import InvalidSyncRequest, SyncFeed, decode_token, encode_token
+
+
+def make_feed(**kwargs):
+    db = AsyncMongoMockClient().db
+    return db, SyncFeed({"contacts": db.contacts}, db.tombstones, **kwargs)
+
+
+def test_token_round_trip():
+    moment = datetime.datetime(2024, 5, 1, 12, 30, 15, 250000)
+    assert decode_token(encode_token(moment)) == moment
+
+
+def test_invalid_token():
+    with pytest.raises(InvalidSyncRequest):
+        decode_token("yesterday")
+
+
+def test_first_sync_asks_for_reload():
+    _, feed = make_feed()
+    result = asyncio.run(feed.changes(None))
+    assert result["reset"] is True
+    assert result["token"]
+
+
+def test_unknown_collection():
+    _, feed = make_feed()
+    with pytest.raises(InvalidSyncRequest):
+        asyncio.run(feed.changes(None, ["contacts", "passwords"]))
+
+
+def test_changes_and_deletes_since_token():
+    db, feed = make_feed(overlap_seconds=0)
+    now = datetime.datetime.utcnow()
+
+    async def scenario():
+        token = encode_token(now - datetime.timedelta(minutes=1))
+        await db.contacts.insert_one({"_id": "old", "updated_at": now - datetime.timedelta(hours=1)})
+        await db.contacts.insert_one({"_id": "new", "updated_at": now})
+        await feed.record_deleted("contacts", ["gone"])
+        return await feed.changes(token)
+
+    result = asyncio.run(scenario())
+    assert result["reset"] is False
+    assert [doc["_id"] for doc in result["changes"]["contacts"]] == ["new"]
+    assert result["deleted"] == {"contacts": ["gone"]}
+
+
+def test_token_is_handed_out_in_the_past():
+    _, feed = make_feed(overlap_seconds=5)
+    issued = decode_token(feed.current_token())
+    assert issued <= datetime.datetime.utcnow() - datetime.timedelta(seconds=4)
+
+
+def test_token_older_than_retention_resets():
+    _, feed = make_feed(retention_days=1)
+    token = encode_token(datetime.datetime.utcnow() - datetime.timedelta(days=2))
+    assert asyncio.run(feed.changes(token))["reset"] is True
+
+
+def test_large_delta_resets():
+    db, feed = make_feed(limit=2)
+    now = datetime.datetime.utcnow()
+
+    async def scenario():
+        await db.contacts.insert_many([{"updated_at": now} for _ in range(3)])
+        return await feed.changes(encode_token(now - datetime.timedelta(minutes=1)))
+
+    result = asyncio.run(scenario())
+    assert result["reset"] is True
+    assert result["changes"] == {}
+
+
+def test_many_deletes_reset():
+    _, feed = make_feed(limit=2)
+    token = encode_token(datetime.datetime.utcnow() - datetime.timedelta(minutes=1))
+
+    async def scenario():
+        await feed.record_deleted("contacts", ["a", "b", "c"], reason="archived")
+        return await feed.changes(token)
+
+    assert asyncio.run(scenario())["reset"] is True
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+
+from verification_store import (
+    EXPIRED,
+    INVALID,
+    MISSING,
+    VERIFIED,
+    MemoryVerificationStore,
+    MongoVerificationStore,
+)
+
+EMAIL = "admin@example.com"
+
+
+@pytest.fixture(params=["memory", "mongo"])
+def store(request):
+    if request.param == "memory":
+        return MemoryVerificationStore(max_attempts=3)
+    return MongoVerificationStore(AsyncMongoMockClient().db.verification_codes, max_attempts=3)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_code_logs_in_once(store):
+    async def scenario():
+        await store.issue(EMAIL, "123456", "Admin", 300)
+        return await store.consume(EMAIL, "123456"), await store.consume(EMAIL, "123456")
+
+    assert run(scenario()) == (VERIFIED, MISSING)
+
+
+def test_missing_code(store):
+    assert run(store.consume(EMAIL, "123456")) == MISSING
+
+
+def test_expired_code(store):
+    async def scenario():
+        await store.issue(EMAIL, "123456", "Admin", -1)
+        return await store.consume(EMAIL, "123456"), await store.consume(EMAIL, "123456")
+
+    assert run(scenario()) == (EXPIRED, MISSING)
+
+
+def test_attempts_are_capped(store):
+    async def scenario():
+        await store.issue(EMAIL, "123456", "Admin", 300)
+        wrong = [await store.consume(EMAIL, "000000") for _ in range(3)]
+        return wrong, await store.consume(EMAIL, "123456")
+
+    wrong, right = run(scenario())
+    assert wrong == [INVALID] * 3
+    assert right == MISSING
+
+
+def test_parallel_guesses_are_capped(store):
+    async def scenario():
+        await store.issue(EMAIL, "123456", "Admin", 300)
+        guesses = [f"{n:06d}" for n in range(10)] + ["123456"]
+        return await asyncio.gather(*(store.consume(EMAIL, guess) for guess in guesses))
+
+    outcomes = run(scenario())
+    # The correct code came after the three allowed attempts were used up
+    assert VERIFIED not in outcomes
+
+
+def test_reissue_resets_attempts(store):
+    async def scenario():
+        await store.issue(EMAIL, "123456", "Admin", 300)
+        await store.consume(EMAIL, "000000")
+        await store.consume(EMAIL, "000000")
+        await store.issue(EMAIL, "654321", "Admin", 300)
+        await store.consume(EMAIL, "000000")
+        return await store.consume(EMAIL, "654321")
+
+    assert run(scenario()) == VERIFIED
+
+
+def test_exhausted_code_does_not_delete_reissued_one():
+    store = MongoVerificationStore(AsyncMongoMockClient().db.verification_codes, max_attempts=1)
+
+    async def scenario():
+        await store.issue(EMAIL, "123456", "Admin", 300)
+        await store.consume(EMAIL, "000000")
+        await store.issue(EMAIL, "654321", "Admin", 300)
+        return await store.consume(EMAIL, "654321")
+
+    assert run(scenario()) == VERIFIED
+
+
+def test_cleanup_removes_expired(store):
+    async def scenario():
+        await store.issue(EMAIL, "123456", "Admin", -1)
+        await store.issue("other@example.com", "123456", "Admin", 300)
+        return await store.cleanup()
+
+    assert run(scenario()) == 1
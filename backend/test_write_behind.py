@@ -0,0 +1,185 @@
+import asyncio
+
+from bson import ObjectId, json_util
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import BulkWriteError
+
+from write_behind import ContactWriteBehind
+
+
+def make_queue(tmp_path, collection=None, **kwargs):
+    collection = collection if collection is not None else AsyncMongoMockClient().db.contacts
+    return ContactWriteBehind(collection, str(tmp_path / "contacts.log"), **kwargs)
+
+
+class FlakyCollection:
+    """Fails inserts until ``up`` is set, like MongoDB during an outage"""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.up = False
+
+    async def insert_many(self, docs, ordered=True):
+        if not self.up:
+            raise ConnectionError("MongoDB unavailable")
+        return await self.collection.insert_many(docs, ordered=ordered)
+
+
+class PickyCollection:
+    """Rejects documents named "bad" like a schema validator, inserts the rest"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def insert_many(self, docs, ordered=True):
+        errors = [
+            {"index": index, "code": 121, "errmsg": "Document failed validation"}
+            for index, doc in enumerate(docs) if doc.get("name") == "bad"
+        ]
+        good = [doc for doc in docs if doc.get("name") != "bad"]
+        if good:
+            await self.collection.insert_many(good, ordered=ordered)
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(good)})
+
+
+def test_append_is_durable_before_flush(tmp_path):
+    queue = make_queue(tmp_path, flush_interval=60)
+
+    async def scenario():
+        await queue.start()
+        doc_id = await queue.append({"name": "Ana"})
+        on_disk = (tmp_path / "contacts-0.log").read_text()
+        in_db = await queue.collection.count_documents({})
+        await queue.stop()
+        return doc_id, on_disk, in_db, await queue.collection.find_one({})
+
+    doc_id, on_disk, in_db, stored = asyncio.run(scenario())
+    assert str(doc_id) in on_disk
+    assert in_db == 0
+    assert stored["_id"] == doc_id
+    assert "updated_at" in stored
+
+
+def test_concurrent_appends_share_a_sync(tmp_path):
+    queue = make_queue(tmp_path, flush_interval=60)
+
+    async def scenario():
+        await queue.start()
+        ids = await asyncio.gather(*(queue.append({"n": n}) for n in range(20)))
+        await queue.flush()
+        count = await queue.collection.count_documents({})
+        await queue.stop()
+        return ids, count
+
+    ids, count = asyncio.run(scenario())
+    assert len(set(ids)) == 20
+    assert count == 20
+    assert queue.flushed_total == 20
+
+
+def test_replay_after_crash_is_idempotent(tmp_path):
+    collection = AsyncMongoMockClient().db.contacts
+    already = {"_id": ObjectId(), "name": "flushed before the crash"}
+    pending = {"_id": ObjectId(), "name": "only on disk"}
+    # The previous process died after inserting the first record but before deleting the log
+    (tmp_path / "contacts.log").write_text(
+        json_util.dumps(already) + "\n" + json_util.dumps(pending) + "\n" + '{"torn": '
+    )
+
+    async def scenario():
+        await collection.insert_one(dict(already))
+        queue = make_queue(tmp_path, collection)
+        await queue.start()
+        await queue.stop()
+        return await collection.find({}).sort("name", 1).to_list(None)
+
+    docs = asyncio.run(scenario())
+    assert [doc["_id"] for doc in docs] == [already["_id"], pending["_id"]]
+    assert not list(tmp_path.glob("*.seg"))
+
+
+def test_start_survives_mongo_outage(tmp_path):
+    collection = FlakyCollection(AsyncMongoMockClient().db.contacts)
+    (tmp_path / "contacts.log").write_text(json_util.dumps({"_id": ObjectId(), "name": "Ana"}) + "\n")
+
+    async def scenario():
+        queue = make_queue(tmp_path, collection, flush_interval=0.01)
+        await queue.start()
+        segments_while_down = len(list(tmp_path.glob("*.seg")))
+        collection.up = True
+        await queue.flush()
+        await queue.stop()
+        return segments_while_down, await collection.collection.count_documents({})
+
+    segments_while_down, count = asyncio.run(scenario())
+    assert segments_while_down == 1
+    assert count == 1
+    assert not list(tmp_path.glob("*.seg"))
+
+
+def test_processes_sharing_a_path_get_their_own_slots(tmp_path):
+    collection = AsyncMongoMockClient().db.contacts
+    first, second = make_queue(tmp_path, collection), make_queue(tmp_path, collection)
+
+    async def scenario():
+        await first.start()
+        await second.start()
+        paths = first.log_path, second.log_path
+        await first.append({"name": "Ana"})
+        await second.append({"name": "Ben"})
+        await first.stop()
+        await second.stop()
+        return paths, await collection.count_documents({})
+
+    paths, count = asyncio.run(scenario())
+    assert paths == (str(tmp_path / "contacts-0.log"), str(tmp_path / "contacts-1.log"))
+    assert count == 2
+
+
+def test_orphaned_slot_is_adopted(tmp_path):
+    collection = AsyncMongoMockClient().db.contacts
+    # Written by a second worker that no longer runs
+    (tmp_path / "contacts-1.log").write_text(json_util.dumps({"_id": ObjectId(), "name": "Ana"}) + "\n")
+    (tmp_path / "contacts-1.log.lock").touch()
+
+    async def scenario():
+        queue = make_queue(tmp_path, collection)
+        await queue.start()
+        await queue.stop()
+        return queue.log_path, await collection.count_documents({})
+
+    log_path, count = asyncio.run(scenario())
+    assert log_path == str(tmp_path / "contacts-0.log")
+    assert count == 1
+    assert not (tmp_path / "contacts-1.log").exists()
+
+
+def test_rejected_record_is_dead_lettered(tmp_path):
+    collection = PickyCollection(AsyncMongoMockClient().db.contacts)
+    queue = make_queue(tmp_path, collection, flush_interval=60, max_record_failures=2)
+
+    async def scenario():
+        await queue.start()
+        await queue.append({"name": "good"})
+        bad_id = await queue.append({"name": "bad"})
+        outcomes = []
+        for _ in range(2):
+            try:
+                await queue.flush()
+                outcomes.append("ok")
+            except RuntimeError:
+                outcomes.append("retry")
+        await queue.append({"name": "later"})
+        await queue.flush()
+        await queue.stop()
+        names = sorted(doc["name"] for doc in await collection.collection.find({}).to_list(None))
+        return bad_id, outcomes, names
+
+    bad_id, outcomes, names = asyncio.run(scenario())
+    assert outcomes == ["retry", "ok"]
+    assert names == ["good", "later"]
+    assert queue.dead_lettered == 1
+    [dead] = (tmp_path / "contacts-0.log.dead").read_text().splitlines()
+    assert json_util.loads(dead)["record"]["_id"] == bad_id
+    assert not list(tmp_path.glob("*.seg"))
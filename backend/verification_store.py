@@ -0,0 +1,116 @@
+"""Storage for admin 2FA verification codes.
+
+``MongoVerificationStore`` lets any worker verify a code issued by another,
+survives restarts and lets a TTL index expire codes. Each guess atomically
+takes one of ``max_attempts`` attempts before the code is compared, and a
+correct code is consumed atomically, so a code can only ever log in once.
+``MemoryVerificationStore`` keeps the same interface for single-process dev.
+"""
+import datetime
+from typing import Any, Dict, Optional
+
+from pymongo import ReturnDocument
+
+# consume() outcomes
+VERIFIED = "verified"
+MISSING = "missing"
+EXPIRED = "expired"
+INVALID = "invalid"
+
+
+class MemoryVerificationStore:
+    """Process-local codes - only correct with a single worker"""
+
+    def __init__(self, max_attempts: int = 5):
+        self.max_attempts = max_attempts
+        self._codes: Dict[str, Dict[str, Any]] = {}
+
+    async def ensure_indexes(self):
+        pass
+
+    async def issue(self, email: str, code: str, admin_name: str, ttl_seconds: int):
+        self._codes[email] = {
+            "code": code,
+            "admin_name": admin_name,
+            "attempts": 0,
+            "expires_at": datetime.datetime.utcnow() + datetime.timedelta(seconds=ttl_seconds),
+        }
+
+    async def consume(self, email: str, code: str) -> str:
+        entry = self._codes.get(email)
+        if entry is None:
+            return MISSING
+        if datetime.datetime.utcnow() > entry["expires_at"]:
+            del self._codes[email]
+            return EXPIRED
+        # Counted like the Mongo store: every guess takes an attempt
+        entry["attempts"] += 1
+        if entry["code"] != code:
+            if entry["attempts"] >= self.max_attempts:
+                del self._codes[email]
+            return INVALID
+        del self._codes[email]
+        return VERIFIED
+
+    async def cleanup(self) -> int:
+        now = datetime.datetime.utcnow()
+        expired = [email for email, entry in self._codes.items() if now > entry["expires_at"]]
+        for email in expired:
+            del self._codes[email]
+        return len(expired)
+
+
+class MongoVerificationStore:
+    """Codes shared by every worker, one document per admin email"""
+
+    def __init__(self, collection, max_attempts: int = 5):
+        self.collection = collection
+        self.max_attempts = max_attempts
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def issue(self, email: str, code: str, admin_name: str, ttl_seconds: int):
+        # A new request replaces any outstanding code for the same admin
+        await self.collection.replace_one(
+            {"_id": email},
+            {
+                "code": code,
+                "admin_name": admin_name,
+                "attempts": 0,
+                "expires_at": datetime.datetime.utcnow() + datetime.timedelta(seconds=ttl_seconds),
+            },
+            upsert=True
+        )
+
+    async def consume(self, email: str, code: str) -> str:
+        now = datetime.datetime.utcnow()
+        # Every guess, right or wrong, takes an attempt before the code is compared, so
+        # parallel guesses are capped at max_attempts between them
+        entry: Optional[Dict[str, Any]] = await self.collection.find_one_and_update(
+            {"_id": email, "expires_at": {"$gt": now}, "attempts": {"$lt": self.max_attempts}},
+            {"$inc": {"attempts": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+        if entry is None:
+            # Missing, expired or out of attempts - work out which
+            entry = await self.collection.find_one({"_id": email})
+            if entry is None:
+                return MISSING
+            # The filters match this exact code, so a code re-issued meanwhile is never deleted
+            await self.collection.delete_one({"_id": email, "code": entry["code"]})
+            # The TTL monitor runs about once a minute, so expiry is checked here too
+            return EXPIRED if entry["expires_at"] <= now else INVALID
+
+        if entry["code"] != code:
+            if entry["attempts"] >= self.max_attempts:
+                await self.collection.delete_one({"_id": email, "code": entry["code"]})
+            return INVALID
+
+        # Only one of two concurrent correct guesses gets to delete the code
+        result = await self.collection.delete_one({"_id": email, "code": code})
+        return VERIFIED if result.deleted_count else MISSING
+
+    async def cleanup(self) -> int:
+        result = await self.collection.delete_many({"expires_at": {"$lte": datetime.datetime.utcnow()}})
+        return result.deleted_count
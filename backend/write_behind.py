@@ -0,0 +1,331 @@
+"""Durable write-behind queue for contact form submissions.
+
+Submissions are appended to a local fsync'd append-only log and acknowledged
+as soon as they are on disk. A background task rotates the log into segments
+and flushes them to MongoDB with ``insert_many``. Every record carries its
+``_id`` from the start, so replaying a segment after a crash is idempotent.
+
+``updated_at`` is stamped when a batch is inserted, not when it was
+logged, so the sync feed's "changed since" queries see the document once it
+is actually in MongoDB, however long the flush was delayed.
+
+Segments are owned by one writer, so each process claims a slot: the log
+path gets a ``-<n>`` suffix (``contacts.log`` -> ``contacts-0.log``), held
+through an exclusive ``flock`` on ``<slot path>.lock``. Several workers
+sharing one configured path therefore never write or replay each other's
+files. At startup a process also adopts the segments of slots no live
+process holds, e.g. after scaling down from more workers.
+
+MongoDB rejecting a record (rather than being unreachable) counts against
+that record. After ``max_record_failures`` rejections it is appended to
+``<slot path>.dead`` and dropped from its segment, so one bad record cannot
+hold back the others forever.
+"""
+import asyncio
+import datetime
+import fcntl
+import glob
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId, json_util
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ContactWriteBehind:
+    """Append-only log in front of a collection, flushed in batches"""
+
+    def __init__(
+        self,
+        collection,
+        log_path: str,
+        batch_size: int = 200,
+        flush_interval: float = 1.0,
+        max_record_failures: int = 5,
+        max_slots: int = 64,
+    ):
+        self.collection = collection
+        # The configured path; the slot this process holds is log_path once started
+        self.base_path = log_path
+        self.log_path = log_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_record_failures = max_record_failures
+        self.max_slots = max_slots
+        self.unflushed = 0
+        self.flushed_total = 0
+        self.dead_lettered = 0
+        self._file = None
+        self._lock_fd: Optional[int] = None
+        # _id -> rejections so far, for records still in a segment
+        self._failures: Dict[Any, int] = {}
+        self._file_lock = asyncio.Lock()
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._syncing = False
+        # Held so the running group commit cannot be garbage-collected mid-write
+        self._sync_task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Replay anything left on disk by a previous run, then start flushing"""
+        directory = os.path.dirname(self.base_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        for slot in range(self.max_slots):
+            self._lock_fd = self._try_lock(self._slot_path(slot))
+            if self._lock_fd is not None:
+                self.log_path = self._slot_path(slot)
+                break
+        else:
+            raise RuntimeError(f"All {self.max_slots} contact log slots next to {self.base_path} are in use")
+
+        self._recover_active_log(self.log_path)
+        self._adopt_orphans()
+        self._file = open(self.log_path, "a", encoding="utf-8")
+
+        segments = self._segments()
+        if segments:
+            logger.info(f"Replaying {len(segments)} contact log segment(s) from {self.log_path}")
+            try:
+                await self._flush_segments()
+            except Exception as e:
+                # MongoDB being down at boot is the outage this queue absorbs - start
+                # anyway and let the flush loop retry the segments
+                logger.error(f"Contact log replay failed, retrying in the background: {e}")
+
+        self._task = asyncio.create_task(self._flush_forever())
+
+    async def stop(self):
+        """Flush everything still in the log and close it"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Contact log flush on shutdown failed, will replay on restart: {e}")
+
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    async def append(self, doc: Dict[str, Any]) -> ObjectId:
+        """Durably append a document; returns once it has been fsync'd"""
+        doc.setdefault("_id", ObjectId())
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((json_util.dumps(doc), future))
+
+        # Group commit - concurrent submissions share a single write + fsync
+        if not self._syncing:
+            self._syncing = True
+            self._sync_task = asyncio.create_task(self._sync_pending())
+
+        await future
+        return doc["_id"]
+
+    async def flush(self):
+        """Rotate the active log and insert every segment into the collection"""
+        async with self._file_lock:
+            if self.unflushed:
+                self._rotate()
+        await self._flush_segments()
+
+    async def _sync_pending(self):
+        try:
+            while self._pending:
+                batch, self._pending = self._pending, []
+                try:
+                    async with self._file_lock:
+                        await asyncio.to_thread(self._write_lines, [line for line, _ in batch])
+                except Exception as e:
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
+
+                self.unflushed += len(batch)
+                if self.unflushed >= self.batch_size:
+                    self._wake.set()
+        finally:
+            self._syncing = False
+
+    def _write_lines(self, lines: List[str]):
+        self._file.write("".join(line + "\n" for line in lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _rotate(self):
+        self._file.close()
+        os.replace(self.log_path, self._segment_path())
+        self._file = open(self.log_path, "a", encoding="utf-8")
+        self.unflushed = 0
+
+    def _slot_path(self, slot: int) -> str:
+        root, ext = os.path.splitext(self.base_path)
+        return f"{root}-{slot}{ext}"
+
+    @staticmethod
+    def _try_lock(log_path: str) -> Optional[int]:
+        """Exclusive, non-blocking lock on a slot; released when the fd closes or the process dies"""
+        fd = os.open(f"{log_path}.lock", os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        return fd
+
+    def _recover_active_log(self, log_path: str):
+        # A non-empty active log means its process stopped before rotating it
+        if os.path.exists(log_path) and os.path.getsize(log_path) > 0:
+            os.replace(log_path, self._segment_path(log_path))
+
+    def _adopt_orphans(self):
+        """Take over segments of slots no live process holds, e.g. after scaling down"""
+        root, ext = os.path.splitext(self.base_path)
+        slots = sorted(path[:-len(".lock")] for path in glob.glob(f"{glob.escape(root)}-*{glob.escape(ext)}.lock"))
+        # The configured path itself holds logs written before slots existed
+        for log_path in [self.base_path] + slots:
+            if log_path == self.log_path:
+                continue
+            fd = self._try_lock(log_path)
+            if fd is None:
+                continue
+            try:
+                self._recover_active_log(log_path)
+                segments = self._segments(log_path)
+                for segment in segments:
+                    os.replace(segment, self._segment_path())
+                if segments:
+                    logger.info(f"Adopted {len(segments)} contact log segment(s) from {log_path}")
+            finally:
+                os.close(fd)
+
+    def _segment_path(self, log_path: Optional[str] = None) -> str:
+        return f"{log_path or self.log_path}.{time.time_ns()}.seg"
+
+    def _segments(self, log_path: Optional[str] = None) -> List[str]:
+        return sorted(glob.glob(f"{glob.escape(log_path or self.log_path)}.*.seg"))
+
+    @staticmethod
+    def _read_segment(path: str) -> List[Dict[str, Any]]:
+        docs = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    docs.append(json_util.loads(line))
+                except ValueError:
+                    # Only a torn final write can produce this; it was never acknowledged
+                    logger.warning(f"Skipping unreadable record {path}:{line_number}")
+        return docs
+
+    async def _flush_segments(self):
+        for path in self._segments():
+            docs = await asyncio.to_thread(self._read_segment, path)
+            rejected: List[Tuple[Dict[str, Any], str]] = []
+            for start in range(0, len(docs), self.batch_size):
+                rejected += await self._insert(docs[start:start + self.batch_size])
+            self.flushed_total += len(docs) - len(rejected)
+            if rejected:
+                retry = await self._handle_rejected(path, rejected)
+                if retry:
+                    raise RuntimeError(f"MongoDB rejected {len(retry)} contact record(s): {rejected[0][1]}")
+            os.remove(path)
+            if self._failures:
+                for doc in docs:
+                    self._failures.pop(doc["_id"], None)
+
+    async def _handle_rejected(self, path: str, rejected: List[Tuple[Dict[str, Any], str]]) -> List[Dict[str, Any]]:
+        """Dead-letter records rejected too often; returns the rest, left in the segment for the next pass"""
+        retry, dead = [], []
+        for doc, error in rejected:
+            failures = self._failures.get(doc["_id"], 0) + 1
+            if failures >= self.max_record_failures:
+                self._failures.pop(doc["_id"], None)
+                dead.append({"record": doc, "error": error, "dead_lettered_at": datetime.datetime.utcnow()})
+            else:
+                self._failures[doc["_id"]] = failures
+                retry.append(doc)
+
+        if dead:
+            await asyncio.to_thread(self._append_lines, f"{self.log_path}.dead", [json_util.dumps(entry) for entry in dead])
+            self.dead_lettered += len(dead)
+            logger.error(f"Moved {len(dead)} contact record(s) MongoDB keeps rejecting to {self.log_path}.dead")
+        if retry:
+            # Everything else in the segment is in MongoDB now; keep only what still has to go
+            await asyncio.to_thread(self._rewrite_segment, path, [json_util.dumps(doc) for doc in retry])
+        return retry
+
+    @staticmethod
+    def _append_lines(path: str, lines: List[str]):
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+
+    @staticmethod
+    def _rewrite_segment(path: str, lines: List[str]):
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, path)
+
+    async def _insert(self, docs: List[Dict[str, Any]]) -> List[Tuple[Dict[str, Any], str]]:
+        """Insert a batch; returns the records MongoDB rejected, with the reason"""
+        if not docs:
+            return []
+        inserted_at = datetime.datetime.utcnow()
+        for doc in docs:
+            doc["updated_at"] = inserted_at
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            # Duplicates were already inserted by an earlier, interrupted flush
+            return [
+                (docs[err["index"]], err.get("errmsg", str(err.get("code"))))
+                for err in e.details.get("writeErrors", [])
+                if err.get("code") != DUPLICATE_KEY_ERROR
+            ]
+        return []
+
+    async def _flush_forever(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Records stay in their segment and are retried on the next pass
+                logger.error(f"Contact log flush failed: {e}")
+                await asyncio.sleep(self.flush_interval * 5)
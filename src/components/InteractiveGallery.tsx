@@ -10,6 +10,7 @@ import {
   Maximize2,
 } from "lucide-react";
 import axios from "axios";
+import { ImagePlaceholder, placeholderStyle } from "../lib/utils";
 
 interface GalleryEvent {
   _id: string;
@@ -23,8 +24,20 @@ interface GalleryEvent {
   images: string[];
   details: string;
   highlights: string[];
+  placeholders?: {
+    thumbnail?: ImagePlaceholder | null;
+    images?: (ImagePlaceholder | null)[];
+  };
 }
 
+// The list leaves the base64 images out; each one is fetched by URL when shown
+type GalleryEventSummary = Omit<GalleryEvent, "thumbnail" | "images"> & {
+  image_count: number;
+  updated_at?: string;
+};
+
+const API_URL = "https://es-decorations.onrender.com";
+
 const InteractiveGallery = () => {
   const [selectedEvent, setSelectedEvent] = useState<GalleryEvent | null>(null);
   const [currentImageIndex, setCurrentImageIndex] = useState(0);
@@ -36,10 +49,26 @@ const InteractiveGallery = () => {
   useEffect(() => {
     const fetchEvents = async () => {
       try {
-        const response = await axios.get(
-          "https://es-decorations.onrender.com/gallery-events"
+        const response = await axios.get(`${API_URL}/gallery-events`, {
+          params: { include_images: false },
+        });
+        setEvents(
+          response.data.map((event: GalleryEventSummary) => {
+            // Versioned URLs let the browser cache images until the event is edited
+            const version = event.updated_at
+              ? `?v=${encodeURIComponent(event.updated_at)}`
+              : "";
+            const base = `${API_URL}/gallery-events/${event._id}`;
+            return {
+              ...event,
+              thumbnail: `${base}/thumbnail${version}`,
+              images: Array.from(
+                { length: event.image_count },
+                (_, index) => `${base}/images/${index}${version}`
+              ),
+            };
+          })
         );
-        setEvents(response.data);
         setError(null);
       } catch (err) {
         console.error("Error fetching events:", err);
@@ -166,6 +195,9 @@ const InteractiveGallery = () => {
                       src={event.thumbnail}
                       alt={event.title}
                       className="w-full h-full object-cover transform transition-transform duration-500 group-hover:scale-110"
+                      style={placeholderStyle(event.placeholders?.thumbnail)}
+                      loading="lazy"
+                      decoding="async"
                     />
                     <div className="absolute top-4 right-4 bg-white/80 text-gray-800 px-3 py-1 rounded-full text-sm">
                       {event.category}
@@ -350,6 +382,11 @@ const InteractiveGallery = () => {
                             src={image}
                             alt={`Thumbnail ${index + 1}`}
                             className="w-full h-24 object-cover"
+                            style={placeholderStyle(
+                              selectedEvent.placeholders?.images?.[index]
+                            )}
+                            loading="lazy"
+                            decoding="async"
                           />
                         </div>
                       ))}
@@ -438,6 +475,11 @@ const InteractiveGallery = () => {
                         src={image}
                         alt={`Thumbnail ${index + 1}`}
                         className="w-full h-full object-cover"
+                        style={placeholderStyle(
+                          selectedEvent.placeholders?.images?.[index]
+                        )}
+                        loading="lazy"
+                        decoding="async"
                       />
                     </button>
                   ))}
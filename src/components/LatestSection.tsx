@@ -2,14 +2,19 @@ import React, { useRef, useEffect, useState } from "react";
 import { motion, useScroll, useTransform } from "framer-motion";
 import { HeroParallax } from "./ui/hero-parallax";
 import axios from "axios";
+import { ImagePlaceholder } from "../lib/utils";
 
 interface LatestWork {
   _id: string;
   title: string;
   thumbnail: string;
   category: string;
+  placeholders?: { thumbnail?: ImagePlaceholder | null };
+  updated_at?: string;
 }
 
+const API_URL = "https://es-decorations.onrender.com";
+
 const LatestSection = () => {
   const [works, setWorks] = useState<LatestWork[]>([]);
   const sectionRef = useRef(null);
@@ -24,14 +29,19 @@ const LatestSection = () => {
   useEffect(() => {
     const fetchWorks = async () => {
       try {
-        const response = await axios.get(
-          "https://es-decorations.onrender.com/latest-works"
-        );
-        // Transform the works data to include the base64 image data
-        const transformedWorks = response.data.map((work: LatestWork) => ({
-          ...work,
-          thumbnail: `data:image/jpeg;base64,${work.thumbnail}`,
-        }));
+        // The list leaves the base64 thumbnails out; each one is fetched by URL when shown
+        const response = await axios.get(`${API_URL}/latest-works`, {
+          params: { include_images: false },
+        });
+        const transformedWorks = response.data.map((work: LatestWork) => {
+          const version = work.updated_at
+            ? `?v=${encodeURIComponent(work.updated_at)}`
+            : "";
+          return {
+            ...work,
+            thumbnail: `${API_URL}/latest-works/${work._id}/thumbnail${version}`,
+          };
+        });
         setWorks(transformedWorks);
       } catch (error) {
         console.error("Error fetching works:", error);
@@ -35,34 +35,30 @@ const AdminHistory = () => {
   useEffect(() => {
     const fetchDashboardData = async () => {
       try {
-        // Fetch events count
-        const eventsResponse = await axios.get(
-          "https://es-decorations.onrender.com/events"
+        // Counts and recent activity are computed server-side in one request
+        const { data } = await axios.get(
+          "https://es-decorations.onrender.com/admin/stats",
+          {
+            headers: {
+              Authorization: `Bearer ${localStorage.getItem("adminToken")}`,
+            },
+          }
         );
-        const totalEvents = eventsResponse.data.length;
-
-        // Fetch active inquiries
-        const inquiriesResponse = await axios.get(
-          "https://es-decorations.onrender.com/inquiries"
-        );
-        const activeInquiries = inquiriesResponse.data.length;
-
-        // Fetch job applications
-        const applicationsResponse = await axios.get(
-          "https://es-decorations.onrender.com/job-applications"
-        );
-        const totalApplications = applicationsResponse.data.length;
+        const totalEvents = data.events.total;
+        // Unsolved inquiries, flagged ones included, as in the inquiry list
+        const activeInquiries = data.inquiries.unsolved;
+        const totalApplications = data.applications.total;
 
         // Get recent activity from applications and inquiries
         const recentActivity = [
-          ...applicationsResponse.data.slice(0, 3).map((app: any) => ({
+          ...data.applications.recent.slice(0, 3).map((app: any) => ({
             id: app._id,
             type: "Job Application",
             description: `New application for ${app.jobId} position from ${app.name}`,
             time: new Date(app.appliedDate).toLocaleString(),
           })),
-          ...inquiriesResponse.data.slice(0, 3).map((inq: any) => ({
-            id: inq.id,
+          ...data.inquiries.recent.slice(0, 3).map((inq: any) => ({
+            id: inq._id,
             type: "New Inquiry",
             description: `${inq.subject} from ${inq.name}`,
             time: new Date(inq.created_at).toLocaleString(),
@@ -73,13 +69,8 @@ const AdminHistory = () => {
           )
           .slice(0, 3);
 
-        // Get upcoming events
-        const upcomingEvents = eventsResponse.data
-          .filter((event: any) => new Date(event.date) > new Date())
-          .sort(
-            (a: any, b: any) =>
-              new Date(a.date).getTime() - new Date(b.date).getTime()
-          )
+        // Upcoming events arrive sorted by start time
+        const upcomingEvents = data.events.upcoming
           .slice(0, 3)
           .map((event: any) => ({
             id: event._id,
@@ -6,7 +6,7 @@ import {
   useSpring,
   MotionValue,
 } from "framer-motion";
-import { cn } from "../../lib/utils";
+import { cn, ImagePlaceholder, placeholderStyle } from "../../lib/utils";
 
 export const HeroParallax = ({
   products,
@@ -15,6 +15,7 @@ export const HeroParallax = ({
     title: string;
     thumbnail: string;
     category: string;
+    placeholders?: { thumbnail?: ImagePlaceholder | null };
   }[];
 }) => {
   // Dynamic column distribution
@@ -222,6 +223,7 @@ export const ProductCard = ({
     title: string;
     thumbnail: string;
     category: string;
+    placeholders?: { thumbnail?: ImagePlaceholder | null };
   };
   translate: MotionValue<number>;
   getImageSrc: (thumbnail: string) => string;
@@ -243,7 +245,9 @@ export const ProductCard = ({
             src={getImageSrc(product.thumbnail)}
             alt={product.title}
             className="w-full h-full object-cover transition-all duration-500 group-hover/product:scale-110 group-hover/product:brightness-110"
+            style={placeholderStyle(product.placeholders?.thumbnail)}
             loading="lazy"
+            decoding="async"
           />
           <div className="absolute inset-0 bg-gradient-to-t from-black/90 via-black/40 to-transparent opacity-0 group-hover/product:opacity-100 transition-all duration-300"></div>
           <div className="absolute inset-0 ring-1 ring-white/10 rounded-xl opacity-0 group-hover/product:opacity-100 transition-opacity duration-300"></div>
@@ -1,6 +1,29 @@
 import { ClassValue, clsx } from "clsx";
 import { twMerge } from "tailwind-merge";
+import type React from "react";
 
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs));
-}
\ No newline at end of file
+}
+// Tiny blurred preview and dominant colour the API stores for each image
+export interface ImagePlaceholder {
+  lqip: string;
+  color: string;
+  width: number;
+  height: number;
+}
+
+// Paints the placeholder behind an <img> until the full image has loaded
+export function placeholderStyle(
+  placeholder?: ImagePlaceholder | null
+): React.CSSProperties {
+  if (!placeholder) {
+    return {};
+  }
+  return {
+    backgroundColor: placeholder.color,
+    backgroundImage: `url(${placeholder.lqip})`,
+    backgroundSize: "cover",
+    backgroundPosition: "center",
+  };
+}